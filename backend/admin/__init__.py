@@ -1,15 +1,18 @@
 # backend/admin/__init__.py
-import os, os.path, functools, re
-import gspread
-from google.auth import default
-from gspread import utils as gutils
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+import json, os, os.path, functools
+from flask import Blueprint, Response, abort, jsonify, make_response, render_template, request, redirect, url_for, flash, session
 from werkzeug.security import check_password_hash
 
+from . import dedupe
+from .bulk import ImportFileError, job_status, parse_row_list, row_from_fields, start_import
+from .locator import ROW_ID_HEADER, RowConflict, record_version
+from .paging import parse_page_args
+from .throttle import LoginRejected, client_ip, get_login_guard
+
 
 admin_bp = Blueprint("admin", __name__, template_folder="../templates/admin")
 
-MANAGE_LIMIT = 50  # max rows to show in manage table
+MANAGE_LIMIT = 50  # default rows per page in the manage table
 
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
 ADMIN_PASSWORD_HASH = (os.getenv("ADMIN_PASSWORD_HASH") or "").strip()
@@ -46,7 +49,20 @@ def login_submit():
     username = (request.form.get("username") or "").strip()
     password = request.form.get("password") or ""
 
-    if username == ADMIN_USERNAME and check_admin_password(password):
+    # Throttled per IP/username before hashing; the hash runs on a bounded executor.
+    check = (lambda: check_admin_password(password)) if username == ADMIN_USERNAME else None
+    try:
+        ok = get_login_guard().verify(client_ip(request), username, check)
+    except LoginRejected as e:
+        if e.reason == "busy":
+            flash("The server is busy checking other logins. Please try again in a moment.", "warning")
+        else:
+            flash(f"Too many login attempts. Please wait {max(1, round(e.retry_after))} seconds.", "danger")
+        response = make_response(render_template("admin/login.html"), 429)
+        response.headers["Retry-After"] = str(max(1, round(e.retry_after)))
+        return response
+
+    if ok:
         session["admin"] = True  # boolean flag
         flash("Welcome, Margaret!", "success")
         return redirect(url_for("admin.dashboard"))
@@ -62,115 +78,198 @@ def logout():
     return redirect(url_for("home"))
 
 
-# ---------------- Google Sheets helpers ---------------
-def _open_ws_and_headers():
-    """
-    Return (worksheet, header_list) or (None, None) if sheets not configured.
-    Uses Cloud Run runtime service account via google.auth.default().
-    """
-    sheet_url = os.getenv("SHEET_URL", "")
-    m = re.search(r"/spreadsheets/d/([a-zA-Z0-9-_]+)", sheet_url)
-    if not m:
-        return None, None
+# ---------------- Storage helpers ---------------
+def get_storage():
+    # storage.py pulls in gspread and google-auth; import it on the first admin
+    # request rather than when the app starts.
+    from .storage import get_storage as _get_storage
 
-    try:
-        creds, _ = default(scopes=["https://www.googleapis.com/auth/spreadsheets"])
-        gc = gspread.authorize(creds)
-        sh = gc.open_by_key(m.group(1))
-        ws = sh.sheet1
-        headers = ws.row_values(1)
-        return ws, headers
-    except Exception as e:
-        print(f"[ERROR] Sheets auth/open failed: {e}")
-        return None, None
+    return _get_storage()
+
+
+NOT_CONFIGURED = "Google Sheets not configured (check SHEET_URL and GOOGLE_APPLICATION_CREDENTIALS)."
+
+
+def _saved(store, message):
+    """Flash text for a successful write; queued engines say the sheet is still catching up."""
+    return f"{message} (syncing to the sheet)" if store.deferred else message
 
 
+# ---------------- Fragments ----------------
+# The dashboard's forms carry hx-* attributes: with JavaScript, htmx posts them
+# with an HX-Request header and swaps in the returned fragment (one row, or the
+# manage list); without it they post normally and get the redirect back to the
+# full dashboard. Fragments are built from what was just written or from the
+# engine's cached page, so an edit costs its write and no full read.
+def _wants_fragment() -> bool:
+    return request.headers.get("HX-Request") == "true"
 
-def _read_rows_for_manage(ws, headers, limit=MANAGE_LIMIT):
+
+def _written_row(headers, values, sheet_row, row_id):
+    """The row dict the dashboard renders, from values just written (no read-back)."""
+    row = dict(zip(headers, values), sheet_row=sheet_row)
+    row["row_id"] = row_id or str(row.get(ROW_ID_HEADER, "") or "")
+    row["row_version"] = record_version(row, headers)
+    return row
+
+
+def _row_fragment(row, headers, message=None, editing=False):
+    return render_template("admin/_row.html", row=row, headers=headers, id_header=ROW_ID_HEADER,
+                           row_message=message, editing=editing)
+
+
+def _message_fragment(category, text):
+    return render_template("admin/_message.html", category=category, text=text)
+
+
+def _add_answer(body, status):
     """
-    Return a list of dicts for the first N data rows:
-      { 'sheet_row': int,  header1: val1, header2: val2, ... }
+    An add-form answer that is not a new row (an error, a duplicate): sent
+    with a 4xx/5xx status, so the form keeps what was typed, and retargeted
+    from the manage list to the form's own message area.
     """
-    if not ws or not headers:
-        return []
+    return body, status, {"HX-Retarget": "#add-message", "HX-Reswap": "innerHTML"}
+
+
+def _nav_args(args):
+    """The manage list's page/sort/filter state, to thread through fragment links."""
+    page_no, per_page, sort, order, q = parse_page_args(args, MANAGE_LIMIT)
+    return {"page": page_no, "per_page": per_page, "sort": sort, "order": order, "q": q}
+
+
+def _manage_page(store, args):
+    """(headers, Page or None, error) for the manage list; served from the engine's cache where it has one."""
+    headers = store.headers()
+    if not headers:
+        return [], None, None
+    try:
+        return headers, store.page(*parse_page_args(args, MANAGE_LIMIT)), None
+    except Exception as e:
+        print(f"[ERROR] {store.name} page read failed: {e}")
+        return headers, None, f"Could not read the sheet: {e}"
 
-    records = ws.get_all_records()  # list[dict] for all data rows (starting row 2)
-    out = []
-    for idx, rec in enumerate(records[:limit]):
-        rec_copy = dict(rec)
-        rec_copy["sheet_row"] = 2 + idx  # actual row number in the sheet
-        out.append(rec_copy)
-    return out
+
+def _manage_fragment(store, args, message=None):
+    headers, page, error = _manage_page(store, args)
+    if error:
+        message = ("danger", error)
+    return render_template("admin/_manage.html", headers=headers, page=page, manage_rows=page.rows if page else [],
+                           id_header=ROW_ID_HEADER, nav=_nav_args(args), manage_message=message)
 
 
 # ---------------- Dashboard ----------------
 @admin_bp.get("/")
 @login_required
 def dashboard():
-    ws, headers = _open_ws_and_headers()
-    preview = []
-    manage_rows = []
-
-    if ws and headers:
-        all_rows = ws.get_all_records()
-        preview = all_rows[:5]
-        manage_rows = _read_rows_for_manage(ws, headers, MANAGE_LIMIT)
+    store = get_storage()
+    headers, page, error = _manage_page(store, request.args)
+    if error:
+        flash(error, "danger")
 
+    manage_rows = page.rows if page else []
     return render_template(
         "admin/dashboard.html",
-        headers=headers or [],
-        preview=preview,
+        headers=headers,
+        preview=manage_rows[:5],
         manage_rows=manage_rows,
+        page=page,
+        nav=_nav_args(request.args),
+        mirror_status=store.status(),
+        id_header=ROW_ID_HEADER,
+        import_job=job_status(request.args.get("import")),
+        duplicate_policy=dedupe.policy(),
+        link_check=_link_check_status(request.args.get("linkcheck")),
     )
 
 
+@admin_bp.get("/rows")
+@login_required
+def manage_rows():
+    """The manage list alone (paging, sorting and filtering without a full page load)."""
+    if not _wants_fragment():
+        return redirect(url_for("admin.dashboard", **request.args))
+    if request.headers.get("HX-History-Restore-Request") == "true":
+        return dashboard()  # a history-cache miss re-fetches the URL and needs the whole page
+    response = make_response(_manage_fragment(get_storage(), request.args))
+    if request.headers.get("HX-Trigger") == "manage-filter":
+        # The filter form: the address bar shows the dashboard, not this fragment URL
+        response.headers["HX-Push-Url"] = url_for("admin.dashboard", **request.args)
+    return response
+
+
 # ---------------- Add row (all fields optional) ----------------
 @admin_bp.post("/add")
 @login_required
 def add_row():
-    title            = (request.form.get("title") or "").strip()
-    url              = (request.form.get("url") or "").strip()
-    target_audience  = (request.form.get("target_audience") or "").strip()
-    authors          = (request.form.get("authors") or "").strip()
-    publisher        = (request.form.get("publisher") or "").strip()
-    date_published   = (request.form.get("date_published") or "").strip()
-    resource_theme   = (request.form.get("resource_theme") or "").strip()
-    resource_type    = (request.form.get("resource_type") or "").strip()
-    keywords         = (request.form.get("keywords") or "").strip()
-    language         = (request.form.get("language") or "").strip()
-    status           = (request.form.get("status") or "").strip()
-    notes            = (request.form.get("notes") or "").strip()
-
-    ws, headers = _open_ws_and_headers()
-    if not (ws and headers):
-        flash("Google Sheets not configured (check SHEET_URL and GOOGLE_APPLICATION_CREDENTIALS).", "danger")
+    store = get_storage()
+    headers = store.headers()
+    if not headers:
+        if _wants_fragment():
+            return _add_answer(_message_fragment("danger", NOT_CONFIGURED), 503)
+        flash(NOT_CONFIGURED, "danger")
         return redirect(url_for("admin.dashboard"))
 
-    values_map = {
-        "Title":                         title,
-        "URL":                           url,
-        "Target Audience":               target_audience,
-        "Author(s)":                     authors,
-        "Publisher":                     publisher,
-        "Date Pub":                      date_published,
-        "Date Published":                date_published,
-        "Resource Theme":                resource_theme,
-        "Date Pub Resource Theme":       resource_theme,
-        "Resource Type":                 resource_type,
-        "Keywords":                      keywords,
-        "Language":                      language,
-        "Status":                        status,
-        "Notes":                         notes,
-    }
-
-    row = [values_map.get(h, "") for h in headers]
+    # Form fields -> sheet headers (see bulk.FIELD_HEADERS, shared with the importer)
+    row = row_from_fields(request.form, headers)
+
+    on_duplicate = dedupe.policy(request.form.get("on_duplicate"))
+    if on_duplicate != "allow":
+        try:
+            matches = store.find_duplicates(row)
+        except Exception as e:
+            print(f"[WARN] Duplicate check failed, adding anyway: {e}")
+            matches = []
+        if matches and on_duplicate == "merge":
+            return _merge_row(store, headers, matches[0][0], row)
+        if matches:
+            text = f"Not added: looks like a duplicate of {dedupe.describe(matches)}."
+            if _wants_fragment():
+                fields = {k: v for k, v in request.form.items() if k != "on_duplicate"}
+                return _add_answer(render_template("admin/_duplicate.html", text=text, fields=fields,
+                                                   merge_row=matches[0][0]), 409)
+            flash(f"{text} Choose \"Add anyway\" under \"If it looks like a duplicate\" to add it.", "warning")
+            return redirect(url_for("admin.dashboard"))
 
     try:
-        ws.append_row(row, value_input_option="USER_ENTERED")
-        flash("Row added to the sheet ✅", "success")
+        added = store.append(row)
     except Exception as e:
+        if _wants_fragment():
+            return _add_answer(_message_fragment("danger", f"Failed to add row: {e}"), 502)
         flash(f"Failed to add row: {e}", "danger")
+        return redirect(url_for("admin.dashboard"))
+
+    if _wants_fragment():
+        return _row_fragment(added, headers, ("success", _saved(store, "Row added ✅")))
+    flash(_saved(store, "Row added ✅"), "success")
+    return redirect(url_for("admin.dashboard"))
+
+
+def _merge_row(store, headers, sheet_row, row):
+    """Fill the blank cells of the existing row `row` duplicates (found at `sheet_row`) instead of adding it."""
+    existing, status = None, 409
+    try:
+        existing = store.duplicate_of(row, sheet_row)  # the index's position may be stale
+        if existing is None:
+            raise RowConflict("the row it duplicates is gone")
+        sheet_row = existing["sheet_row"]
+        current = [existing.get(h, "") for h in headers]
+        merged = dedupe.merge_values(current, row)
+        filled = sum(1 for old, new in zip(current, merged) if old != new)
+        if filled:
+            sheet_row = store.update(sheet_row, merged, row_id=existing["row_id"], version=existing["row_version"])
+            message = ("success", _saved(store, f"Merged into row {sheet_row}: filled {filled} blank cell(s)."))
+        else:
+            message = ("info", f"Already in the sheet as row {sheet_row}; nothing new to merge.")
+    except RowConflict as e:
+        merged, message = None, ("warning", f"Not merged: {e}. Reload and try again.")
+    except Exception as e:
+        merged, message, status = None, ("danger", f"Merge failed: {e}"), 502
 
+    if _wants_fragment():
+        if merged is None:
+            return _add_answer(_message_fragment(message[0], message[1]), status)
+        return _row_fragment(_written_row(headers, merged, sheet_row, existing["row_id"]), headers, message)
+    flash(message[1], message[0])
     return redirect(url_for("admin.dashboard"))
 
 
@@ -179,8 +278,11 @@ def add_row():
 @login_required
 def update_row():
     sheet_row = request.form.get("sheet_row", type=int)
-    ws, headers = _open_ws_and_headers()
-    if not (ws and headers and sheet_row and sheet_row >= 2):
+    store = get_storage()
+    headers = store.headers()
+    if not (headers and sheet_row and sheet_row >= 2):
+        if _wants_fragment():
+            return _message_fragment("danger", "Update failed (bad row or sheet).")
         flash("Update failed (bad row or sheet).", "danger")
         return redirect(url_for("admin.dashboard"))
 
@@ -195,15 +297,24 @@ def update_row():
         i += 1
 
     row_values = [updates.get(h, "") for h in headers]
+    row_id = request.form.get("row_id", "")
 
     try:
-        start_a1 = gutils.rowcol_to_a1(sheet_row, 1)
-        end_a1   = gutils.rowcol_to_a1(sheet_row, len(headers))
-        ws.update(f"{start_a1}:{end_a1}", [row_values])
-        flash(f"Updated row {sheet_row}.", "success")
+        # row_id/row_version locate the row even if it moved, and refuse stale edits
+        written = store.update(sheet_row, row_values, row_id=row_id, version=request.form.get("row_version", ""))
+        message = ("success", _saved(store, f"Updated row {written}."))
+    except RowConflict as e:
+        written, message = None, ("warning", f"Not saved: {e}. Reload and try again.")
     except Exception as e:
-        flash(f"Update failed: {e}", "danger")
-
+        written, message = None, ("danger", f"Update failed: {e}")
+
+    if _wants_fragment():
+        if written is None:
+            # Keep the form open with what was typed; the stale version stays, so a retry conflicts again.
+            row = dict(_written_row(headers, row_values, sheet_row, row_id), row_version=request.form.get("row_version", ""))
+            return _row_fragment(row, headers, message, editing=True)
+        return _row_fragment(_written_row(headers, row_values, written, row_id), headers, message)
+    flash(message[1], message[0])
     return redirect(url_for("admin.dashboard"))
 
 
@@ -212,15 +323,170 @@ def update_row():
 @login_required
 def delete_row():
     sheet_row = request.values.get("sheet_row", type=int)
-    ws, headers = _open_ws_and_headers()
-    if not (ws and headers and sheet_row and sheet_row >= 2):
+    store = get_storage()
+    headers = store.headers()
+    if not (headers and sheet_row and sheet_row >= 2):
+        if _wants_fragment():
+            return _message_fragment("danger", "Delete failed (bad row or sheet).")
         flash("Delete failed (bad row or sheet).", "danger")
         return redirect(url_for("admin.dashboard"))
 
     try:
-        ws.delete_rows(sheet_row)
-        flash(f"Deleted row {sheet_row}.", "success")
+        deleted = store.delete(sheet_row,
+                               row_id=request.values.get("row_id", ""), version=request.values.get("row_version", ""))
+        message = ("success", _saved(store, f"Deleted row {deleted}."))
+    except RowConflict as e:
+        message = ("warning", f"Not deleted: {e}. Reload and try again.")
     except Exception as e:
-        flash(f"Delete failed: {e}", "danger")
+        message = ("danger", f"Delete failed: {e}")
 
+    if _wants_fragment():
+        # The rows below moved up one, so the page comes back renumbered (from the patched cache).
+        return _manage_fragment(store, request.values, message)
+    flash(message[1], message[0])
     return redirect(url_for("admin.dashboard"))
+
+
+# ---------------- Export ----------------
+@admin_bp.get("/export.<fmt>")
+@login_required
+def export_rows(fmt):
+    """Every row, all columns, as a streamed csv/ndjson/xlsx download."""
+    from backend.export import exporter
+
+    return exporter.response(get_storage(), fmt, "admin-rows")
+
+
+# ---------------- Bulk delete ----------------
+def _row_refs(form):
+    """(sheet_row, row_id, row_version) of the rows ticked in the manage list (see _row.html)."""
+    refs = []
+    for raw in form.getlist("rows"):
+        try:
+            sheet_row, row_id, version = json.loads(raw)
+            refs.append((int(sheet_row), str(row_id or ""), str(version or "")))
+        except (ValueError, TypeError):
+            raise ValueError(f"Bad row selection {raw!r}")
+    return refs
+
+
+def _stale_selection(found):
+    """Warning for a selection that locate_rows() could not fully resolve, or None."""
+    stale = [r for r in found if isinstance(r, RowConflict)]
+    if not stale:
+        return None
+    more = f" (and {len(stale) - 1} more)" if len(stale) > 1 else ""
+    return f"Nothing deleted: {stale[0]}{more}. Reload and try again."
+
+
+@admin_bp.post("/bulk/delete")
+@login_required
+def bulk_delete():
+    try:
+        refs = _row_refs(request.form)
+        typed = parse_row_list(request.form.get("row_ranges"))
+    except ValueError as e:
+        flash(f"Bulk delete failed: {e}", "danger")
+        return redirect(url_for("admin.dashboard"))
+    if not (refs or typed):
+        flash("Select at least one row to delete.", "warning")
+        return redirect(url_for("admin.dashboard"))
+
+    store = get_storage()
+    try:
+        # Ticked rows are found by ID and version, wherever they moved, like delete_row
+        found = store.locate_rows(refs) if refs else []
+        warning = _stale_selection(found)
+        if warning:
+            flash(warning, "warning")
+            return redirect(url_for("admin.dashboard"))
+        if typed:
+            # Typed numbers carry no ID: show the rows they point at now, and delete
+            # those (by ID) only once confirmed.
+            rows = [row for row in map(store.get, sorted(set(found) | typed)) if row]
+            missing = len(set(found) | typed) - len(rows)
+            return render_template("admin/bulk_delete.html", rows=rows, headers=store.headers(), missing=missing)
+        store.delete_many(found)
+        flash(_saved(store, f"Deleted {len(set(found))} row(s)."), "success")
+    except Exception as e:
+        flash(f"Bulk delete failed: {e}", "danger")
+    return redirect(url_for("admin.dashboard"))
+
+
+# ---------------- CSV/XLSX import ----------------
+@admin_bp.post("/import")
+@login_required
+def import_rows():
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        flash("Choose a .csv or .xlsx file to import.", "warning")
+        return redirect(url_for("admin.dashboard"))
+
+    store = get_storage()
+    if not store.headers():
+        flash(NOT_CONFIGURED, "danger")
+        return redirect(url_for("admin.dashboard"))
+    try:
+        job = start_import(store, upload, dedupe.policy(request.form.get("on_duplicate")))
+    except ImportFileError as e:
+        flash(f"Import rejected: {e}", "danger")
+        return redirect(url_for("admin.dashboard"))
+    flash(f"Importing {upload.filename}…", "info")
+    return redirect(url_for("admin.dashboard", **{"import": job.id}))
+
+
+@admin_bp.get("/import/<job_id>")
+@login_required
+def import_status(job_id):
+    status = job_status(job_id)
+    if status is None:
+        abort(404)
+    return jsonify(status)
+
+
+# ---------------- Link check ----------------
+def _link_check_status(job_id):
+    if not job_id:
+        return None
+    from .linkcheck import check_status  # aiohttp and friends load only when link checks are used
+
+    return check_status(job_id)
+
+
+@admin_bp.post("/linkcheck")
+@login_required
+def link_check():
+    from .linkcheck import start_link_check
+
+    store = get_storage()
+    if not store.headers():
+        flash(NOT_CONFIGURED, "danger")
+        return redirect(url_for("admin.dashboard"))
+    job_id, started = start_link_check(store)
+    flash("Checking links…" if started else "A link check is already running.", "info")
+    return redirect(url_for("admin.dashboard", linkcheck=job_id) if job_id else url_for("admin.dashboard"))
+
+
+@admin_bp.get("/linkcheck/<job_id>")
+@login_required
+def link_check_status(job_id):
+    status = _link_check_status(job_id)
+    if status is None:
+        abort(404)
+    return jsonify(status)
+
+
+# ---------------- Live changes ----------------
+@admin_bp.get("/events")
+@login_required
+def row_events():
+    """Row changes as Server-Sent Events (see events.py)."""
+    from .events import SSE_HEADERS, astream, get_feed, stream
+
+    feed = get_feed()
+    last_id = request.headers.get("Last-Event-ID", "")
+    if request.environ.get("backend.asgi"):
+        # backend/asgi.py drives this body on its event loop, so the stream holds no thread.
+        request.environ["backend.async_body"] = astream(feed, last_id)
+        return Response(headers=SSE_HEADERS)
+    return Response(stream(feed, last_id), headers=SSE_HEADERS)
@@ -0,0 +1,357 @@
+# backend/admin/bulk.py
+"""
+Bulk edits and CSV/XLSX import for the admin dashboard.
+
+An uploaded file is spooled to disk and applied by a background ImportJob in
+chunks: new rows go through one append_many() per chunk and rows that carry a
+`sheet_row` column through one update_many() per chunk, i.e. a single
+append_rows / batch_update round trip on the Sheets engine instead of one
+request per row. The dashboard polls the job's progress file.
+
+A `sheet_row` is where the row was when the file was exported, so updates
+also carry the row's ID (a `row_id` column, or the engine's ID column such
+as an exported "ID") and each chunk is re-located with one locate_rows()
+call: rows that moved are written where they are now, and rows that are
+gone are reported instead of overwriting whatever took their place.
+
+Columns are matched against the sheet headers, the add-row form field names
+and their aliases (FIELD_HEADERS, the mapping add_row uses); unknown columns
+reject the file before anything is written.
+
+New rows that repeat a row already in the sheet, or an earlier row of the
+file, by normalized URL or title (dedupe.py) are skipped, merged into the
+existing row's blank cells, or added anyway, per the job's duplicate policy.
+"""
+import csv
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+
+from .dedupe import DuplicateIndex, describe, merge_values
+from .locator import RowConflict
+
+IMPORT_CHUNK = int(os.getenv("IMPORT_CHUNK", "500"))
+IMPORT_MAX_ERRORS = 20  # row errors kept for the report
+# Progress files live here so any gunicorn worker can answer the dashboard's poll.
+IMPORT_DIR = os.getenv("IMPORT_DIR", os.path.join(tempfile.gettempdir(), "admin-imports"))
+
+# Add-row form field -> sheet header(s) it fills.
+FIELD_HEADERS = {
+    "title":           ("Title",),
+    "url":             ("URL",),
+    "target_audience": ("Target Audience",),
+    "authors":         ("Author(s)",),
+    "publisher":       ("Publisher",),
+    "date_published":  ("Date Pub", "Date Published"),
+    "resource_theme":  ("Resource Theme", "Date Pub Resource Theme"),
+    "resource_type":   ("Resource Type",),
+    "keywords":        ("Keywords",),
+    "language":        ("Language",),
+    "status":          ("Status",),
+    "notes":           ("Notes",),
+}
+
+
+class ImportFileError(ValueError):
+    """The uploaded file cannot be imported (bad format or columns)."""
+
+
+def values_map(fields) -> dict:
+    """{sheet header: value} from a mapping of add-row form fields."""
+    out = {}
+    for field, targets in FIELD_HEADERS.items():
+        value = (fields.get(field) or "").strip()
+        for header in targets:
+            out[header] = value
+    return out
+
+
+def row_from_fields(fields, headers) -> list:
+    """A row in header order from add-row form fields."""
+    mapped = values_map(fields)
+    return [mapped.get(h, "") for h in headers]
+
+
+def _norm(name):
+    return " ".join(str(name or "").replace("_", " ").split()).lower()
+
+
+def column_mapping(file_columns, headers):
+    """
+    For each file column, the sheet header indexes it fills (or "sheet_row"/"row_id").
+    Raises ImportFileError listing columns that match nothing.
+    """
+    by_header = {_norm(h): [i] for i, h in enumerate(headers)}
+    by_field = {}
+    for field, targets in FIELD_HEADERS.items():
+        idx = [i for i, h in enumerate(headers) if h in targets]
+        if idx:
+            by_field[_norm(field)] = idx
+    mapping, unknown = [], []
+    for col in file_columns:
+        key = _norm(col)
+        if key in ("sheet row", "row"):
+            mapping.append("sheet_row")
+        elif key == "row id":
+            mapping.append("row_id")
+        elif key in by_header:
+            mapping.append(by_header[key])
+        elif key in by_field:
+            mapping.append(by_field[key])
+        elif not key:
+            mapping.append([])  # blank trailing header cell
+        else:
+            unknown.append(str(col))
+    if unknown:
+        raise ImportFileError(f"Unknown column(s): {', '.join(unknown)}. Expected sheet headers: {', '.join(headers)}")
+    if not any(m for m in mapping if m not in ("sheet_row", "row_id")):
+        raise ImportFileError("No column matches a sheet header.")
+    return mapping
+
+
+def iter_file_rows(path, filename):
+    """Yield the file's rows (header first) as lists of strings, streaming."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportFileError("XLSX import needs openpyxl (pip install openpyxl); upload a CSV instead.")
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in wb.active.iter_rows(values_only=True):
+                yield ["" if v is None else str(v) for v in row]
+        finally:
+            wb.close()
+    elif ext in (".csv", ".txt", ""):
+        with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+            yield from csv.reader(f)
+    else:
+        raise ImportFileError(f"Unsupported file type {ext!r}; upload .csv or .xlsx.")
+
+
+def contiguous_ranges(sheet_rows):
+    """[(start, end), ...] of consecutive rows, bottom-up (the order deletes must run in)."""
+    rows = sorted(set(sheet_rows), reverse=True)
+    out = []
+    for r in rows:
+        if out and out[-1][0] == r + 1:
+            out[-1] = (r, out[-1][1])
+        else:
+            out.append((r, r))
+    return out
+
+
+def parse_row_list(text):
+    """'2, 5-9,12' -> {2, 5, 6, 7, 8, 9, 12}; raises ValueError on junk."""
+    out = set()
+    for part in (text or "").replace(" ", "").split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        lo, hi = int(lo), int(hi or lo)
+        if lo < 2 or hi < lo:
+            raise ValueError(f"Bad row range {part!r}")
+        out.update(range(lo, hi + 1))
+    return out
+
+
+class ImportJob:
+    def __init__(self, store, path, filename, on_duplicate="reject"):
+        self.id = uuid.uuid4().hex[:12]
+        self.store = store
+        self.path = path
+        self.filename = filename
+        self.on_duplicate = on_duplicate  # reject | merge | allow (dedupe.POLICIES)
+        self.state = "queued"  # queued -> running -> done | failed
+        self.rows_read = 0
+        self.appended = 0
+        self.updated = 0
+        self.merged = 0
+        self.skipped = 0
+        self.errors = []
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+
+    def as_dict(self) -> dict:
+        end = self.finished or time.time()
+        return {
+            "id": self.id,
+            "file": self.filename,
+            "state": self.state,
+            "rows_read": self.rows_read,
+            "appended": self.appended,
+            "updated": self.updated,
+            "merged": self.merged,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "error": self.error,
+            "seconds": round(end - self.started, 2),
+        }
+
+    def save(self):
+        os.makedirs(IMPORT_DIR, exist_ok=True)
+        tmp = os.path.join(IMPORT_DIR, f".{self.id}.json")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f)
+        os.replace(tmp, os.path.join(IMPORT_DIR, f"{self.id}.json"))
+
+    def _row_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append(f"line {line}: {message}")
+
+    def _is_duplicate(self, line, headers, values, in_file, updates, located):
+        """
+        True if the new row `values` must not be appended: it repeats a row of
+        the sheet (skipped, or merged into `updates` and re-located by its ID
+        like file updates) or an earlier row of the file (`in_file`, a
+        DuplicateIndex of the rows this job appends).
+        """
+        record = dict(zip(headers, values))
+        if in_file.matches(record):
+            self._row_error(line, "repeats an earlier row of the file")
+            return True
+        matches = self.store.find_duplicates(values)
+        if not matches:
+            in_file.append(record)
+            return False
+        if self.on_duplicate == "merge":
+            existing = self.store.duplicate_of(values, matches[0][0])
+            if existing is None:
+                self._row_error(line, "the row it duplicates is gone")
+                return True
+            sheet_row = existing["sheet_row"]
+            current = updates.get(sheet_row) or [existing.get(h, "") for h in headers]
+            merged = merge_values(current, values)
+            if merged != current:
+                updates[sheet_row] = merged
+                located.setdefault(sheet_row, (line, existing["row_id"]))
+            self.merged += 1
+        else:
+            self._row_error(line, f"duplicate of {describe(matches)}")
+        return True
+
+    def _write_updates(self, updates, located):
+        """
+        update_many() one chunk. `located` maps the chunk's file-addressed
+        sheet_rows to (line, row_id): they are re-located first, and rows
+        that are gone or elsewhere taken are reported, not written.
+        """
+        if located:
+            refs = list(located.items())
+            moved = {}
+            for (sheet_row, (line, _)), now in zip(refs, self.store.locate_rows([(r, i, "") for r, (_, i) in refs])):
+                values = updates.pop(sheet_row)
+                if isinstance(now, RowConflict):
+                    self._row_error(line, f"not updated: {now}")
+                else:
+                    moved[now] = values
+            updates.update(moved)
+        if updates:
+            self.store.update_many(updates)
+            self.updated += len(updates)
+
+    def run(self):
+        self.state = "running"
+        self.save()
+        try:
+            headers = self.store.headers()
+            if not headers:
+                raise ImportFileError("Storage is not configured.")
+            rows = iter_file_rows(self.path, self.filename)
+            mapping = column_mapping(next(rows, []), headers)
+            id_col = headers.index(self.store.id_header) if self.store.id_header in headers else None
+            appends, updates, located = [], {}, {}
+            in_file = DuplicateIndex()
+            for line, raw in enumerate(rows, start=2):
+                self.rows_read += 1
+                if not any(v.strip() for v in raw):
+                    self.skipped += 1
+                    continue
+                values = [""] * len(headers)
+                sheet_row, row_id = None, ""
+                for target, value in zip(mapping, raw):
+                    if target == "sheet_row":
+                        sheet_row = value.strip()
+                    elif target == "row_id":
+                        row_id = value.strip()
+                    else:
+                        for i in target:
+                            values[i] = value.strip()
+                if sheet_row:
+                    try:
+                        sheet_row = int(float(sheet_row))
+                    except ValueError:
+                        sheet_row = 0
+                    if sheet_row < 2:
+                        self._row_error(line, "sheet_row must be a number >= 2")
+                        continue
+                    updates[sheet_row] = values
+                    located[sheet_row] = (line, row_id or (values[id_col] if id_col is not None else ""))
+                elif self.on_duplicate == "allow" or not self._is_duplicate(line, headers, values, in_file, updates, located):
+                    appends.append(values)
+                if len(appends) >= IMPORT_CHUNK:
+                    self.store.append_many(appends)
+                    self.appended += len(appends)
+                    appends = []
+                    self.save()
+                if len(updates) >= IMPORT_CHUNK:
+                    self._write_updates(updates, located)
+                    updates, located = {}, {}
+                    self.save()
+            if updates:
+                self._write_updates(updates, located)
+            if appends:
+                self.store.append_many(appends)
+                self.appended += len(appends)
+            self.state = "done"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"[ERROR] Import {self.id} ({self.filename}) failed: {e}")
+        finally:
+            self.finished = time.time()
+            self.save()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+def start_import(store, upload, on_duplicate="reject"):
+    """
+    Spool a werkzeug FileStorage to disk, check its header row and import it
+    in a background thread. Raises ImportFileError for files that cannot work.
+    """
+    filename = upload.filename or "upload.csv"
+    fd, path = tempfile.mkstemp(prefix="admin-import-", suffix=os.path.splitext(filename)[1])
+    with os.fdopen(fd, "wb") as out:
+        upload.save(out)
+    try:
+        rows = iter_file_rows(path, filename)
+        column_mapping(next(rows, []), store.headers())
+        rows.close()
+    except Exception:
+        os.unlink(path)
+        raise
+    job = ImportJob(store, path, filename, on_duplicate)
+    job.save()
+    threading.Thread(target=job.run, name=f"import-{job.id}", daemon=True).start()
+    return job
+
+
+def job_status(job_id):
+    """The progress dict of an import job, or None."""
+    if not re.fullmatch(r"[0-9a-f]{12}", job_id or ""):
+        return None
+    try:
+        with open(os.path.join(IMPORT_DIR, f"{job_id}.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
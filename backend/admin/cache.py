@@ -0,0 +1,261 @@
+# backend/admin/cache.py
+"""
+In-process TTL cache of worksheet records.
+
+Entries are keyed by (spreadsheet_id, worksheet_title) and hold the list of
+dicts returned by ws.get_all_records(). Admin writes patch the cached list
+(write-through) so a successful add/update/delete does not force the next
+page view to download the whole sheet again. A list that has been handed
+out is never changed: the first patch after get()/peek() copies it, so an
+export or catalog build iterating it on another thread sees one consistent
+snapshot. A load that a patch overtook (it started before the write and may
+not include it) is returned to its caller but not cached. The same patches keep a
+RowLocator (row ID -> sheet_row) and a DuplicateIndex (normalized URL/title
+-> rows) in step with the list, so writes can find a row by ID and adds can
+spot duplicates without a download.
+
+The DuplicateIndex outlives the records it was built from: once they expire
+it is still patched by this process's writes and answers for up to
+DUPLICATE_INDEX_TTL seconds; past that, or after invalidate(), it still
+answers but one background load rebuilds it. So an add only waits for a
+download when no index exists at all (the first one after startup).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .dedupe import DuplicateIndex
+from .locator import RowLocator
+
+RECORD_CACHE_TTL = float(os.getenv("RECORD_CACHE_TTL", "30"))
+RECORD_CACHE_MAX = int(os.getenv("RECORD_CACHE_MAX", "8"))
+DUPLICATE_INDEX_TTL = float(os.getenv("DUPLICATE_INDEX_TTL", "300"))
+
+
+def cache_key(ws):
+    """Cache key for a gspread worksheet."""
+    return (ws.spreadsheet_id, ws.title)
+
+
+class RecordCache:
+    def __init__(self, ttl=RECORD_CACHE_TTL, max_entries=RECORD_CACHE_MAX, duplicate_ttl=DUPLICATE_INDEX_TTL):
+        self.ttl = ttl
+        self.duplicate_ttl = duplicate_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> [loaded_at, records, handed_out]
+        self._revisions = {}  # key -> int, bumped on every load or patch
+        self._locators = {}  # key -> (id_header, RowLocator), built on first locate() after a load
+        self._dupes = {}  # key -> [loaded_at of its records, DuplicateIndex], rebuilt after a newer load
+        self._dupes_refreshing = set()  # keys with a background rebuild running
+        self._counts = {}  # key -> [counted_at, data rows], sizes plain pages while the records are cold
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, key, handing_out=False):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            return None
+        self._entries.move_to_end(key)
+        if handing_out:
+            entry[2] = True
+        return entry[1]
+
+    def _writable(self, key):
+        """The fresh records for `key`, copied first if a caller may still hold them; None if not cached."""
+        records = self._fresh(key)
+        if records is None:
+            return None
+        entry = self._entries[key]
+        if entry[2]:
+            entry[1] = records = list(records)
+            entry[2] = False
+        return records
+
+    def get(self, key, loader):
+        """
+        Return the cached records for `key`, calling loader() on a miss.
+        The returned list is shared; callers must not mutate it (patches
+        never do, see above).
+        """
+        with self._lock:
+            records = self._fresh(key, handing_out=True)
+            if records is not None:
+                self.hits += 1
+                return records
+            self.misses += 1
+            revision = self._revisions.get(key, 0)
+
+        records = list(loader())
+        with self._lock:
+            if self._revisions.get(key, 0) != revision:
+                return records  # a write landed during the load: don't keep what may predate it
+            self._entries[key] = [time.monotonic(), records, True]
+            self._locators.pop(key, None)
+            self._bump(key)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._locators.pop(evicted, None)
+                self._dupes.pop(evicted, None)
+        return records
+
+    def _bump(self, key):
+        self._revisions[key] = self._revisions.get(key, 0) + 1
+
+    def revision(self, key):
+        """Counter that changes whenever the cached records for `key` change, or this process writes to it."""
+        with self._lock:
+            return self._revisions.get(key, 0)
+
+    def peek(self, key):
+        """Return the cached records for `key` if fresh, without loading."""
+        with self._lock:
+            return self._fresh(key, handing_out=True)
+
+    def row_count(self, key, counter):
+        """
+        Data rows for `key`: len() of fresh records, else counter()'s result,
+        kept for the TTL and patched by appends and deletes.
+        """
+        with self._lock:
+            records = self._fresh(key)
+            if records is not None:
+                return len(records)
+            entry = self._counts.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                return entry[1]
+            revision = self._revisions.get(key, 0)
+        count = counter()
+        with self._lock:
+            if self._revisions.get(key, 0) == revision:
+                self._counts[key] = [time.monotonic(), count]
+        return count
+
+    def locate(self, key, row_id, id_header):
+        """
+        Current sheet_row of the row whose `id_header` column is `row_id`, from
+        fresh cached records only; None if not cached or not found.
+        """
+        with self._lock:
+            records = self._fresh(key)
+            if records is None:
+                return None
+            entry = self._locators.get(key)
+            if entry is None or entry[0] != id_header:
+                entry = self._locators[key] = (id_header, RowLocator(r.get(id_header, "") for r in records))
+            return entry[1].sheet_row(row_id)
+
+    def find_duplicates(self, key, record, url_header, title_header, exclude_row=None, loader=None):
+        """
+        DuplicateIndex.matches() for `record`, from an index built from the
+        freshest cached records, or None if there is no index and the records
+        are not cached. An index older than duplicate_ttl is still used, and
+        rebuilt from loader() in the background.
+        """
+        with self._lock:
+            records = self._fresh(key)
+            entry = self._dupes.get(key)
+            if entry is not None and (entry[1].url_header, entry[1].title_header) != (url_header, title_header):
+                entry = None
+            if records is not None and (entry is None or entry[0] < self._entries[key][0]):
+                entry = self._dupes[key] = [self._entries[key][0], DuplicateIndex(records, url_header, title_header)]
+            if entry is None:
+                return None
+            if (records is None and loader is not None and key not in self._dupes_refreshing
+                    and time.monotonic() - entry[0] > self.duplicate_ttl):
+                self._dupes_refreshing.add(key)
+                threading.Thread(target=self._refresh_duplicates, args=(key, url_header, title_header, loader),
+                                 name="duplicate-index-refresh", daemon=True).start()
+            return entry[1].matches(record, exclude_row)
+
+    def _refresh_duplicates(self, key, url_header, title_header, loader):
+        """Reload the records and rebuild the DuplicateIndex from them, off the request path."""
+        try:
+            records = self.get(key, loader)
+            index = DuplicateIndex(records, url_header, title_header)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is records:  # no write patched them since
+                    self._dupes[key] = [entry[0], index]
+        except Exception as e:
+            print(f"[WARN] Duplicate index refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._dupes_refreshing.discard(key)
+
+    def duplicate_stats(self, key):
+        with self._lock:
+            entry = self._dupes.get(key)
+            if entry is None:
+                return None
+            return dict(entry[1].stats(), age_seconds=round(time.monotonic() - entry[0], 1))
+
+    def _locator(self, key):
+        entry = self._locators.get(key)
+        return entry if entry is not None else (None, None)
+
+    # ---- write-through patches (sheet_row is the 1-based sheet row, data starts at 2) ----
+    def append(self, key, record):
+        with self._lock:
+            records = self._writable(key)
+            if records is not None:
+                records.append(dict(record))
+                id_header, locator = self._locator(key)
+                if locator is not None:
+                    locator.append(record.get(id_header, ""))
+            if key in self._dupes:  # patched even after the records expired
+                self._dupes[key][1].append(record)
+            if key in self._counts:
+                self._counts[key][1] += 1
+            self._bump(key)
+
+    def update(self, key, sheet_row, record):
+        with self._lock:
+            records = self._writable(key)
+            idx = sheet_row - 2
+            if records is not None and 0 <= idx < len(records):
+                records[idx] = dict(record)
+                id_header, locator = self._locator(key)
+                if locator is not None:
+                    locator.set_id(sheet_row, record.get(id_header, ""))
+            if key in self._dupes:
+                self._dupes[key][1].update(sheet_row, record)
+            self._bump(key)
+
+    def delete(self, key, sheet_row):
+        with self._lock:
+            records = self._writable(key)
+            idx = sheet_row - 2
+            if records is not None and 0 <= idx < len(records):
+                del records[idx]
+                _, locator = self._locator(key)
+                if locator is not None:
+                    locator.delete(sheet_row)
+            if key in self._dupes:
+                self._dupes[key][1].delete(sheet_row)
+            if key in self._counts:
+                self._counts[key][1] = max(0, self._counts[key][1] - 1)
+            self._bump(key)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._locators.clear()
+                self._dupes.clear()
+                self._counts.clear()
+            else:
+                self._entries.pop(key, None)
+                self._locators.pop(key, None)
+                self._counts.pop(key, None)
+                if key in self._dupes:  # still answers, but is rebuilt from the next load
+                    self._dupes[key][0] = float("-inf")
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                "locators": len(self._locators), "duplicate_indexes": len(self._dupes)}
+
+
+record_cache = RecordCache()
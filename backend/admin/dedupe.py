@@ -0,0 +1,252 @@
+# backend/admin/dedupe.py
+"""
+Duplicate detection for new rows, by normalized URL and normalized title.
+
+normalize_url() folds the spellings of one address together: scheme
+(http/https), host case, "www.", default ports, percent-encoding, trailing
+slashes, fragments, tracking parameters (utm_*, fbclid, ...) and query
+parameter order. normalize_title() folds case, accents, punctuation and
+spacing.
+
+DuplicateIndex maps both keys to rows with dicts, so a lookup is O(1); row
+positions come from a LiveSlots tree like the RowLocator's, so it is patched
+on every append, update and delete instead of being rebuilt. The Sheets
+engine keeps one next to its cached records (RecordCache.find_duplicates);
+other engines rebuild theirs from local data when their revision moves.
+
+The add form and imports consult it before writing (DUPLICATE_POLICY):
+  reject  refuse the row and point at the existing one (the default);
+  merge   fill the existing row's blank cells from the new row instead;
+  allow   add it anyway.
+"""
+import functools
+import os
+import re
+import sys
+import time
+import unicodedata
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit
+
+from .locator import LiveSlots
+
+DUPLICATE_URL_HEADER = os.getenv("DUPLICATE_URL_HEADER", "URL")
+DUPLICATE_TITLE_HEADER = os.getenv("DUPLICATE_TITLE_HEADER", "Title")
+DUPLICATE_POLICY = os.getenv("DUPLICATE_POLICY", "reject").strip().lower()
+POLICIES = ("reject", "merge", "allow")
+# Normalized keys are memoized by raw value, so rebuilding the index after the
+# record cache reloads an unchanged sheet is mostly dict lookups.
+DUPLICATE_KEY_MEMO = int(os.getenv("DUPLICATE_KEY_MEMO", str(1 << 18)))
+
+_TRACKING_PARAM_RE = re.compile(r"^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|ref_src)$", re.I)
+_SLASHES_RE = re.compile(r"/{2,}")
+# mailto:, doi:, urn: ... kept as they are (but "example.org:8080/x" is a host and port)
+_OPAQUE_RE = re.compile(r"^(?:mailto|doi|urn|tel|data|isbn):|^[a-z][a-z0-9+.-]*:(?!\d)", re.I)
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_DEFAULT_PORTS = {80, 443}
+
+
+def normalize_url(url) -> str:
+    """Canonical form of a URL for duplicate checks ("" for blank)."""
+    return _normalize_url(str(url or "").strip())
+
+
+@functools.lru_cache(maxsize=DUPLICATE_KEY_MEMO)
+def _normalize_url(text):
+    if not text:
+        return ""
+    if "://" not in text:
+        if _OPAQUE_RE.match(text):
+            return text.casefold()
+        text = "http://" + text.lstrip("/")  # "example.org/page"
+    try:
+        parts = urlsplit(text)
+        port = parts.port
+    except ValueError:
+        return text.casefold()
+    scheme = parts.scheme.lower()
+    if scheme == "https":
+        scheme = "http"  # the same resource either way
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    if port and port not in _DEFAULT_PORTS:
+        host = f"{host}:{port}"
+    path = parts.path
+    if "//" in path:
+        path = _SLASHES_RE.sub("/", path)
+    if "%" in path or not path.isascii() or " " in path:
+        path = quote(unquote(path), safe="/:@!$&'()*+,;=-._~")
+    path = path.rstrip("/") or "/"
+    if not parts.query:
+        return f"{scheme}://{host}{path}"
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _TRACKING_PARAM_RE.match(k)]
+    return f"{scheme}://{host}{path}" + (f"?{urlencode(sorted(query))}" if query else "")
+
+
+def normalize_title(title) -> str:
+    """Title with case, accents, punctuation and spacing folded away ("" for blank)."""
+    return _normalize_title(str(title or ""))
+
+
+@functools.lru_cache(maxsize=DUPLICATE_KEY_MEMO)
+def _normalize_title(text):
+    if text.isascii():
+        text = text.lower()
+    else:
+        text = unicodedata.normalize("NFKD", text).casefold()
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def policy(value=None) -> str:
+    """A valid DUPLICATE_POLICY from a form value, falling back to the configured default."""
+    value = (value or "").strip().lower()
+    if value in POLICIES:
+        return value
+    return DUPLICATE_POLICY if DUPLICATE_POLICY in POLICIES else "reject"
+
+
+def same_entry(record, existing, url_header=DUPLICATE_URL_HEADER, title_header=DUPLICATE_TITLE_HEADER) -> bool:
+    """True if row dict `existing` has `record`'s normalized URL or title, i.e. is still a duplicate of it."""
+    url, title = normalize_url(record.get(url_header, "")), normalize_title(record.get(title_header, ""))
+    return bool(url and url == normalize_url(existing.get(url_header, ""))
+                or title and title == normalize_title(existing.get(title_header, "")))
+
+
+def merge_values(existing, new) -> list:
+    """`existing` with its blank cells filled from `new` (both in header order)."""
+    width = max(len(existing), len(new))
+    existing = list(existing) + [""] * (width - len(existing))
+    new = list(new) + [""] * (width - len(new))
+    return [old if str(old).strip() else val for old, val in zip(existing, new)]
+
+
+def describe(matches) -> str:
+    """'row 12 (same URL)', 'rows 12 (same URL), 40 (same title)'."""
+    parts = [f"{row} (same {'URL' if field == 'url' else 'title'})" for row, field in matches]
+    return ("row " if len(parts) == 1 else "rows ") + ", ".join(parts)
+
+
+class DuplicateIndex:
+    """
+    Normalized URL and title -> rows, maintained like a RowLocator. Keys map
+    to a slot, or to a list of slots when several rows share them.
+    """
+
+    def __init__(self, records=(), url_header=DUPLICATE_URL_HEADER, title_header=DUPLICATE_TITLE_HEADER):
+        self.url_header = url_header
+        self.title_header = title_header
+        t0 = time.perf_counter()
+        self._rebuild([self.keys(r) for r in records])
+        self.build_seconds = time.perf_counter() - t0
+
+    def keys(self, record):
+        """(url key, title key) of a record dict."""
+        return normalize_url(record.get(self.url_header, "")), normalize_title(record.get(self.title_header, ""))
+
+    def _rebuild(self, keys):
+        self._keys = list(keys)  # slot - 1 -> (url key, title key), None once deleted
+        self._slots = LiveSlots(len(self._keys))
+        self._by_url = {}
+        self._by_title = {}
+        for slot, (url, title) in enumerate(self._keys, start=1):
+            self._add(self._by_url, url, slot)
+            self._add(self._by_title, title, slot)
+
+    @staticmethod
+    def _add(table, key, slot):
+        if not key:
+            return
+        held = table.get(key)
+        if held is None:
+            table[key] = slot
+        elif isinstance(held, list):
+            held.append(slot)
+        else:
+            table[key] = [held, slot]
+
+    @staticmethod
+    def _remove(table, key, slot):
+        held = table.get(key)
+        if held == slot:
+            del table[key]
+        elif isinstance(held, list) and slot in held:
+            held.remove(slot)
+            if len(held) == 1:
+                table[key] = held[0]
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _rows(self, table, key):
+        held = table.get(key) if key else None
+        if held is None:
+            return []
+        return [1 + self._slots.rank(s) for s in (held if isinstance(held, list) else (held,))]
+
+    def matches(self, record, exclude_row=None) -> list:
+        """[(sheet_row, "url" | "title"), ...] of other rows that `record` duplicates; URL matches first."""
+        url, title = self.keys(record)
+        out, seen = [], {exclude_row}
+        for field, rows in (("url", self._rows(self._by_url, url)), ("title", self._rows(self._by_title, title))):
+            for row in sorted(rows):
+                if row not in seen:
+                    seen.add(row)
+                    out.append((row, field))
+        return out
+
+    # ---- patches, mirroring RecordCache's (sheet_row is 1-based, data starts at 2) ----
+    def append(self, record):
+        url, title = self.keys(record)
+        self._keys.append((url, title))
+        slot = self._slots.append()
+        self._add(self._by_url, url, slot)
+        self._add(self._by_title, title, slot)
+
+    def update(self, sheet_row, record):
+        if not 2 <= sheet_row <= len(self._slots) + 1:
+            return
+        slot = self._slots.find(sheet_row - 1)
+        old, new = self._keys[slot - 1], self.keys(record)
+        if old == new:
+            return
+        self._remove(self._by_url, old[0], slot)
+        self._remove(self._by_title, old[1], slot)
+        self._keys[slot - 1] = new
+        self._add(self._by_url, new[0], slot)
+        self._add(self._by_title, new[1], slot)
+
+    def delete(self, sheet_row):
+        if not 2 <= sheet_row <= len(self._slots) + 1:
+            return
+        slot = self._slots.find(sheet_row - 1)
+        url, title = self._keys[slot - 1]
+        self._remove(self._by_url, url, slot)
+        self._remove(self._by_title, title, slot)
+        self._keys[slot - 1] = None
+        self._slots.delete(slot)
+        if self._slots.sparse():
+            self._rebuild([k for k in self._keys if k is not None])  # drop tombstones
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the index's own structures (keys, dicts, slot lists, tree)."""
+        size = sys.getsizeof(self._keys) + sys.getsizeof(self._slots._tree)
+        size += sys.getsizeof(self._by_url) + sys.getsizeof(self._by_title)
+        strings = set()
+        for entry in self._keys:
+            if entry is not None:
+                size += sys.getsizeof(entry)
+                strings.update(entry)
+        size += sum(sys.getsizeof(s) for s in strings)
+        for table in (self._by_url, self._by_title):
+            size += sum(sys.getsizeof(v) for v in table.values() if isinstance(v, list))
+        return size + 28 * len(self._slots._tree)  # the tree's small ints
+
+    def stats(self) -> dict:
+        return {
+            "rows": len(self),
+            "urls": len(self._by_url),
+            "titles": len(self._by_title),
+            "build_seconds": round(self.build_seconds, 4),
+            "memory_bytes": self.memory_bytes(),
+        }
@@ -0,0 +1,457 @@
+# backend/admin/events.py
+"""
+Live change feed for open dashboards (/admin/events, Server-Sent Events).
+
+One ChangeFeed per process runs a daemon thread that notices row changes
+and turns them into "added" / "updated" / "deleted" events. It checks cheap
+tokens before it reads any rows:
+
+  * every second, the engine's change_token() - for Sheets the record
+    cache's revision, which moves on this process's own writes and on every
+    reload - costs no API call, so an edit made here shows up at once;
+  * every EVENTS_POLL_INTERVAL, the engine's source_token() - for Sheets the
+    spreadsheet's Drive modifiedTime, one small metadata request - catches
+    edits made by other workers and by people in the sheet itself. Only when
+    it moves are the rows re-read (and the record cache refreshed with them).
+    Without the Drive scope the rows are re-read every EVENTS_PULL_INTERVAL.
+
+A change is diffed against the previous snapshot by skipping the common
+prefix and suffix of the two row lists (a slice comparison, mostly pointer
+checks since unchanged rows share their dicts), then matching the rows left
+in between by ID. A burst larger than EVENTS_MAX_BATCH (an import, a bulk
+delete) becomes a single "reset" event, as does a change of columns.
+
+Events carry ids "<epoch>-<seq>"; the last EVENTS_HISTORY are kept, so a
+reconnecting browser (Last-Event-ID) gets what it missed, or "reset" when
+they are gone or it was talking to another worker.
+
+How a connection is held depends on the server. Under gunicorn's asyncio
+worker (backend/asgi.py) the stream is driven on the event loop and costs no
+thread. Under a threaded server (gthread, the dev server) each stream holds
+a thread, so it ends after EVENTS_STREAM_SECONDS and at most
+EVENTS_MAX_STREAMS run at once per process; extra dashboards are told to
+retry, which degrades them to polling instead of starving other requests.
+The poller sleeps while nobody has listened for EVENTS_IDLE seconds.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from .locator import ROW_ID_HEADER, record_version
+
+EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "5"))
+EVENTS_PULL_INTERVAL = float(os.getenv("EVENTS_PULL_INTERVAL", "30"))  # re-read period without a source token
+EVENTS_VERIFY_INTERVAL = float(os.getenv("EVENTS_VERIFY_INTERVAL", "600"))  # re-read anyway, in case a token lags
+EVENTS_HISTORY = int(os.getenv("EVENTS_HISTORY", "500"))
+EVENTS_MAX_BATCH = int(os.getenv("EVENTS_MAX_BATCH", "200"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+EVENTS_IDLE = float(os.getenv("EVENTS_IDLE", "60"))
+EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "3000"))
+# Threaded servers only (see above).
+EVENTS_STREAM_SECONDS = float(os.getenv("EVENTS_STREAM_SECONDS", "25"))
+EVENTS_MAX_STREAMS = int(os.getenv("EVENTS_MAX_STREAMS", str(max(1, int(os.getenv("GUNICORN_THREADS", "8")) // 4))))
+
+LOCAL_TICK = 1.0  # seconds between change_token() checks
+DIFF_CHUNK = 1024  # rows compared per slice while skipping the unchanged prefix/suffix
+
+SSE_HEADERS = {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # nginx and friends: do not buffer the stream
+}
+
+
+# ---------------- Diff ----------------
+def _same(a, b):
+    """Rows equal up to get_all_records() numericising ("2020" vs 2020)."""
+    if a == b:
+        return True
+    headers = list(dict.fromkeys([*a, *b]))
+    return record_version(a, headers) == record_version(b, headers)
+
+
+def _common_prefix(old, new, limit):
+    i = 0
+    while i < limit:
+        step = min(DIFF_CHUNK, limit - i)
+        if old[i:i + step] == new[i:i + step]:
+            i += step
+            continue
+        while old[i] == new[i]:
+            i += 1
+        return i
+    return limit
+
+
+def _common_suffix(old, new, limit):
+    n, m, k = len(old), len(new), 0
+    while k < limit:
+        step = min(DIFF_CHUNK, limit - k)
+        if old[n - k - step:n - k] == new[m - k - step:m - k]:
+            k += step
+            continue
+        while old[n - k - 1] == new[m - k - 1]:
+            k += 1
+        return k
+    return limit
+
+
+def diff_records(old, new, id_header=ROW_ID_HEADER) -> list:
+    """
+    [(kind, sheet_row, record), ...] that turn `old` into `new` (lists of
+    record dicts in sheet order). "deleted" rows carry their old position and
+    record, the others their new ones. Rows are matched by `id_header` where
+    they have one, by position otherwise.
+    """
+    lo = _common_prefix(old, new, min(len(old), len(new)))
+    hi = _common_suffix(old, new, min(len(old), len(new)) - lo)
+    old_mid, new_mid = old[lo:len(old) - hi], new[lo:len(new) - hi]
+    if not old_mid and not new_mid:
+        return []
+
+    def key(r):
+        row_id = r.get(id_header)
+        return None if row_id in (None, "") else row_id
+
+    old_by_id = {}
+    for i, r in enumerate(old_mid):
+        if key(r) is not None:
+            old_by_id.setdefault(key(r), i)
+    changes, matched, new_loose = [], set(), []
+    for j, r in enumerate(new_mid):
+        i = old_by_id.get(key(r))
+        if i is not None and i not in matched:
+            matched.add(i)
+            if not _same(old_mid[i], r):
+                changes.append(("updated", lo + j + 2, r))
+        elif key(r) is None:
+            new_loose.append(j)
+        else:
+            changes.append(("added", lo + j + 2, r))
+    # Rows without an ID pair up by position; what is left over was added or deleted.
+    old_loose = [i for i, r in enumerate(old_mid) if key(r) is None]
+    for i, j in zip(old_loose, new_loose):
+        if not _same(old_mid[i], new_mid[j]):
+            changes.append(("updated", lo + j + 2, new_mid[j]))
+    changes += [("added", lo + j + 2, new_mid[j]) for j in new_loose[len(old_loose):]]
+    deleted = [("deleted", lo + i + 2, old_mid[i]) for i in old_loose[len(new_loose):]]
+    deleted += [("deleted", lo + i + 2, r) for i, r in enumerate(old_mid) if key(r) is not None and i not in matched]
+    return sorted(deleted, key=lambda c: -c[1]) + sorted(changes, key=lambda c: c[1])
+
+
+# ---------------- Feed ----------------
+def _storage():
+    from .storage import get_storage  # gspread and friends load with the first listener, not the app
+
+    return get_storage()
+
+
+class ChangeFeed:
+    """Polls a storage engine for row changes and keeps the recent ones as numbered events."""
+
+    def __init__(self, get_store=_storage, history=EVENTS_HISTORY):
+        self.get_store = get_store
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events = deque(maxlen=history)  # (seq, kind, data)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._wakers = set()
+        self._listeners = 0
+        self._last_listened = time.monotonic()
+        self._wake = threading.Event()
+        self._thread = None
+        # poller state
+        self._records = None
+        self._headers = None
+        self._change_token = None
+        self._source_token = None
+        self._probe_at = 0.0
+        self._pulled_at = 0.0
+        self._probe_ok = True
+        self.mode = "starting"
+        self.polls = self.probes = self.pulls = self.diffs = 0
+        self.last_error = None
+
+    # ---- events ----
+    def cursor(self) -> int:
+        with self._cond:
+            return self._seq
+
+    def event_id(self, seq) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def parse_id(self, event_id):
+        """seq of an id from this feed that is still replayable, else None."""
+        epoch, _, seq = (event_id or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        with self._cond:
+            oldest = self._events[0][0] if self._events else self._seq + 1
+            return seq if oldest - 1 <= seq <= self._seq else None
+
+    def after(self, seq) -> list:
+        """Events newer than `seq`, oldest first."""
+        with self._cond:
+            if seq >= self._seq:
+                return []
+            return [e for e in self._events if e[0] > seq]
+
+    def wait(self, seq, timeout) -> list:
+        """after(seq), blocking up to `timeout` seconds for something to arrive."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq, timeout)
+        return self.after(seq)
+
+    def publish(self, kind, data):
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, kind, data))
+            self._cond.notify_all()
+            wakers = list(self._wakers)
+        for wake in wakers:
+            try:
+                wake()
+            except Exception:  # e.g. the loop of a stream that just closed
+                pass
+
+    # ---- listeners ----
+    def listen(self, waker=None):
+        """Register a stream (and a callback run after each publish); starts the poller."""
+        with self._cond:
+            self._listeners += 1
+            self._last_listened = time.monotonic()
+            if waker is not None:
+                self._wakers.add(waker)
+        self.start()
+
+    def unlisten(self, waker=None):
+        with self._cond:
+            self._listeners -= 1
+            self._last_listened = time.monotonic()
+            self._wakers.discard(waker)
+
+    def _idle(self):
+        with self._cond:
+            return self._listeners <= 0 and time.monotonic() - self._last_listened > EVENTS_IDLE
+
+    # ---- poller ----
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._cond:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="admin-events", daemon=True)
+                    self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            if self._idle():
+                self.mode = "idle"
+                self._wake.wait()
+            self._wake.clear()
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                if str(e) != self.last_error:
+                    print(f"[WARN] change feed poll failed: {e}")
+                self.last_error = str(e)
+            self._wake.wait(LOCAL_TICK)
+
+    def poll(self):
+        """One round: the local token, and the source token when it is due. Returns the changes published."""
+        store = self.get_store()
+        self.polls += 1
+        now = time.monotonic()
+        if self._records is None:
+            return self._pull(store, now, baseline=True)
+
+        published = 0
+        token = store.change_token()
+        if token != self._change_token:
+            self._change_token = token
+            published += self._diff(store)
+            self._adopt_source_token(store)
+
+        if now - self._probe_at >= EVENTS_POLL_INTERVAL:
+            self._probe_at = now
+            try:
+                source = store.source_token()
+                self._probe_ok = True
+            except Exception as e:
+                if self._probe_ok:
+                    print(f"[WARN] change feed: no cheap revision for {store.name} ({e}); "
+                          f"re-reading rows every {EVENTS_PULL_INTERVAL:g}s")
+                self._probe_ok, source = False, None
+            self.probes += 1
+            if source is not None:
+                self.mode = "revision"
+                if source != self._source_token or now - self._pulled_at >= EVENTS_VERIFY_INTERVAL:
+                    self._source_token = source
+                    published += self._pull(store, now)
+            elif not self._probe_ok:
+                self.mode = "pull"
+                if now - self._pulled_at >= EVENTS_PULL_INTERVAL:
+                    published += self._pull(store, now)
+            else:
+                self.mode = "local"  # the engine's own revision sees every change
+        return published
+
+    def _adopt_source_token(self, store):
+        """
+        This process's own writes move the source token too (Drive's
+        modifiedTime), and they were just diffed from the local token: take
+        the new value as the baseline, so the next probe pulls only if the
+        source moves again. An outside edit landing in between waits for the
+        EVENTS_VERIFY_INTERVAL pull.
+        """
+        if self._source_token is None or not self._probe_ok:
+            return
+        try:
+            self._source_token = store.source_token()
+        except Exception:
+            return  # the next probe reports it
+        self.probes += 1
+
+    def _pull(self, store, now, baseline=False):
+        """Re-read the rows from the source (refreshing the engine's cache) and diff; or take the first snapshot."""
+        self.pulls += 1
+        self._pulled_at = now
+        if baseline:
+            self._change_token = store.change_token()
+            try:
+                self._source_token = store.source_token()
+            except Exception:
+                self._source_token = None
+            records, _ = store.snapshot()
+            self._records, self._headers = list(records), store.headers()
+            return 0
+        store.refresh()
+        published = self._diff(store)
+        self._change_token = store.change_token()
+        return published
+
+    def _diff(self, store):
+        records, _ = store.snapshot()
+        records, headers = list(records), store.headers()
+        old, self._records = self._records, records
+        self.diffs += 1
+        if headers != self._headers:
+            self._headers = headers
+            self.publish("reset", {"reason": "columns"})
+            return 1
+        changes = diff_records(old, records)
+        if len(changes) > EVENTS_MAX_BATCH:
+            self.publish("reset", {"reason": "bulk", "changes": len(changes)})
+            return 1
+        id_header = ROW_ID_HEADER if ROW_ID_HEADER in headers else None
+        for kind, sheet_row, record in changes:
+            data = {"sheet_row": sheet_row, "row_id": str(record.get(id_header, "")) if id_header else ""}
+            if kind != "deleted":
+                data["values"] = record
+            self.publish(kind, data)
+        return len(changes)
+
+    def stats(self) -> dict:
+        with self._cond:
+            listeners, seq = self._listeners, self._seq
+        return {"listeners": listeners, "events": seq, "polls": self.polls, "probes": self.probes,
+                "pulls": self.pulls, "diffs": self.diffs, "rows": len(self._records or ())}
+
+
+_feed = None
+_feed_pid = None
+_feed_lock = threading.Lock()
+
+
+def get_feed() -> ChangeFeed:
+    """This process's ChangeFeed (rebuilt after a fork; its thread starts with the first listener)."""
+    global _feed, _feed_pid
+    pid = os.getpid()
+    if _feed is None or _feed_pid != pid:
+        with _feed_lock:
+            if _feed is None or _feed_pid != pid:
+                _feed = ChangeFeed()
+                _feed_pid = pid
+    return _feed
+
+
+# ---------------- SSE ----------------
+def format_event(feed, seq, kind, data) -> bytes:
+    return f"id: {feed.event_id(seq)}\nevent: {kind}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+def _opening(feed, last_event_id, retry_ms):
+    """(first bytes of a stream, cursor to continue from)."""
+    seq = feed.parse_id(last_event_id) if last_event_id else None
+    head = f"retry: {retry_ms}\n\n".encode()
+    if seq is not None:
+        return head + b"".join(format_event(feed, *e) for e in feed.after(seq)), max(seq, feed.cursor())
+    cursor = feed.cursor()
+    if last_event_id:  # missed events we no longer have, or another worker's ids
+        head += format_event(feed, cursor, "reset", {"reason": "reconnect"})
+    hello = {"mode": feed.mode}
+    return head + f"id: {feed.event_id(cursor)}\nevent: hello\ndata: {json.dumps(hello)}\n\n".encode(), cursor
+
+
+_stream_slots = threading.BoundedSemaphore(EVENTS_MAX_STREAMS)
+
+
+def stream(feed, last_event_id=None, seconds=EVENTS_STREAM_SECONDS):
+    """
+    Blocking generator of SSE bytes for threaded servers: ends after
+    `seconds` (the browser reconnects after EVENTS_RETRY_MS with its
+    Last-Event-ID), or at once with a longer retry when EVENTS_MAX_STREAMS
+    streams are already open in this process.
+    """
+    if not _stream_slots.acquire(blocking=False):
+        yield f"retry: {max(EVENTS_RETRY_MS, int(EVENTS_POLL_INTERVAL * 1000))}\n\n".encode()
+        return
+    feed.listen()
+    try:
+        head, cursor = _opening(feed, last_event_id, EVENTS_RETRY_MS)
+        yield head
+        deadline = time.monotonic() + seconds
+        while (left := deadline - time.monotonic()) > 0:
+            events = feed.wait(cursor, min(left, EVENTS_HEARTBEAT))
+            if events:
+                cursor = events[-1][0]
+                yield b"".join(format_event(feed, *e) for e in events)
+            else:
+                yield b": ping\n\n"
+    finally:
+        feed.unlisten()
+        _stream_slots.release()
+
+
+async def astream(feed, last_event_id=None):
+    """Async generator of SSE bytes for the event loop (backend/asgi.py); runs until the client goes."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+
+    def waker():
+        loop.call_soon_threadsafe(ready.set)
+
+    feed.listen(waker)
+    try:
+        head, cursor = _opening(feed, last_event_id, EVENTS_RETRY_MS)
+        yield head
+        while True:
+            try:
+                await asyncio.wait_for(ready.wait(), EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            ready.clear()
+            events = feed.after(cursor)
+            if events:
+                cursor = events[-1][0]
+                yield b"".join(format_event(feed, *e) for e in events)
+    finally:
+        feed.unlisten(waker)
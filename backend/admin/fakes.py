@@ -0,0 +1,335 @@
+# backend/admin/fakes.py
+"""
+In-memory stand-in for a gspread Worksheet (and the client manager that hands it out).
+
+Implements the subset of the gspread API the admin code uses, with an
+optional per-call latency and call counters, so sync engines, caches and
+benchmarks can run without Google Sheets. Writes bump a modification
+counter that the spreadsheet reports like Drive's modifiedTime, for the
+change feed (events.py). FakeLinkServer stands in for the
+web sites the link checker (linkcheck.py) probes.
+"""
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_A1_RANGE_RE = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def _col_index(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def _col_letters(n):
+    out = ""
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        out = chr(65 + rem) + out
+    return out or "A"
+
+
+class _FakeSpreadsheet:
+    def __init__(self, ws):
+        self._ws = ws
+        self.id = ws.spreadsheet_id
+        self.title = "Fake spreadsheet"
+
+    def fetch_sheet_metadata(self, params=None):
+        self._ws._call("fetch_sheet_metadata")
+        return {
+            "sheets": [{
+                "properties": {
+                    "sheetId": self._ws.id,
+                    "title": self._ws.title,
+                    "gridProperties": {"rowCount": self._ws.row_count, "columnCount": self._ws.col_count},
+                }
+            }]
+        }
+
+    def get_lastUpdateTime(self):
+        """Drive's modifiedTime stand-in: changes on every write."""
+        self._ws._call("spreadsheet.get_lastUpdateTime")
+        return f"fake-{self._ws.modified}"
+
+    def batch_update(self, body):
+        """deleteDimension (ROWS) requests only, applied in order like the API does."""
+        self._ws._call("spreadsheet.batch_update")
+        with self._ws._lock:
+            self._ws.modified += 1
+            for req in body["requests"]:
+                rng = req["deleteDimension"]["range"]
+                assert rng["sheetId"] == self._ws.id and rng["dimension"] == "ROWS", req
+                del self._ws._values[rng["startIndex"]:rng["endIndex"]]
+        return {"spreadsheetId": self.id, "replies": [{} for _ in body["requests"]]}
+
+    @property
+    def sheet1(self):
+        return self._ws
+
+
+class FakeWorksheet:
+    def __init__(self, headers, rows=(), latency=0.0, spreadsheet_id="fake-sheet", title="Sheet1", spare_rows=0):
+        self.spreadsheet_id = spreadsheet_id
+        self.title = title
+        self.id = 0
+        self.latency = latency
+        self.spare_rows = spare_rows  # blank grid rows after the data, like a real sheet
+        self.calls = {}
+        self.modified = 0  # bumped by every write
+        self._lock = threading.Lock()
+        self._values = [list(headers)] + [list(r) for r in rows]
+        self.spreadsheet = _FakeSpreadsheet(self)
+
+    # ---- bookkeeping ----
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _width(self):
+        return len(self._values[0]) if self._values else 0
+
+    def _pad(self, row):
+        row = ["" if v is None else str(v) for v in row]
+        return row + [""] * (self._width() - len(row))
+
+    def _parse_range(self, a1):
+        a1 = a1.split("!")[-1]
+        m = _A1_RANGE_RE.match(a1)
+        if not m:
+            raise ValueError(f"Bad range: {a1}")
+        c1, r1, c2, r2 = m.groups()
+        r1 = int(r1) if r1 else 1
+        c1 = _col_index(c1) if c1 else 1
+        if c2 is None and r2 is None:
+            r2, c2 = r1, c1
+        else:
+            r2 = int(r2) if r2 else self.row_count
+            c2 = _col_index(c2) if c2 else self._width()
+        return r1, c1, r2, c2
+
+    # ---- read API ----
+    @property
+    def row_count(self):
+        return len(self._values) + self.spare_rows
+
+    @property
+    def col_count(self):
+        return self._width()
+
+    def row_values(self, row):
+        self._call("row_values")
+        with self._lock:
+            if row > len(self._values):
+                return []
+            return list(self._values[row - 1])
+
+    def get_all_values(self):
+        self._call("get_all_values")
+        with self._lock:
+            return [list(r) for r in self._values]
+
+    def get_all_records(self):
+        self._call("get_all_records")
+        with self._lock:
+            headers = self._values[0] if self._values else []
+            return [dict(zip(headers, r)) for r in self._values[1:]]
+
+    def get(self, range_name):
+        self._call("get")
+        r1, c1, r2, c2 = self._parse_range(range_name)
+        with self._lock:
+            out = [list(r[c1 - 1:c2]) for r in self._values[r1 - 1:r2]]
+        while out and not any(out[-1]):
+            out.pop()
+        return out
+
+    # ---- write API ----
+    def append_row(self, values, value_input_option=None, **kwargs):
+        self._call("append_row")
+        with self._lock:
+            self.modified += 1
+            self._values.append(self._pad(values))
+            n = len(self._values)
+        # The Sheets API reply, trimmed to what callers read.
+        return {"updates": {"updatedRange": f"{self.title}!A{n}:{_col_letters(self._width())}{n}", "updatedRows": 1}}
+
+    def append_rows(self, values, value_input_option=None, **kwargs):
+        self._call("append_rows")
+        with self._lock:
+            self.modified += 1
+            self._values.extend(self._pad(v) for v in values)
+
+    def _write(self, range_name, values):
+        self.modified += 1
+        r1, c1, _, _ = self._parse_range(range_name)
+        for dr, row in enumerate(values):
+            r = r1 - 1 + dr
+            while r >= len(self._values):
+                self._values.append([""] * self._width())
+            target = self._values[r]
+            for dc, v in enumerate(row):
+                c = c1 - 1 + dc
+                while c >= len(target):
+                    target.append("")
+                target[c] = "" if v is None else str(v)
+
+    def update(self, range_name=None, values=None, **kwargs):
+        self._call("update")
+        with self._lock:
+            self._write(range_name, values)
+
+    def batch_update(self, data, **kwargs):
+        self._call("batch_update")
+        with self._lock:
+            for item in data:
+                self._write(item["range"], item["values"])
+
+    def delete_rows(self, start_index, end_index=None):
+        self._call("delete_rows")
+        with self._lock:
+            self.modified += 1
+            end_index = end_index or start_index
+            del self._values[start_index - 1:end_index]
+
+
+class FakeClientManager:
+    """
+    Drop-in for SheetsClientManager that always hands out one FakeWorksheet.
+    connect_latency is slept on the first get(), like authorize + open_by_key.
+    """
+
+    def __init__(self, ws, connect_latency=0.0):
+        self.ws = ws
+        self.connect_latency = connect_latency
+        self.hits = 0
+        self._connected = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if not self._connected:
+                time.sleep(self.connect_latency)
+                self._connected = True
+        self.hits += 1
+        return self.ws, list(self.ws._values[0]) if self.ws._values else []
+
+    def invalidate_headers(self):
+        pass
+
+    def reset(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": 0, "token_refreshes": 0, "errors": 0, "connected": True}
+
+
+def install_fake_sheets(ws, connect_latency=0.0):
+    """
+    Make get_client_manager() return a FakeClientManager for `ws` in this
+    process and in processes forked from it (gunicorn preload_app).
+    """
+    from . import sheets
+
+    def install():
+        with sheets._manager_lock:
+            sheets._manager = FakeClientManager(ws, connect_latency)
+            sheets._manager_pid = os.getpid()
+        return sheets._manager
+
+    os.register_at_fork(after_in_child=install)
+    return install()
+
+
+class FakeLinkServer:
+    """
+    Local HTTP/1.1 server with keep-alive for link-check runs. By first path segment:
+      /ok/...        200 with ETag and Last-Modified; 304 to a matching If-None-Match
+      /missing/...   404
+      /redirect/...  301 to the same path under /ok/
+      /nohead/...    405 to HEAD, 200 to GET
+      /flaky/...     429 with Retry-After the first time a path is asked for, then 200
+      /slow/...      200 after `slow_latency` seconds
+    Every response first waits `latency` seconds. Each server is one host:port,
+    so several servers stand in for several hosts; `max_in_flight` records the
+    most requests it ever served at once.
+    """
+
+    def __init__(self, latency=0.05, slow_latency=2.0):
+        self.latency = latency
+        self.slow_latency = slow_latency
+        self.requests = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        threading.Thread(target=self._httpd.serve_forever, name="fake-links", daemon=True).start()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, headers=(), body=b""):
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _serve(self):
+                with fake._lock:
+                    fake.requests[self.command] = fake.requests.get(self.command, 0) + 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    first = self.path not in fake._seen
+                    fake._seen.add(self.path)
+                try:
+                    kind = self.path.strip("/").split("/")[0]
+                    time.sleep(fake.latency + (fake.slow_latency if kind == "slow" else 0))
+                    etag = f'"{abs(hash(self.path)) % 10 ** 8}"'
+                    if kind == "missing":
+                        self._reply(404, body=b"not found")
+                    elif kind == "redirect":
+                        self._reply(301, [("Location", "/ok/" + self.path.split("/", 2)[-1])])
+                    elif kind == "nohead" and self.command == "HEAD":
+                        self._reply(405, [("Allow", "GET")])
+                    elif kind == "flaky" and first:
+                        self._reply(429, [("Retry-After", "1")])
+                    elif self.headers.get("If-None-Match") == etag:
+                        self._reply(304, [("ETag", etag)])
+                    else:
+                        self._reply(200, [("ETag", etag), ("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT"),
+                                          ("Content-Type", "text/html")], b"<html>ok</html>")
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            do_GET = do_HEAD = _serve
+
+        return Handler
@@ -0,0 +1,475 @@
+# backend/admin/linkcheck.py
+"""
+Health checks for the catalog's URL column.
+
+LinkChecker probes every distinct URL on one asyncio loop with aiohttp:
+HEAD first (GET when a server refuses HEAD), redirects followed, at most
+LINKCHECK_CONCURRENCY requests in flight overall and LINKCHECK_PER_HOST per
+host, each host's requests started at least LINKCHECK_HOST_INTERVAL seconds
+apart, and one retry for 429/503 and connection errors. Connections are
+pooled and kept alive per host by the session's connector.
+
+Results live in a small SQLite cache (LINKCHECK_DB) shared by workers and the
+CLI. A result younger than LINKCHECK_TTL is reused without a request; an
+older one is revalidated with If-None-Match / If-Modified-Since, so an
+unchanged page answers 304 without a body.
+
+write_statuses() puts a short label ("OK", "HTTP 404", "ERROR: timeout")
+into the LINKCHECK_STATUS_HEADER column of every row whose label changed,
+with one Storage.update_cells() call (a single batch_update on Sheets). The
+column must exist in the sheet; without it results are only reported.
+
+The dashboard runs the whole thing as a background LinkCheckJob whose
+progress file any worker can serve, like an import (see bulk.py). The CLI is
+backend/tools/linkcheck.py; backend/admin/fakes.py has a stand-in server.
+"""
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+LINKCHECK_URL_HEADER = os.getenv("LINKCHECK_URL_HEADER", "URL")
+LINKCHECK_STATUS_HEADER = os.getenv("LINKCHECK_STATUS_HEADER", "Link Status")
+LINKCHECK_CONCURRENCY = int(os.getenv("LINKCHECK_CONCURRENCY", "32"))
+LINKCHECK_PER_HOST = int(os.getenv("LINKCHECK_PER_HOST", "2"))
+LINKCHECK_HOST_INTERVAL = float(os.getenv("LINKCHECK_HOST_INTERVAL", "0.2"))
+LINKCHECK_TIMEOUT = float(os.getenv("LINKCHECK_TIMEOUT", "15"))
+LINKCHECK_TTL = float(os.getenv("LINKCHECK_TTL", str(24 * 3600)))
+LINKCHECK_DB = os.getenv("LINKCHECK_DB", os.path.join(tempfile.gettempdir(), "linkcheck.sqlite3"))
+LINKCHECK_DIR = os.getenv("LINKCHECK_DIR", os.path.join(tempfile.gettempdir(), "admin-linkcheck"))
+LINKCHECK_JOB_TIMEOUT = float(os.getenv("LINKCHECK_JOB_TIMEOUT", "3600"))  # a job lock older than this is stale
+LINKCHECK_USER_AGENT = os.getenv("LINKCHECK_USER_AGENT", "Mozilla/5.0 (compatible; catalog-linkcheck/1.0)")
+LINKCHECK_MAX_REDIRECTS = 5
+LINKCHECK_BROKEN_SAMPLE = 20  # broken links listed in a job's progress
+
+RETRY_STATUSES = {429, 503}
+HEAD_REFUSED = {403, 405, 501}  # answers from servers that do not do HEAD but may do GET
+RETRY_AFTER_MAX = 10.0
+
+
+def status_label(result) -> str:
+    """What goes into the status column for a result dict."""
+    if result.get("error"):
+        return f"ERROR: {result['error']}"
+    return "OK" if result.get("ok") else f"HTTP {result.get('status')}"
+
+
+def _host(url):
+    """Politeness key; host:port, like the connector's per-host pools."""
+    return urlsplit(url).netloc.lower()
+
+
+def _valid(url):
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and bool(parts.hostname)
+
+
+# ---------------- result cache ----------------
+_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    url           TEXT PRIMARY KEY,
+    status        INTEGER NOT NULL,
+    ok            INTEGER NOT NULL,
+    error         TEXT NOT NULL,
+    final_url     TEXT NOT NULL,
+    etag          TEXT NOT NULL,
+    last_modified TEXT NOT NULL,
+    checked_at    REAL NOT NULL
+);
+"""
+_FIELDS = ("url", "status", "ok", "error", "final_url", "etag", "last_modified", "checked_at")
+
+
+class ResultCache:
+    def __init__(self, path=LINKCHECK_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_CACHE_SCHEMA)
+
+    def get_many(self, urls) -> dict:
+        out = {}
+        urls = list(urls)
+        with self._lock:
+            for start in range(0, len(urls), 500):
+                batch = urls[start:start + 500]
+                rows = self._db.execute(f"SELECT {', '.join(_FIELDS)} FROM results WHERE url IN "
+                                        f"({','.join('?' * len(batch))})", batch).fetchall()
+                for row in rows:
+                    result = dict(zip(_FIELDS, row))
+                    result["ok"] = bool(result["ok"])
+                    out[result["url"]] = result
+        return out
+
+    def put_many(self, results):
+        rows = [tuple(r.get(f) if f != "ok" else int(bool(r.get("ok"))) for f in _FIELDS) for r in results]
+        if not rows:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(f"INSERT OR REPLACE INTO results ({', '.join(_FIELDS)}) "
+                                 f"VALUES ({','.join('?' * len(_FIELDS))})", rows)
+            self._db.execute("COMMIT")
+
+    def close(self):
+        self._db.close()
+
+
+# ---------------- checker ----------------
+class _HostGate:
+    """At most `per_host` requests in flight to one host, started `interval` seconds apart."""
+
+    def __init__(self, per_host, interval):
+        self._slots = asyncio.Semaphore(per_host)
+        self._interval = interval
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self._slots.acquire()
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            wait = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc):
+        self._slots.release()
+
+
+def _retry_after(headers):
+    try:
+        return min(float(headers.get("Retry-After", "1")), RETRY_AFTER_MAX)
+    except ValueError:
+        return 1.0
+
+
+def _error_label(aiohttp, error):
+    """Short, stable text for a client error (it ends up in a sheet cell)."""
+    if isinstance(error, (aiohttp.ClientSSLError, aiohttp.ClientConnectorCertificateError)):
+        return "TLS error"
+    if isinstance(error, getattr(aiohttp, "ClientConnectorDNSError", ())):
+        return "DNS lookup failed"
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return "cannot connect"
+    if isinstance(error, aiohttp.ServerDisconnectedError):
+        return "server disconnected"
+    return type(error).__name__
+
+
+class LinkChecker:
+    def __init__(self, concurrency=LINKCHECK_CONCURRENCY, per_host=LINKCHECK_PER_HOST,
+                 host_interval=LINKCHECK_HOST_INTERVAL, timeout=LINKCHECK_TIMEOUT, ttl=LINKCHECK_TTL, cache=None):
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.host_interval = host_interval
+        self.timeout = timeout
+        self.ttl = ttl
+        self.cache = cache
+        self.stats = {"urls": 0, "cached": 0, "requests": 0, "revalidated": 0, "retries": 0, "seconds": 0.0}
+
+    def check(self, urls, progress=None) -> dict:
+        """Blocking wrapper around check_all() for threads and scripts."""
+        return asyncio.run(self.check_all(urls, progress))
+
+    async def check_all(self, urls, progress=None) -> dict:
+        """
+        {url: result dict} for every distinct non-blank URL. progress(done,
+        total), if given, is called on the loop after each URL.
+        """
+        try:
+            import aiohttp
+        except ImportError:
+            raise RuntimeError("Link checks need aiohttp (pip install aiohttp).")
+
+        t0 = time.perf_counter()
+        unique = list(dict.fromkeys(str(u).strip() for u in urls if str(u).strip()))
+        self.stats["urls"] = len(unique)
+        previous = self.cache.get_many(unique) if self.cache else {}
+        now = time.time()
+        results, todo = {}, []
+        for url in unique:
+            old = previous.get(url)
+            if old and now - old["checked_at"] < self.ttl:
+                results[url] = old
+            else:
+                todo.append(url)
+        self.stats["cached"] = len(results)
+        done = len(results)
+        if progress:
+            progress(done, len(unique))
+
+        gates = {}
+        limit = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": LINKCHECK_USER_AGENT},
+        )
+
+        async def one(url):
+            nonlocal done
+            if not _valid(url):
+                result = self._result(url, error="not an http(s) URL")
+            else:
+                gate = gates.setdefault(_host(url), _HostGate(self.per_host, self.host_interval))
+                async with limit:
+                    result = await self._probe(aiohttp, session, gate, url, previous.get(url))
+            results[url] = result
+            done += 1
+            if progress:
+                progress(done, len(unique))
+            return result
+
+        try:
+            fresh = await asyncio.gather(*(one(url) for url in todo))
+        finally:
+            await session.close()
+        if self.cache:
+            self.cache.put_many(fresh)
+        self.stats["seconds"] = round(time.perf_counter() - t0, 3)
+        return results
+
+    @staticmethod
+    def _result(url, status=0, error="", final_url="", etag="", last_modified="", ok=None):
+        return {
+            "url": url,
+            "status": status,
+            "ok": (200 <= status < 400) if ok is None else ok,
+            "error": error,
+            "final_url": final_url or url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "checked_at": time.time(),
+        }
+
+    async def _request(self, session, gate, method, url, headers):
+        async with gate:
+            self.stats["requests"] += 1
+            async with session.request(method, url, headers=headers, allow_redirects=True,
+                                       max_redirects=LINKCHECK_MAX_REDIRECTS) as response:
+                return response.status, response.headers, str(response.url)
+
+    async def _probe(self, aiohttp, session, gate, url, previous):
+        conditional = {}
+        if previous and previous["ok"]:
+            if previous["etag"]:
+                conditional["If-None-Match"] = previous["etag"]
+            if previous["last_modified"]:
+                conditional["If-Modified-Since"] = previous["last_modified"]
+        for attempt in (0, 1):
+            try:
+                status, headers, final_url = await self._request(session, gate, "HEAD", url, conditional)
+                if status in HEAD_REFUSED:
+                    status, headers, final_url = await self._request(session, gate, "GET", url, conditional)
+            except asyncio.TimeoutError:
+                error = "timeout"
+            except aiohttp.TooManyRedirects:
+                return self._result(url, error="too many redirects")
+            except aiohttp.ClientError as e:
+                error = _error_label(aiohttp, e)
+            else:
+                if status == 304 and previous:
+                    self.stats["revalidated"] += 1
+                    return dict(previous, checked_at=time.time())
+                if status in RETRY_STATUSES and attempt == 0:
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(_retry_after(headers))
+                    continue
+                return self._result(url, status, final_url=final_url, etag=headers.get("ETag", ""),
+                                    last_modified=headers.get("Last-Modified", ""))
+            if attempt == 0:
+                self.stats["retries"] += 1
+                await asyncio.sleep(0.5)
+        return self._result(url, error=error)
+
+
+# ---------------- write-back ----------------
+def _url_rows(store, url_header):
+    """(sheet_row, url, row values) for every row, in sheet order, a chunk at a time."""
+    headers = store.headers()
+    col = headers.index(url_header)
+    sheet_row = 2
+    for chunk in store.export_rows(500):
+        for values in chunk:
+            yield sheet_row, str(values[col]).strip(), values
+            sheet_row += 1
+
+
+def catalog_urls(store, url_header=LINKCHECK_URL_HEADER) -> list:
+    if url_header not in store.headers():
+        raise ValueError(f"The sheet has no {url_header!r} column.")
+    return [url for _, url, _ in _url_rows(store, url_header)]
+
+
+def write_statuses(store, results, url_header=LINKCHECK_URL_HEADER, status_header=LINKCHECK_STATUS_HEADER) -> int:
+    """
+    Label every row whose URL was checked, in one update_cells() call; only
+    cells whose label changed are written. Returns the number of cells written.
+    Rows are matched by URL on a fresh pass over the rows, so rows that moved
+    while the check ran still get the right label.
+    """
+    headers = store.headers()
+    if status_header not in headers or url_header not in headers:
+        raise ValueError(f"The sheet needs {url_header!r} and {status_header!r} columns to record link checks.")
+    status_col = headers.index(status_header)
+    cells = {}
+    for sheet_row, url, values in _url_rows(store, url_header):
+        result = results.get(url)
+        if result is not None:
+            label = status_label(result)
+            if str(values[status_col]) != label:
+                cells[sheet_row] = label
+    if cells:
+        store.update_cells(status_header, cells)
+    return len(cells)
+
+
+# ---------------- background job ----------------
+class LinkCheckJob:
+    def __init__(self, store, checker=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.store = store
+        self.checker = checker
+        self.state = "queued"  # queued -> running -> done | failed
+        self.total = 0
+        self.checked = 0
+        self.ok = 0
+        self.broken = []
+        self.broken_count = 0
+        self.written = 0
+        self.stats = {}
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self._saved_at = 0.0
+
+    def as_dict(self) -> dict:
+        end = self.finished or time.time()
+        return {
+            "id": self.id,
+            "state": self.state,
+            "total": self.total,
+            "checked": self.checked,
+            "ok": self.ok,
+            "broken": self.broken_count,
+            "broken_sample": self.broken,
+            "written": self.written,
+            "stats": self.stats,
+            "error": self.error,
+            "seconds": round(end - self.started, 2),
+        }
+
+    def save(self):
+        os.makedirs(LINKCHECK_DIR, exist_ok=True)
+        tmp = os.path.join(LINKCHECK_DIR, f".{self.id}.json")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f)
+        os.replace(tmp, os.path.join(LINKCHECK_DIR, f"{self.id}.json"))
+        self._saved_at = time.monotonic()
+
+    def _progress(self, done, total):
+        self.checked, self.total = done, total
+        if time.monotonic() - self._saved_at > 1.0:
+            self.save()
+
+    def run(self):
+        self.state = "running"
+        self.save()
+        cache = None
+        try:
+            cache = ResultCache()
+            checker = self.checker or LinkChecker(cache=cache)
+            results = checker.check(catalog_urls(self.store), self._progress)
+            self.stats = dict(checker.stats)
+            self.checked = self.total = len(results)
+            broken = [r for r in results.values() if not r["ok"]]
+            self.ok = len(results) - len(broken)
+            self.broken_count = len(broken)
+            self.broken = [[r["url"], status_label(r)] for r in broken[:LINKCHECK_BROKEN_SAMPLE]]
+            try:
+                self.written = write_statuses(self.store, results)
+            except ValueError as e:
+                self.error = str(e)  # checked, but nowhere to record it
+            self.state = "done"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"[ERROR] Link check {self.id} failed: {e}")
+        finally:
+            self.finished = time.time()
+            self.save()
+            if cache is not None:
+                cache.close()
+            _release_lock(self.id)
+
+
+_LOCK_FILE = "running.lock"
+
+
+def _take_lock(job_id):
+    """Claim the one-check-at-a-time lock: None if claimed, else the holder's job id ("" if unknown)."""
+    os.makedirs(LINKCHECK_DIR, exist_ok=True)
+    path = os.path.join(LINKCHECK_DIR, _LOCK_FILE)
+    for _ in (0, 1):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(path).st_mtime < LINKCHECK_JOB_TIMEOUT:
+                    with open(path, encoding="utf-8") as f:
+                        return f.read().strip()
+                os.unlink(path)  # left behind by a worker that died mid-check
+            except OSError:
+                pass  # released meanwhile; try again
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(job_id)
+        return None
+    return ""
+
+
+def _release_lock(job_id):
+    path = os.path.join(LINKCHECK_DIR, _LOCK_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read().strip() == job_id:
+                os.unlink(path)
+    except OSError:
+        pass
+
+
+def start_link_check(store):
+    """
+    Start a background check of every URL in `store`; returns (job_id, started).
+    Only one check runs at a time across workers: while one does, its id is
+    returned with started=False.
+    """
+    job = LinkCheckJob(store)
+    holder = _take_lock(job.id)
+    if holder is not None:
+        return holder, False
+    job.save()
+    threading.Thread(target=job.run, name=f"linkcheck-{job.id}", daemon=True).start()
+    return job.id, True
+
+
+def check_status(job_id):
+    """The progress dict of a link check job, or None."""
+    if not re.fullmatch(r"[0-9a-f]{12}", job_id or ""):
+        return None
+    try:
+        with open(os.path.join(LINKCHECK_DIR, f"{job_id}.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,191 @@
+# backend/admin/locator.py
+"""
+Stable row IDs and an incremental ID -> sheet_row index.
+
+A sheet_row number shifts whenever a row above it is inserted or deleted, so
+the dashboard also carries each row's ID (the ROW_ID_HEADER column, filled in
+on append, import and update) and version (a hash of its values). Writes resolve the ID to the
+row's current position and raise RowConflict when the row is gone or was
+edited after the admin loaded it, instead of writing over whatever row now
+sits at the old number.
+
+The ID column is required for that: the sheet needs a ROW_ID_HEADER ("ID")
+column, and rows that predate it should get their IDs with
+`python backend/tools/sheetctl.py backfill-ids`. Without the column, or for a
+row whose ID is still blank, writes fall back to the bare sheet_row and the
+version check.
+
+RowLocator keeps the ID -> position map without re-reading the sheet: every
+row gets a slot in insertion order and a Fenwick tree counts the live slots
+(LiveSlots, also used by dedupe.DuplicateIndex), so appends, deletes and
+lookups are O(log n) and a delete never shifts the rows after it.
+"""
+import hashlib
+import os
+import uuid
+
+ROW_ID_HEADER = os.getenv("ROW_ID_HEADER", "ID")
+
+
+class RowConflict(Exception):
+    """The row a write was aimed at moved away, was deleted or changed since it was read."""
+
+
+def new_row_id() -> str:
+    # The letter prefix keeps get_all_records() from numericising an all-digit ID.
+    return "r" + uuid.uuid4().hex[:11]
+
+
+def row_version(values) -> str:
+    """
+    Version of a row: a short hash of its values in header order. Values are
+    numericised first, so the strings of a ranged read and the numbers of
+    get_all_records() give the same version.
+    """
+    from gspread.utils import numericise  # imported on first use; keeps gspread out of app startup
+
+    canon = ["" if v is None else str(numericise(v)) for v in values]
+    while canon and not canon[-1]:
+        canon.pop()  # row_values() drops trailing blank cells
+    return hashlib.blake2b("\x1f".join(canon).encode(), digest_size=8).hexdigest()
+
+
+def record_version(record, headers) -> str:
+    return row_version([record.get(h, "") for h in headers])
+
+
+class LiveSlots:
+    """
+    Positions of rows that are only appended or deleted. Every row gets a slot
+    in insertion order and a Fenwick tree counts the live slots, so a slot's
+    current position and the slot at a position are both O(log n), and a
+    delete never renumbers the slots after it.
+    """
+
+    def __init__(self, n=0):
+        self._size = n
+        self._tree = [0] + [1] * n
+        for i in range(1, n + 1):  # O(n) Fenwick build
+            j = i + (i & -i)
+            if j <= n:
+                self._tree[j] += self._tree[i]
+        self._live = n
+
+    def __len__(self):
+        return self._live
+
+    @property
+    def size(self):
+        """Slots handed out, deleted ones included."""
+        return self._size
+
+    def rank(self, slot):
+        """1-based position of a live slot among the live slots."""
+        total = 0
+        while slot:
+            total += self._tree[slot]
+            slot -= slot & -slot
+        return total
+
+    def find(self, k):
+        """Slot of the k-th live row (1-based)."""
+        pos, step = 0, 1 << self._size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self._size and self._tree[nxt] < k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos + 1
+
+    def append(self):
+        """Slot of a new last row."""
+        self._size += 1
+        n = self._size
+        # tree[n] covers slots (n - lowbit(n), n]; all but n already exist.
+        self._tree.append(1 + self.rank(n - 1) - self.rank(n - (n & -n)))
+        self._live += 1
+        return n
+
+    def delete(self, slot):
+        i = slot
+        while i <= self._size:
+            self._tree[i] -= 1
+            i += i & -i
+        self._live -= 1
+
+    def sparse(self):
+        """True when most slots are deleted and a rebuild would pay off."""
+        return self._size > 1024 and self._live < self._size // 2
+
+
+class RowLocator:
+    """
+    row ID -> current sheet_row, maintained incrementally as rows are appended
+    and deleted. Rows without an ID still take a slot so positions stay right;
+    an ID that appears twice cannot be resolved (lookups return None).
+    """
+
+    def __init__(self, ids=()):
+        self._rebuild([str(i or "") for i in ids])
+
+    def _rebuild(self, ids):
+        self._ids = list(ids)  # slot - 1 -> row ID ("" for none, None once deleted)
+        self._slots = LiveSlots(len(self._ids))
+        self._slot = {}
+        self._ambiguous = set()
+        for slot, row_id in enumerate(self._ids, start=1):
+            self._index(row_id, slot)
+
+    def _index(self, row_id, slot):
+        if not row_id or row_id in self._ambiguous:
+            return
+        if row_id in self._slot:
+            del self._slot[row_id]
+            self._ambiguous.add(row_id)
+        else:
+            self._slot[row_id] = slot
+
+    def __len__(self):
+        return len(self._slots)
+
+    def sheet_row(self, row_id):
+        """Current sheet_row of `row_id`, or None if unknown, deleted or ambiguous."""
+        slot = self._slot.get(row_id)
+        return None if slot is None else 1 + self._slots.rank(slot)
+
+    def row_id(self, sheet_row):
+        if not 2 <= sheet_row <= len(self._slots) + 1:
+            return None
+        return self._ids[self._slots.find(sheet_row - 1) - 1]
+
+    def append(self, row_id):
+        row_id = str(row_id or "")
+        self._ids.append(row_id)
+        self._index(row_id, self._slots.append())
+
+    def delete(self, sheet_row):
+        if not 2 <= sheet_row <= len(self._slots) + 1:
+            return
+        slot = self._slots.find(sheet_row - 1)
+        row_id = self._ids[slot - 1]
+        self._ids[slot - 1] = None
+        if self._slot.get(row_id) == slot:
+            del self._slot[row_id]
+        self._slots.delete(slot)
+        if self._slots.sparse():
+            self._rebuild([i for i in self._ids if i is not None])  # drop tombstones
+
+    def set_id(self, sheet_row, row_id):
+        """Record that the row at `sheet_row` now carries `row_id`."""
+        if not 2 <= sheet_row <= len(self._slots) + 1:
+            return
+        row_id = str(row_id or "")
+        slot = self._slots.find(sheet_row - 1)
+        old = self._ids[slot - 1]
+        if old == row_id:
+            return
+        if self._slot.get(old) == slot:
+            del self._slot[old]
+        self._ids[slot - 1] = row_id
+        self._index(row_id, slot)
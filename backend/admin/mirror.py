@@ -0,0 +1,505 @@
+# backend/admin/mirror.py
+"""
+Local SQLite mirror of the worksheet.
+
+A background thread pulls the sheet, hashes each row and writes only the rows
+whose hash changed. Admin reads are served from the mirror, so a Sheets
+outage no longer empties the dashboard. Admin edits are applied to the
+mirror right away and queued in an outbox that is replayed to the sheet, in
+order, before the next pull. Updates and deletes carry the row's ID
+(ROW_ID_HEADER) and are re-resolved against the sheet when replayed, so rows
+that moved in the meantime are still the ones edited. An edit the sheet
+keeps rejecting (not an outage: a 4xx) is moved to `dead_letters` after
+SHEET_MIRROR_MAX_ATTEMPTS tries, one whose row is gone at once, so it cannot
+hold up the edits behind it and the pulls for good; the dashboard shows how
+many there are. A dead-lettered append or delete takes the ID-less edits
+queued after it along (their row numbers assumed it happened), and the
+flush stops there so the sync starts over from the sheet.
+
+Enable with SHEET_MIRROR_DB=/path/to/mirror.sqlite3. Gunicorn workers share
+the file; a lease row in `meta` makes sure only one of them syncs at a time.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from gspread import utils as gutils
+
+from .locator import ROW_ID_HEADER
+from .paging import like_pattern, search_text
+
+SHEET_MIRROR_DB = os.getenv("SHEET_MIRROR_DB", "")
+SHEET_MIRROR_INTERVAL = float(os.getenv("SHEET_MIRROR_INTERVAL", "30"))
+SHEET_MIRROR_MAX_ATTEMPTS = int(os.getenv("SHEET_MIRROR_MAX_ATTEMPTS", "5"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    sheet_row INTEGER PRIMARY KEY,
+    hash      TEXT NOT NULL,
+    data      TEXT NOT NULL,
+    search    TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    op         TEXT NOT NULL,
+    sheet_row  INTEGER,
+    data       TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    row_id     TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id         INTEGER PRIMARY KEY,
+    op         TEXT NOT NULL,
+    sheet_row  INTEGER,
+    data       TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts   INTEGER NOT NULL,
+    last_error TEXT,
+    failed_at  REAL NOT NULL
+);
+"""
+
+
+def _row_hash(values) -> str:
+    return hashlib.blake2b("\x1f".join(values).encode(), digest_size=12).hexdigest()
+
+
+def _transient(error) -> bool:
+    """Network trouble, rate limits and server errors: retry for as long as it takes."""
+    if isinstance(error, OSError):  # requests' ConnectionError/Timeout included
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is not None and (status in (408, 429) or status >= 500)
+
+
+class RowGone(Exception):
+    """The row a queued edit was aimed at is no longer in the sheet."""
+
+
+def _locate(ws, sheet_row, row_id, id_col):
+    """
+    Current sheet row of the row whose ID is `row_id`: `sheet_row` when its
+    ID cell still says so (one cell read), else found in the ID column.
+    """
+    col = gutils.rowcol_to_a1(1, id_col + 1)[:-1]
+    here = ws.get(f"{col}{sheet_row}")
+    if here and here[0] and str(here[0][0]) == row_id:
+        return sheet_row
+    for offset, cell in enumerate(ws.get(f"{col}:{col}")):
+        if offset and cell and str(cell[0]) == row_id:
+            return offset + 1
+    raise RowGone(f"row {row_id} is no longer in the sheet")
+
+
+def _row_range(sheet_row, width):
+    return f"{gutils.rowcol_to_a1(sheet_row, 1)}:{gutils.rowcol_to_a1(sheet_row, width)}"
+
+
+class SheetMirror:
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._find_indexes = set()
+        self._resync = False  # set when flush() dead-lettered an edit
+        self._add_search_column()
+        if not any(col[1] == "row_id" for col in self._db.execute("PRAGMA table_info(outbox)")):
+            # Outboxes from before row IDs: their queued edits replay by position, as they were queued
+            self._db.execute("ALTER TABLE outbox ADD COLUMN row_id TEXT NOT NULL DEFAULT ''")
+
+    def _add_search_column(self):
+        """Mirrors created before the `search` column get it, filled from their rows."""
+        if any(col[1] == "search" for col in self._db.execute("PRAGMA table_info(rows)")):
+            return
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute("ALTER TABLE rows ADD COLUMN search TEXT NOT NULL DEFAULT ''")
+            headers = self._get_meta("headers", [])
+            self._db.executemany("UPDATE rows SET search = ? WHERE sheet_row = ?", [
+                (search_text(headers, [json.loads(data).get(h, "") for h in headers]), sheet_row)
+                for sheet_row, data in self._db.execute("SELECT sheet_row, data FROM rows").fetchall()
+            ])
+            self._db.execute("COMMIT")
+
+    # ---- meta ----
+    def _get_meta(self, key, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def headers(self):
+        with self._lock:
+            return self._get_meta("headers", [])
+
+    def watermark(self) -> dict:
+        """Sync generation, last successful sync time and how stale the data is."""
+        with self._lock:
+            synced_at = self._get_meta("synced_at")
+            return {
+                "generation": self._get_meta("generation", 0),
+                "synced_at": synced_at,
+                "staleness": (time.time() - synced_at) if synced_at else None,
+                "last_error": self._get_meta("last_error"),
+                "pending": self.pending(),
+                "dead_letters": self._db.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0],
+            }
+
+    def acquire_lease(self, owner, ttl):
+        """Become (or stay) the syncing process for `ttl` seconds. Returns True if we hold it."""
+        with self._lock:
+            now = time.time()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                lease = self._get_meta("sync_lease")
+                if lease and lease["owner"] != owner and lease["until"] > now:
+                    self._db.execute("COMMIT")
+                    return False
+                self._set_meta("sync_lease", {"owner": owner, "until": now + ttl})
+                self._db.execute("COMMIT")
+                return True
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    # ---- pull ----
+    def sync(self, ws) -> dict:
+        """Replay queued edits, then pull the sheet and write only changed rows."""
+        flushed = self.flush(ws)
+        resync, self._resync = self._resync, False
+        values = ws.get_all_values()
+        headers = values[0] if values else []
+        width = len(headers)
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]:
+                    # An edit was queued while we were pulling; this snapshot may predate it.
+                    self._db.execute("ROLLBACK")
+                    return {"flushed": flushed, "changed": 0, "deleted": 0, "skipped": True, "resync": resync}
+
+                known = dict(self._db.execute("SELECT sheet_row, hash FROM rows"))
+                changed = []
+                for offset, row in enumerate(values[1:]):
+                    row = (list(row) + [""] * width)[:width]
+                    sheet_row = offset + 2
+                    h = _row_hash(row)
+                    if known.get(sheet_row) != h:
+                        changed.append((sheet_row, h, json.dumps(dict(zip(headers, row))), search_text(headers, row)))
+                last_row = len(values)
+
+                self._db.executemany("INSERT OR REPLACE INTO rows (sheet_row, hash, data, search) VALUES (?, ?, ?, ?)",
+                                     changed)
+                deleted = self._db.execute("DELETE FROM rows WHERE sheet_row > ?", (last_row,)).rowcount
+                if headers != self._get_meta("headers"):
+                    self._set_meta("headers", headers)
+                self._set_meta("generation", self._get_meta("generation", 0) + 1)
+                self._set_meta("synced_at", time.time())
+                self._set_meta("last_error", None)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return {"flushed": flushed, "changed": len(changed), "deleted": deleted, "total": last_row - 1}
+
+    def record_error(self, error):
+        with self._lock:
+            self._set_meta("last_error", str(error))
+
+    # ---- reads ----
+    def count(self, q="") -> int:
+        with self._lock:
+            if q:
+                return self._db.execute("SELECT COUNT(*) FROM rows WHERE search LIKE ? ESCAPE '\\'",
+                                        (like_pattern(q),)).fetchone()[0]
+            return self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def records(self, offset=0, limit=-1, sort="", order="asc", q=""):
+        """Rows as dicts with a 'sheet_row' key, filtered/sorted/sliced in SQL."""
+        sql = "SELECT sheet_row, data FROM rows"
+        params = []
+        if q:
+            sql += " WHERE search LIKE ? ESCAPE '\\'"  # the values only, not the JSON around them
+            params.append(like_pattern(q))
+        if sort:
+            sql += f" ORDER BY lower(json_extract(data, ?)) {'DESC' if order == 'desc' else 'ASC'}, sheet_row"
+            params.append(f'$."{sort}"')
+        else:
+            sql += " ORDER BY sheet_row"
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [dict(json.loads(data), sheet_row=sheet_row) for sheet_row, data in rows]
+
+    def records_after(self, sheet_row, limit):
+        """Up to `limit` rows after `sheet_row`, in sheet order (a keyset walk for exports)."""
+        with self._lock:
+            rows = self._db.execute("SELECT sheet_row, data FROM rows WHERE sheet_row > ? ORDER BY sheet_row LIMIT ?",
+                                    (sheet_row, limit)).fetchall()
+        return [dict(json.loads(data), sheet_row=r) for r, data in rows]
+
+    def snapshot(self):
+        """(every row as a dict, in sheet order, revision) in one read; None before the first sync."""
+        with self._lock:
+            if not self._get_meta("generation", 0):
+                return None
+            records = [json.loads(data) for (data,) in self._db.execute("SELECT data FROM rows ORDER BY sheet_row")]
+            return records, (self._db.total_changes, self._db.execute("PRAGMA data_version").fetchone()[0])
+
+    def revision(self):
+        """Changes whenever the rows change: our own writes, or another process's commits."""
+        with self._lock:
+            return self._db.total_changes, self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def record(self, sheet_row):
+        """One row as a dict with a 'sheet_row' key, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM rows WHERE sheet_row = ?", (sheet_row,)).fetchone()
+        return dict(json.loads(row[0]), sheet_row=sheet_row) if row else None
+
+    def find(self, header, value):
+        """
+        The row whose `header` column equals `value` (a dict with 'sheet_row'),
+        or None if there is no such row or more than one. Lookups on a column
+        are indexed after the first.
+        """
+        if not value:
+            return None
+        expr = "json_extract(data, '$.\"%s\"')" % header.replace("'", "''").replace('"', "")
+        with self._lock:
+            if header not in self._find_indexes:
+                self._db.execute(f"CREATE INDEX IF NOT EXISTS rows_find_{len(self._find_indexes)} ON rows ({expr})")
+                self._find_indexes.add(header)
+            rows = self._db.execute(f"SELECT sheet_row, data FROM rows WHERE {expr} = ? LIMIT 2",
+                                    (str(value),)).fetchall()
+        if len(rows) != 1:
+            return None
+        sheet_row, data = rows[0]
+        return dict(json.loads(data), sheet_row=sheet_row)
+
+    # ---- local edits + outbox ----
+    def _enqueue(self, op, sheet_row, values, row_id=""):
+        self._db.execute(
+            "INSERT INTO outbox (op, sheet_row, data, created_at, row_id) VALUES (?, ?, ?, ?, ?)",
+            (op, sheet_row, json.dumps(values), time.time(), row_id),
+        )
+
+    def _row_id_at(self, sheet_row):
+        """The ID the row at `sheet_row` has in the sheet (as mirrored), or "" if it has none."""
+        row = self._db.execute("SELECT data FROM rows WHERE sheet_row = ?", (sheet_row,)).fetchone()
+        return str(json.loads(row[0]).get(ROW_ID_HEADER, "") or "") if row else ""
+
+    def queue_append(self, values):
+        with self._lock:
+            headers = self._get_meta("headers", [])
+            self._db.execute("BEGIN")
+            last = self._db.execute("SELECT COALESCE(MAX(sheet_row), 1) FROM rows").fetchone()[0]
+            self._db.execute(
+                "INSERT INTO rows (sheet_row, hash, data, search) VALUES (?, ?, ?, ?)",
+                (last + 1, _row_hash(values), json.dumps(dict(zip(headers, values))), search_text(headers, values)),
+            )
+            self._enqueue("append", None, values)
+            self._db.execute("COMMIT")
+            return last + 1
+
+    def queue_update(self, sheet_row, values):
+        with self._lock:
+            headers = self._get_meta("headers", [])
+            self._db.execute("BEGIN")
+            row_id = self._row_id_at(sheet_row)  # before the update: it may be the one filling a blank ID
+            self._db.execute(
+                "UPDATE rows SET hash = ?, data = ?, search = ? WHERE sheet_row = ?",
+                (_row_hash(values), json.dumps(dict(zip(headers, values))), search_text(headers, values), sheet_row),
+            )
+            self._enqueue("update", sheet_row, values, row_id)
+            self._db.execute("COMMIT")
+
+    def queue_delete(self, sheet_row):
+        with self._lock:
+            self._db.execute("BEGIN")
+            row_id = self._row_id_at(sheet_row)
+            self._db.execute("DELETE FROM rows WHERE sheet_row = ?", (sheet_row,))
+            # Shift later rows up, as the sheet will (two steps keep the primary key unique).
+            self._db.execute("UPDATE rows SET sheet_row = -(sheet_row - 1) WHERE sheet_row > ?", (sheet_row,))
+            self._db.execute("UPDATE rows SET sheet_row = -sheet_row WHERE sheet_row < 0")
+            self._enqueue("delete", sheet_row, [], row_id)
+            self._db.execute("COMMIT")
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def dead_letters(self, limit=20):
+        """The most recent edits that never reached the sheet, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, op, sheet_row, data, attempts, last_error, failed_at FROM dead_letters "
+                "ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {"id": i, "op": op, "sheet_row": row, "values": json.loads(data), "attempts": attempts,
+             "last_error": error, "failed_at": failed_at}
+            for i, op, row, data, attempts, error, failed_at in rows
+        ]
+
+    def _bury(self, item_id, op, force=False) -> bool:
+        """
+        Move an outbox item that has used up its attempts (or any, with
+        force) to `dead_letters`; after an append or delete, also the ID-less
+        updates and deletes queued behind it, whose row numbers counted on
+        it. Call with the lock held.
+        """
+        now = time.time()
+        least = 0 if force else SHEET_MIRROR_MAX_ATTEMPTS
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            moved = self._db.execute(
+                "INSERT INTO dead_letters (id, op, sheet_row, data, created_at, attempts, last_error, failed_at) "
+                "SELECT id, op, sheet_row, data, created_at, attempts, last_error, ? FROM outbox "
+                "WHERE id = ? AND attempts >= ?", (now, item_id, least)
+            ).rowcount
+            if moved:
+                self._db.execute("DELETE FROM outbox WHERE id = ?", (item_id,))
+                if op in ("append", "delete"):
+                    dependent = "id > ? AND row_id = '' AND op IN ('update', 'delete')"
+                    self._db.execute(
+                        "INSERT INTO dead_letters (id, op, sheet_row, data, created_at, attempts, last_error, failed_at) "
+                        f"SELECT id, op, sheet_row, data, created_at, attempts, ?, ? FROM outbox WHERE {dependent}",
+                        (f"not replayed: its row number assumed edit #{item_id} reached the sheet", now, item_id),
+                    )
+                    self._db.execute(f"DELETE FROM outbox WHERE {dependent}", (item_id,))
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return bool(moved)
+
+    def flush(self, ws) -> int:
+        """
+        Replay queued edits to the sheet in FIFO order, updates and deletes
+        at their row's current position (found by its ID). Stops at the first
+        failure so later edits never overtake earlier ones. An edit the sheet
+        has rejected SHEET_MIRROR_MAX_ATTEMPTS times, or whose row is gone, is
+        moved to `dead_letters` (see _bury) and the flush ends there; sync()
+        then reports "resync" so the syncer starts over right away.
+        """
+        done = 0
+        headers = self.headers()
+        id_col = headers.index(ROW_ID_HEADER) if ROW_ID_HEADER in headers else None
+        while True:
+            with self._lock:
+                item = self._db.execute(
+                    "SELECT id, op, sheet_row, data, row_id FROM outbox ORDER BY id LIMIT 1"
+                ).fetchone()
+            if item is None:
+                return done
+            item_id, op, sheet_row, data, row_id = item
+            values = json.loads(data)
+            try:
+                if op != "append" and row_id and id_col is not None:
+                    sheet_row = _locate(ws, sheet_row, row_id, id_col)
+                if op == "append":
+                    ws.append_row(values, value_input_option="USER_ENTERED")
+                elif op == "update":
+                    ws.update(_row_range(sheet_row, len(values)), [values])
+                elif op == "delete":
+                    ws.delete_rows(sheet_row)
+            except Exception as e:
+                transient = _transient(e)
+                with self._lock:
+                    self._db.execute(  # attempts counts rejections; an outage is waited out
+                        "UPDATE outbox SET attempts = attempts + ?, last_error = ? WHERE id = ?",
+                        (0 if transient else 1, str(e), item_id),
+                    )
+                    if transient or not self._bury(item_id, op, force=isinstance(e, RowGone)):
+                        raise
+                    self._resync = True
+                print(f"[ERROR] Sheet mirror gave up on queued {op} (row {sheet_row}): {e}")
+                return done
+            with self._lock:
+                self._db.execute("DELETE FROM outbox WHERE id = ?", (item_id,))
+            done += 1
+
+
+# ---------------- Background sync ----------------
+class MirrorSyncer:
+    """One daemon thread per process that keeps a SheetMirror in sync."""
+
+    def __init__(self, mirror, open_ws, interval=SHEET_MIRROR_INTERVAL):
+        self.mirror = mirror
+        self.open_ws = open_ws  # callable -> (worksheet, headers)
+        self.interval = interval
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="sheet-mirror-sync", daemon=True)
+            self._thread.start()
+
+    def nudge(self):
+        """Sync soon (e.g. after an admin edit was queued)."""
+        self._wake.set()
+
+    def sync_once(self):
+        if not self.mirror.acquire_lease(os.getpid(), self.interval * 3):
+            return None  # another worker is syncing the shared file
+        ws, _ = self.open_ws()
+        if ws is None:
+            raise RuntimeError("Google Sheets is not reachable")
+        return self.mirror.sync(ws)
+
+    def _run(self):
+        while True:
+            try:
+                result = self.sync_once()
+                if result and result.get("resync"):
+                    continue  # an edit was dead-lettered: replay the rest and pull now, not next interval
+            except Exception as e:
+                print(f"[WARN] Sheet mirror sync failed: {e}")
+                self.mirror.record_error(e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+_syncer = None
+_syncer_pid = None
+_syncer_lock = threading.Lock()
+
+
+def get_mirror():
+    """Return the process's SheetMirror (starting its syncer), or None if disabled."""
+    global _syncer, _syncer_pid
+    if not SHEET_MIRROR_DB:
+        return None
+    pid = os.getpid()
+    if _syncer is None or _syncer_pid != pid:
+        with _syncer_lock:
+            if _syncer is None or _syncer_pid != pid:
+                from .sheets import get_client_manager
+
+                _syncer = MirrorSyncer(SheetMirror(SHEET_MIRROR_DB), lambda: get_client_manager().get())
+                _syncer_pid = pid
+                _syncer.start()
+    return _syncer.mirror
+
+
+def nudge_mirror():
+    if _syncer is not None:
+        _syncer.nudge()
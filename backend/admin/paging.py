@@ -0,0 +1,153 @@
+# backend/admin/paging.py
+"""
+Server-side pagination for the admin manage table.
+
+Plain pages are fetched with a bounded A1 range read (only `per_page` rows
+cross the wire) and the total from the extent of one column, cached by the
+caller. (The grid's rowCount would include the blank rows every new sheet
+starts with, 1000 by default.) A page past the end shows the last one.
+Sorting and filtering need every row, so those work over the shared record
+cache (one full read per TTL window, not one per request).
+"""
+from .locator import ROW_ID_HEADER
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+
+class Page:
+    def __init__(self, rows, page, per_page, total, sort="", order="asc", q=""):
+        self.rows = rows
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.sort = sort
+        self.order = order
+        self.q = q
+
+    @property
+    def pages(self):
+        return max(1, -(-self.total // self.per_page))
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+    @property
+    def first_row(self):
+        return (self.page - 1) * self.per_page + 1 if self.rows else 0
+
+    @property
+    def last_row(self):
+        return self.first_row + len(self.rows) - 1 if self.rows else 0
+
+
+def parse_page_args(args, default_per_page=DEFAULT_PER_PAGE):
+    """Read ?page=&per_page=&sort=&order=&q= from a request.args-like mapping."""
+    page = max(1, args.get("page", 1, type=int) or 1)
+    per_page = args.get("per_page", default_per_page, type=int) or default_per_page
+    per_page = min(max(1, per_page), MAX_PER_PAGE)
+    sort = (args.get("sort") or "").strip()
+    order = "desc" if (args.get("order") or "").lower() == "desc" else "asc"
+    q = (args.get("q") or "").strip()
+    return page, per_page, sort, order, q
+
+
+def data_row_count(ws, headers=()):
+    """
+    Number of data rows (header excluded), from a one-column read: the values
+    API drops trailing blank rows. The ID column is not used, since rows
+    written before it existed may have none.
+    """
+    from gspread import utils as gutils
+
+    col = next((i + 1 for i, h in enumerate(headers) if h != ROW_ID_HEADER), 1)
+    letter = gutils.rowcol_to_a1(1, col)[:-1]
+    return max(0, len(ws.get(f"{letter}:{letter}")) - 1)
+
+
+def _last_page(page, per_page, total):
+    return min(page, max(1, -(-total // per_page)))
+
+
+def read_range(ws, headers, first_sheet_row, count):
+    """Fetch `count` rows starting at `first_sheet_row` as dicts with a 'sheet_row' key."""
+    if count <= 0:
+        return []
+    from gspread import utils as gutils  # only the admin pages need gspread
+
+    start_a1 = gutils.rowcol_to_a1(first_sheet_row, 1)
+    end_a1 = gutils.rowcol_to_a1(first_sheet_row + count - 1, len(headers))
+    values = ws.get(f"{start_a1}:{end_a1}")
+    out = []
+    for offset, row in enumerate(values):
+        rec = {h: (row[i] if i < len(row) else "") for i, h in enumerate(headers)}
+        rec["sheet_row"] = first_sheet_row + offset
+        out.append(rec)
+    return out
+
+
+def like_pattern(q) -> str:
+    """
+    SQL LIKE pattern (for `LIKE ? ESCAPE '\\'`) matching `q` anywhere in a
+    lowercased text, as page_from_records() matches; % and _ are literal.
+    """
+    q = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{q}%"
+
+
+def search_text(headers, values) -> str:
+    """The lowercased values of a row's columns, for like_pattern() searches (no JSON keys or escapes)."""
+    values = ["" if v is None else str(v) for v in values][:len(headers)]
+    return "\x1f".join(values + [""] * (len(headers) - len(values))).lower()
+
+
+def _matches(rec, headers, needle):
+    return any(needle in str(rec.get(h, "")).lower() for h in headers)
+
+
+def page_from_records(records, headers, page, per_page, sort="", order="asc", q=""):
+    """Filter, sort and slice an in-memory record list."""
+    rows = [dict(rec, sheet_row=2 + idx) for idx, rec in enumerate(records)] if (sort or q) else None
+    if rows is not None:
+        if q:
+            needle = q.lower()
+            rows = [r for r in rows if _matches(r, headers, needle)]
+        if sort in headers:
+            rows.sort(key=lambda r: str(r.get(sort, "")).lower(), reverse=(order == "desc"))
+        total = len(rows)
+        page = _last_page(page, per_page, total)
+        start = (page - 1) * per_page
+        sliced = rows[start:start + per_page]
+    else:
+        total = len(records)
+        page = _last_page(page, per_page, total)
+        start = (page - 1) * per_page
+        sliced = [dict(rec, sheet_row=2 + start + i) for i, rec in enumerate(records[start:start + per_page])]
+    return Page(sliced, page, per_page, total, sort, order, q)
+
+
+def fetch_page(ws, headers, page, per_page, sort="", order="asc", q="", records=None, load_records=None,
+               count_rows=None):
+    """
+    Return a Page. Uses `records` if already cached; otherwise a range read
+    for plain pages (sized by count_rows(), default data_row_count()), or
+    load_records() when sort/filter need the full set.
+    """
+    if records is None and (sort or q) and load_records is not None:
+        records = load_records()
+    if records is not None:
+        return page_from_records(records, headers, page, per_page, sort, order, q)
+
+    total = count_rows() if count_rows is not None else data_row_count(ws, headers)
+    page = _last_page(page, per_page, total)
+    first = 2 + (page - 1) * per_page
+    rows = read_range(ws, headers, first, min(per_page, max(0, total - (first - 2))))
+    if len(rows) < per_page:
+        # A count from before another worker's delete; a short page marks the real end.
+        total = min(total, first - 2 + len(rows))
+    return Page(rows, page, per_page, total)
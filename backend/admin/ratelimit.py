@@ -0,0 +1,239 @@
+# backend/admin/ratelimit.py
+"""
+Quota-aware scheduler for Google Sheets calls.
+
+Every call on the pooled worksheet goes through one SheetsScheduler per
+process:
+
+  * a token bucket sized to the API quota (SHEETS_QUOTA_PER_MIN, shared out
+    across WEB_CONCURRENCY worker processes) paces calls instead of letting
+    them fail with 429;
+  * identical concurrent reads are coalesced (single-flight): N dashboards
+    loading at once cost one get_all_records();
+  * writes take a ticket and run strictly in arrival order, so a burst of
+    edits turns into latency rather than reordered or dropped writes;
+  * 429/5xx responses and dropped connections are retried with jittered
+    exponential backoff (honouring Retry-After).
+"""
+import os
+import random
+import threading
+import time
+
+import requests
+from gspread.exceptions import APIError
+
+SHEETS_QUOTA_PER_MIN = float(os.getenv("SHEETS_QUOTA_PER_MIN", "60"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+SHEETS_BACKOFF_BASE = float(os.getenv("SHEETS_BACKOFF_BASE", "1.0"))
+SHEETS_BACKOFF_MAX = float(os.getenv("SHEETS_BACKOFF_MAX", "32.0"))
+SHEETS_MAX_WAIT = float(os.getenv("SHEETS_MAX_WAIT", "60.0"))  # longest a call may queue for a token
+
+# Worksheet/Spreadsheet methods by kind; anything else passes straight through.
+READ_METHODS = frozenset({"get_all_records", "get_all_values", "row_values", "get", "batch_get",
+                          "fetch_sheet_metadata"})
+WRITE_METHODS = frozenset({"append_row", "append_rows", "update", "batch_update", "delete_rows"})
+
+
+class QuotaWaitExceeded(RuntimeError):
+    """A call would have had to wait longer than SHEETS_MAX_WAIT for quota."""
+
+
+def _status(error):
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _retryable(error):
+    if isinstance(error, APIError):
+        status = _status(error)
+        return status == 429 or (status is not None and status >= 500)
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token; return how long the caller must sleep before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._at) * self.rate)
+            self._at = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SheetsScheduler:
+    def __init__(self, quota_per_min=None, workers=None, max_retries=SHEETS_MAX_RETRIES,
+                 backoff_base=SHEETS_BACKOFF_BASE, backoff_max=SHEETS_BACKOFF_MAX, max_wait=SHEETS_MAX_WAIT,
+                 sleep=time.sleep):
+        quota = SHEETS_QUOTA_PER_MIN if quota_per_min is None else quota_per_min
+        workers = workers or max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+        share = max(1.0, quota / workers)
+        self.bucket = TokenBucket(rate=share / 60.0, capacity=share)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._flights = {}  # read key -> _Flight
+        self._write_cv = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.waited = 0.0
+
+    # ---- pacing + retry ----
+    def _acquire(self):
+        wait = self.bucket.reserve()
+        if wait > self.max_wait:
+            self.bucket.refund()
+            raise QuotaWaitExceeded(f"Sheets quota exhausted; next slot in {wait:.0f}s")
+        if wait:
+            self.waited += wait
+            self._sleep(wait)
+
+    def _run(self, fn, args, kwargs):
+        attempt = 0
+        while True:
+            self._acquire()
+            self.calls += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not _retryable(e):
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                attempt += 1
+                self.retries += 1
+                print(f"[WARN] Sheets call {getattr(fn, '__name__', fn)} failed ({e}); retry {attempt} in {delay:.1f}s")
+                self._sleep(delay)
+
+    # ---- public API ----
+    def read(self, key, fn, *args, **kwargs):
+        """Run a read; concurrent calls with the same key share one API call."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = self._run(fn, args, kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def write(self, fn, *args, **kwargs):
+        """Run a write after every write that arrived before it."""
+        with self._write_cv:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                self._write_cv.wait()
+        try:
+            return self._run(fn, args, kwargs)
+        finally:
+            with self._write_cv:
+                self._serving += 1
+                self._write_cv.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "quota_wait_seconds": round(self.waited, 3),
+            "queued_writes": self._next_ticket - self._serving,
+        }
+
+
+def _key(obj, name, args, kwargs):
+    try:
+        key = (id(obj), name, args, tuple(sorted(kwargs.items())))
+        hash(key)
+        return key
+    except TypeError:
+        return (id(obj), name, repr(args), repr(sorted(kwargs.items())))
+
+
+class ScheduledProxy:
+    """Routes a Worksheet's (or its Spreadsheet's) API calls through a SheetsScheduler."""
+
+    def __init__(self, target, scheduler):
+        self._target = target
+        self._scheduler = scheduler
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name == "spreadsheet":
+            return ScheduledProxy(attr, self._scheduler)
+        if name in READ_METHODS and callable(attr):
+            return lambda *a, **kw: self._scheduler.read(_key(self._target, name, a, kw), attr, *a, **kw)
+        if name in WRITE_METHODS and callable(attr):
+            return lambda *a, **kw: self._scheduler.write(attr, *a, **kw)
+        return attr
+
+
+_scheduler = None
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> SheetsScheduler:
+    """This process's scheduler (rebuilt after fork, like the client manager)."""
+    global _scheduler, _scheduler_pid
+    pid = os.getpid()
+    if _scheduler is None or _scheduler_pid != pid:
+        with _scheduler_lock:
+            if _scheduler is None or _scheduler_pid != pid:
+                _scheduler = SheetsScheduler()
+                _scheduler_pid = pid
+    return _scheduler
+
+
+def schedule_worksheet(ws):
+    return ScheduledProxy(ws, get_scheduler()) if ws is not None else ws
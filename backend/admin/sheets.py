@@ -0,0 +1,154 @@
+# backend/admin/sheets.py
+"""
+Process-wide Google Sheets client.
+
+Opening the sheet costs a token mint plus several round trips
+(authorize, open_by_key, row_values(1)). The manager below does that once per
+worker process and hands the same worksheet handle and header row to every
+request thread. The access token is refreshed only when it has expired.
+Calls on the worksheet are paced, retried and coalesced by ratelimit.py.
+"""
+import os
+import re
+import threading
+import time
+
+import gspread
+from google.auth import default
+from google.auth.transport.requests import Request as AuthRequest
+from requests.adapters import HTTPAdapter
+
+from backend.metrics import instrument_worksheet
+
+from .ratelimit import schedule_worksheet
+
+# drive.metadata.readonly lets the admin change feed (events.py) ask Drive when
+# the spreadsheet last changed instead of downloading rows to find out.
+SHEETS_DRIVE_METADATA = os.getenv("SHEETS_DRIVE_METADATA", "1") == "1"
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets"] + (
+    ["https://www.googleapis.com/auth/drive.metadata.readonly"] if SHEETS_DRIVE_METADATA else []
+)
+
+# How long the cached header row is trusted before it is re-read.
+HEADERS_TTL = float(os.getenv("SHEETS_HEADERS_TTL", "300"))
+
+# Size of the keep-alive connection pool; should cover gunicorn's thread count.
+POOL_SIZE = int(os.getenv("SHEETS_POOL_SIZE", "8"))
+
+
+def sheet_id_from_url(sheet_url: str):
+    """Extract the spreadsheet key from a SHEET_URL, or None."""
+    m = re.search(r"/spreadsheets/d/([a-zA-Z0-9-_]+)", sheet_url or "")
+    return m.group(1) if m else None
+
+
+class SheetsClientManager:
+    """
+    Holds credentials, one authorized session (HTTP keep-alive), the opened
+    worksheet and its header row. Safe to share between gthread workers.
+    """
+
+    def __init__(self, sheet_url=None):
+        self.sheet_url = sheet_url if sheet_url is not None else os.getenv("SHEET_URL", "")
+        self.sheet_id = sheet_id_from_url(self.sheet_url)
+        self._lock = threading.Lock()
+        self._creds = None
+        self._client = None
+        self._ws = None
+        self._headers = None
+        self._headers_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    # ---- internals (call with self._lock held) ----
+    def _connect(self):
+        creds, _ = default(scopes=SCOPES)
+        client = gspread.authorize(creds)
+        session = client.http_client.session
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("https://", adapter)
+        self._creds = creds
+        self._client = client
+        # Metrics see the caller's latency, including any wait for quota or retries.
+        self._ws = instrument_worksheet(schedule_worksheet(client.open_by_key(self.sheet_id).sheet1))
+        self._headers = None
+
+    def _ensure_token(self):
+        # Only mint a token when there is none or it has expired.
+        if not self._creds.valid:
+            self._creds.refresh(AuthRequest())
+            self.refreshes += 1
+
+    def _ensure_headers(self):
+        if self._headers is None or time.monotonic() - self._headers_at > HEADERS_TTL:
+            self._headers = self._ws.row_values(1)
+            self._headers_at = time.monotonic()
+
+    # ---- public API ----
+    def get(self):
+        """Return (worksheet, header_list) or (None, None) if not configured/unavailable."""
+        if not self.sheet_id:
+            return None, None
+
+        with self._lock:
+            try:
+                if self._ws is None:
+                    self.misses += 1
+                    self._connect()
+                else:
+                    self.hits += 1
+                self._ensure_token()
+                self._ensure_headers()
+                return self._ws, list(self._headers)
+            except Exception as e:
+                self.errors += 1
+                print(f"[ERROR] Sheets auth/open failed: {e}")
+                self._reset_locked()
+                return None, None
+
+    def invalidate_headers(self):
+        """Force the header row to be re-read on the next get()."""
+        with self._lock:
+            self._headers = None
+
+    def _reset_locked(self):
+        self._creds = None
+        self._client = None
+        self._ws = None
+        self._headers = None
+
+    def reset(self):
+        """Drop the session; the next get() re-authenticates."""
+        with self._lock:
+            self._reset_locked()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "token_refreshes": self.refreshes,
+            "errors": self.errors,
+            "connected": self._ws is not None,
+        }
+
+
+_manager = None
+_manager_pid = None
+_manager_lock = threading.Lock()
+
+
+def get_client_manager() -> SheetsClientManager:
+    """
+    Return this process's manager. A forked worker never reuses the parent's
+    sessions: the manager is rebuilt when the pid changes.
+    """
+    global _manager, _manager_pid
+    pid = os.getpid()
+    if _manager is None or _manager_pid != pid:
+        with _manager_lock:
+            if _manager is None or _manager_pid != pid:
+                _manager = SheetsClientManager()
+                _manager_pid = pid
+    return _manager
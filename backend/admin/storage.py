@@ -0,0 +1,960 @@
+# backend/admin/storage.py
+"""
+Row storage behind the admin blueprint.
+
+Every engine exposes the same small interface, so the routes never touch
+gspread directly. Rows are addressed the way the sheet addresses them: by
+1-based `sheet_row`, with data starting at row 2, and values are lists in
+header order. Rows also carry a stable `row_id` and a `row_version`; single-row
+update()/delete() calls that pass them find the row wherever it has moved
+and raise RowConflict rather than write to the wrong one (see locator.py).
+Bulk writes take plain positions: callers holding positions from an earlier
+read turn them into current ones with locate_rows() first.
+
+Engines (STORAGE_BACKEND):
+  sheets  (default) Google Sheets through the pooled client and record cache,
+          or the SQLite mirror when SHEET_MIRROR_DB is set and populated;
+  sqlite  a local, indexed SQLite file (STORAGE_SQLITE_PATH) that is the
+          source of truth - no Sheets quota involved;
+  memory  a per-process list, for tests and benchmarks.
+"""
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from gspread import utils as gutils
+
+from .bulk import contiguous_ranges
+from .cache import cache_key, record_cache
+from .dedupe import DUPLICATE_TITLE_HEADER, DUPLICATE_URL_HEADER, DuplicateIndex, same_entry
+from .locator import ROW_ID_HEADER, RowConflict, RowLocator, new_row_id, record_version, row_version
+from .mirror import get_mirror, nudge_mirror
+from .paging import Page, data_row_count, fetch_page, like_pattern, page_from_records, search_text
+from .sheets import get_client_manager
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sheets").strip().lower()
+STORAGE_SQLITE_PATH = os.getenv("STORAGE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "admin_rows.sqlite3"))
+SHEETS_DELETE_BATCH = int(os.getenv("SHEETS_DELETE_BATCH", "500"))  # row ranges per spreadsheet batchUpdate
+
+# Column layout for engines that do not get one from a sheet (STORAGE_HEADERS=comma,separated).
+DEFAULT_HEADERS = [
+    "Title", "URL", "Target Audience", "Author(s)", "Publisher", "Date Published",
+    "Resource Theme", "Resource Type", "Keywords", "Language", "Status", "Notes",
+]
+
+
+def _default_headers():
+    env = os.getenv("STORAGE_HEADERS", "")
+    return [h.strip() for h in env.split(",") if h.strip()] or list(DEFAULT_HEADERS)
+
+
+def _row_range(sheet_row, width, last=None):
+    return f"{gutils.rowcol_to_a1(sheet_row, 1)}:{gutils.rowcol_to_a1(last or sheet_row, width)}"
+
+
+_UPDATED_ROW_RE = re.compile(r"![A-Z]+(\d+)")
+
+
+def _delete_request(sheet_id, start, end):
+    """A batchUpdate request deleting sheet rows start..end (1-based, inclusive)."""
+    return {"deleteDimension": {"range": {"sheetId": sheet_id, "dimension": "ROWS",
+                                          "startIndex": start - 1, "endIndex": end}}}
+
+
+def _appended_row(response):
+    """sheet_row of an append_row() from the API's updates.updatedRange, or None."""
+    updated = ((response or {}).get("updates") or {}).get("updatedRange", "") if isinstance(response, dict) else ""
+    m = _UPDATED_ROW_RE.search(updated)
+    return int(m.group(1)) if m else None
+
+
+def _locate_in(records, ids, refs, headers):
+    """locate_rows() against records in sheet order; ids[i] is records[i]'s row_id, or None without IDs."""
+    at = {row_id: i for i, row_id in enumerate(ids or ()) if row_id}
+    out = []
+    for sheet_row, row_id, version in refs:
+        i = at.get(row_id) if row_id and ids is not None else sheet_row - 2
+        if i is None:
+            out.append(RowConflict("the row was deleted by someone else"))
+        elif not 0 <= i < len(records):
+            out.append(RowConflict(f"row {sheet_row} no longer exists"))
+        elif version and record_version(records[i], headers) != version:
+            out.append(RowConflict(f"row {i + 2} was changed by someone else since you loaded it"))
+        else:
+            out.append(i + 2)
+    return out
+
+
+def _annotate(rows, headers):
+    """Add row_id (the ID column unless the engine set one) and row_version to row dicts."""
+    for r in rows:
+        r.setdefault("row_id", str(r.get(ROW_ID_HEADER, "") or ""))
+        r["row_version"] = record_version(r, headers)
+    return rows
+
+
+class Storage:
+    """Interface shared by all engines."""
+
+    name = "base"
+    deferred = False  # True when writes reach the source of truth asynchronously
+    id_header = None  # column holding the row_id, for engines whose IDs live in the rows themselves
+
+    def headers(self) -> list:
+        """Column names, or [] if the engine is not configured/reachable."""
+        raise NotImplementedError
+
+    def page(self, page, per_page, sort="", order="asc", q="") -> Page:
+        raise NotImplementedError
+
+    def get(self, sheet_row):
+        """One row as a dict (with 'sheet_row', 'row_id', 'row_version'), or None."""
+        raise NotImplementedError
+
+    def snapshot(self):
+        """(all records as dicts, revision) for read-mostly consumers such as the catalog."""
+        raise NotImplementedError
+
+    def append(self, values):
+        """Add a row; returns it as a dict like get(), built without reading it back."""
+        raise NotImplementedError
+
+    def update(self, sheet_row, values, row_id="", version=""):
+        """
+        Overwrite a row; returns the sheet_row written. With the row_id/version
+        the dashboard rendered, the row is looked up by ID (sheet_row is only a
+        hint) and RowConflict is raised if it is gone or was edited since.
+        """
+        raise NotImplementedError
+
+    def delete(self, sheet_row, row_id="", version=""):
+        """Delete a row, resolved and checked like update(); returns the sheet_row deleted."""
+        raise NotImplementedError
+
+    # ---- bulk (engines override these with a single round trip / transaction) ----
+    def locate_rows(self, refs):
+        """
+        Current sheet_rows for bulk writes: refs are (sheet_row, row_id,
+        version) as a client read them, checked like update()/delete() do.
+        Returns one entry per ref, the row's sheet_row now or, if it is gone
+        or was changed, a RowConflict (returned, not raised).
+        """
+        raise NotImplementedError
+
+    def append_many(self, rows):
+        for values in rows:
+            self.append(values)
+
+    def update_many(self, updates):
+        """updates: {sheet_row: values}, current positions (see locate_rows())."""
+        for sheet_row, values in updates.items():
+            self.update(sheet_row, values)
+
+    def delete_many(self, sheet_rows):
+        """Delete rows given by their current positions (see locate_rows()), as of before the call."""
+        for sheet_row in sorted(set(sheet_rows), reverse=True):
+            self.delete(sheet_row)
+
+    def update_cells(self, header, values):
+        """Set one column on many rows; values: {sheet_row: value}."""
+        if not values:
+            return
+        headers = self.headers()
+        col = headers.index(header)
+        records, _ = self.snapshot()
+        updates = {}
+        for sheet_row, value in values.items():
+            row = [records[sheet_row - 2].get(h, "") for h in headers]
+            row[col] = value
+            updates[sheet_row] = row
+        self.update_many(updates)
+
+    def status(self):
+        """Engine-specific status for the dashboard (the mirror watermark), or None."""
+        return None
+
+    def find_duplicates(self, values, exclude_row=None):
+        """
+        [(sheet_row, "url" | "title"), ...] of rows that a row with `values`
+        would duplicate (see dedupe.py). This default keeps an index built
+        from local data and rebuilds it when revision() moves.
+        """
+        record = dict(zip(self.headers(), values))
+        revision = self.revision()
+        cached = getattr(self, "_dupes", None)
+        if cached is None or revision is None or cached[0] != revision:
+            records, _ = self.snapshot()
+            cached = self._dupes = (revision, DuplicateIndex(records))
+        return cached[1].matches(record, exclude_row)
+
+    def duplicate_of(self, values, sheet_row):
+        """
+        The row (as get() returns it) that a row with `values` duplicates,
+        given the sheet_row find_duplicates() pointed at; None if none does
+        any more. An index can outlive the positions it was built with (see
+        cache.py), so the row there is checked, and if it no longer matches
+        the duplicate is looked up again in freshly read records.
+        """
+        record = dict(zip(self.headers(), values))
+        existing = self.get(sheet_row)
+        if existing and same_entry(record, existing):
+            return existing
+        self.refresh()
+        found = DuplicateIndex(self.snapshot()[0]).matches(record)
+        existing = self.get(found[0][0]) if found else None
+        return existing if existing and same_entry(record, existing) else None
+
+    # ---- change feed (events.py) ----
+    def change_token(self):
+        """Cheap value that moves whenever the rows this process can see change (no network read)."""
+        return self.revision()
+
+    def source_token(self):
+        """
+        Cheap token from the source of truth itself, for changes made behind
+        this process's back; None when change_token() already sees them all.
+        Raises if the source cannot say (the feed then re-reads rows instead).
+        """
+        return None
+
+    def refresh(self):
+        """Drop anything cached, so the next snapshot() reads the source of truth."""
+
+    # ---- export (backend/export.py) ----
+    def revision(self):
+        """A value that changes whenever the rows do (within this process), or None if unknown."""
+        return None
+
+    def rows_are_local(self) -> bool:
+        """True when export_rows() reads local data, so a second pass over it is cheap."""
+        return True
+
+    def export_rows(self, chunk_rows):
+        """Every row as a list in header order, yielded in chunks of at most `chunk_rows`."""
+        raise NotImplementedError
+
+
+# ---------------- Google Sheets ----------------
+class SheetsStorage(Storage):
+    name = "sheets"
+    id_header = ROW_ID_HEADER
+
+    def _open(self):
+        ws, headers = get_client_manager().get()
+        if not (ws and headers):
+            raise RuntimeError("Google Sheets not configured (check SHEET_URL and GOOGLE_APPLICATION_CREDENTIALS).")
+        return ws, headers
+
+    def _records(self, ws):
+        return record_cache.get(cache_key(ws), ws.get_all_records)
+
+    def headers(self):
+        _, headers = get_client_manager().get()
+        return headers or []
+
+    def page(self, page, per_page, sort="", order="asc", q=""):
+        ws, headers = self._open()
+        result = fetch_page(
+            ws, headers, page, per_page, sort, order, q,
+            records=record_cache.peek(cache_key(ws)),
+            load_records=lambda: self._records(ws),
+            count_rows=lambda: record_cache.row_count(cache_key(ws), lambda: data_row_count(ws, headers)),
+        )
+        _annotate(result.rows, headers)
+        return result
+
+    def get(self, sheet_row):
+        ws, headers = self._open()
+        records = self._records(ws)
+        idx = sheet_row - 2
+        return _annotate([dict(records[idx], sheet_row=sheet_row)], headers)[0] if 0 <= idx < len(records) else None
+
+    def snapshot(self):
+        ws, _ = self._open()
+        key = cache_key(ws)
+        return list(self._records(ws)), record_cache.revision(key)
+
+    @staticmethod
+    def _with_id(values, headers):
+        """Fill a blank ID column with a new ID."""
+        values = list(values)
+        if ROW_ID_HEADER in headers:
+            i = headers.index(ROW_ID_HEADER)
+            values += [""] * (i + 1 - len(values))
+            if not str(values[i]).strip():
+                values[i] = new_row_id()
+        return values
+
+    def _resolve(self, ws, headers, sheet_row, row_id, version):
+        """
+        (sheet_row, current values) of the row the caller means. The ID index
+        picks the candidate, one single-row read confirms it; only when the
+        index turns out stale (another worker moved rows) is the sheet re-read.
+        """
+        key = cache_key(ws)
+        id_col = headers.index(ROW_ID_HEADER) if ROW_ID_HEADER in headers else None
+        by_id = bool(row_id) and id_col is not None
+        if by_id:
+            sheet_row = record_cache.locate(key, row_id, ROW_ID_HEADER) or sheet_row
+        current = (ws.row_values(sheet_row) + [""] * len(headers))[:len(headers)]
+        if by_id and current[id_col] != row_id:
+            record_cache.invalidate(key)
+            records = self._records(ws)
+            sheet_row = record_cache.locate(key, row_id, ROW_ID_HEADER)
+            if sheet_row is None:
+                raise RowConflict("the row was deleted by someone else")
+            current = [records[sheet_row - 2].get(h, "") for h in headers]
+        if version and row_version(current) != version:
+            raise RowConflict(f"row {sheet_row} was changed by someone else since you loaded it")
+        return sheet_row, current
+
+    def locate_rows(self, refs):
+        # One fresh read answers them all (per-row _resolve() would cost a read each) and refreshes the cache.
+        ws, headers = self._open()
+        record_cache.invalidate(cache_key(ws))
+        records = self._records(ws)
+        ids = [str(r.get(ROW_ID_HEADER, "") or "") for r in records] if ROW_ID_HEADER in headers else None
+        return _locate_in(records, ids, refs, headers)
+
+    def append(self, values):
+        ws, headers = self._open()
+        values = self._with_id(values, headers)
+        response = ws.append_row(values, value_input_option="USER_ENTERED")
+        record = dict(zip(headers, values))
+        record_cache.append(cache_key(ws), record)
+        return _annotate([dict(record, sheet_row=_appended_row(response))], headers)[0]
+
+    def update(self, sheet_row, values, row_id="", version=""):
+        ws, headers = self._open()
+        values = list(values)
+        if row_id or version:
+            sheet_row, current = self._resolve(ws, headers, sheet_row, row_id, version)
+            if ROW_ID_HEADER in headers:  # IDs are not editable
+                values[headers.index(ROW_ID_HEADER)] = current[headers.index(ROW_ID_HEADER)]
+        values = self._with_id(values, headers)  # a row from before the ID column gets one now
+        ws.update(_row_range(sheet_row, len(headers)), [values])
+        record_cache.update(cache_key(ws), sheet_row, dict(zip(headers, values)))
+        return sheet_row
+
+    def delete(self, sheet_row, row_id="", version=""):
+        ws, headers = self._open()
+        if row_id or version:
+            sheet_row, _ = self._resolve(ws, headers, sheet_row, row_id, version)
+        ws.delete_rows(sheet_row)
+        record_cache.delete(cache_key(ws), sheet_row)
+        return sheet_row
+
+    def append_many(self, rows):
+        rows = [list(r) for r in rows]
+        if not rows:
+            return
+        ws, headers = self._open()
+        rows = [self._with_id(r, headers) for r in rows]
+        ws.append_rows(rows, value_input_option="USER_ENTERED")
+        key = cache_key(ws)
+        for values in rows:
+            record_cache.append(key, dict(zip(headers, values)))
+
+    def update_many(self, updates):
+        if not updates:
+            return
+        ws, headers = self._open()
+        updates = {r: self._with_id(v, headers) for r, v in updates.items()}
+        ws.batch_update(
+            [{"range": _row_range(r, len(headers)), "values": [v]} for r, v in sorted(updates.items())],
+            value_input_option="USER_ENTERED",
+        )
+        key = cache_key(ws)
+        for sheet_row, values in updates.items():
+            record_cache.update(key, sheet_row, dict(zip(headers, values)))
+
+    def delete_many(self, sheet_rows):
+        ranges = contiguous_ranges(sheet_rows)
+        if not ranges:
+            return
+        ws, _ = self._open()
+        key = cache_key(ws)
+        if len(ranges) == 1:
+            ws.delete_rows(*ranges[0])
+        else:
+            # One deleteDimension per contiguous run, bottom-up, many per batchUpdate:
+            # scattered rows cost a call per SHEETS_DELETE_BATCH runs, not one per run.
+            for i in range(0, len(ranges), SHEETS_DELETE_BATCH):
+                batch = ranges[i:i + SHEETS_DELETE_BATCH]
+                ws.spreadsheet.batch_update({"requests": [_delete_request(ws.id, s, e) for s, e in batch]})
+        for start, end in ranges:
+            for r in range(end, start - 1, -1):
+                record_cache.delete(key, r)
+
+    def update_cells(self, header, values):
+        # Only the cells themselves, in one batch_update: no row is read or rewritten.
+        if not values:
+            return
+        ws, headers = self._open()
+        col = headers.index(header) + 1
+        ws.batch_update(
+            [{"range": gutils.rowcol_to_a1(r, col), "values": [[v]]} for r, v in sorted(values.items())],
+            value_input_option="RAW",
+        )
+        key = cache_key(ws)
+        records = record_cache.peek(key)
+        if records is not None:
+            for sheet_row, value in values.items():
+                if 0 <= sheet_row - 2 < len(records):
+                    record_cache.update(key, sheet_row, dict(records[sheet_row - 2], **{header: value}))
+
+    def find_duplicates(self, values, exclude_row=None):
+        # The index is patched with the cached records and outlives them (see
+        # cache.py); it costs a download only while no index exists yet.
+        ws, headers = self._open()
+        key = cache_key(ws)
+        record = dict(zip(headers, values))
+        args = (key, record, DUPLICATE_URL_HEADER, DUPLICATE_TITLE_HEADER, exclude_row)
+        found = record_cache.find_duplicates(*args, loader=ws.get_all_records)
+        if found is None:
+            records = self._records(ws)
+            found = record_cache.find_duplicates(*args)
+            if found is None:  # RECORD_CACHE_TTL=0: nothing stays cached
+                found = DuplicateIndex(records).matches(record, exclude_row)
+        return found
+
+    def revision(self):
+        ws, _ = self._open()
+        # Other processes' edits only arrive with a reload, so the value also
+        # moves on every RECORD_CACHE_TTL window. With RECORD_CACHE_TTL=0
+        # nothing is cached and nothing here can tell a change: unknown.
+        if record_cache.ttl <= 0:
+            return None
+        return record_cache.revision(cache_key(ws)), int(time.monotonic() // record_cache.ttl)
+
+    def change_token(self):
+        ws, _ = self._open()
+        return record_cache.revision(cache_key(ws))
+
+    def source_token(self):
+        # Drive's modifiedTime: one metadata request, no rows (needs SHEETS_DRIVE_METADATA's scope).
+        ws, _ = self._open()
+        return ws.spreadsheet.get_lastUpdateTime()
+
+    def refresh(self):
+        ws, _ = self._open()
+        record_cache.invalidate(cache_key(ws))
+
+    def rows_are_local(self):
+        ws, _ = self._open()
+        return record_cache.peek(cache_key(ws)) is not None
+
+    def export_rows(self, chunk_rows):
+        ws, headers = self._open()
+        records = record_cache.peek(cache_key(ws))
+        if records is not None:
+            for start in range(0, len(records), chunk_rows):
+                yield [[r.get(h, "") for h in headers] for r in records[start:start + chunk_rows]]
+            return
+        # Bounded range reads, never the whole sheet at once; a short chunk marks the end.
+        first, width = 2, len(headers)
+        while True:
+            values = ws.get(_row_range(first, width, last=first + chunk_rows - 1))
+            if values:
+                yield [(list(v) + [""] * width)[:width] for v in values]
+            if len(values) < chunk_rows:
+                return
+            first += chunk_rows
+
+
+class MirrorStorage(Storage):
+    """Reads from the SQLite mirror; writes are queued and replayed to the sheet."""
+
+    name = "mirror"
+    deferred = True
+    id_header = ROW_ID_HEADER
+
+    def __init__(self, mirror):
+        self.mirror = mirror
+
+    def headers(self):
+        return self.mirror.headers()
+
+    def page(self, page, per_page, sort="", order="asc", q=""):
+        rows = self.mirror.records((page - 1) * per_page, per_page, sort, order, q)
+        _annotate(rows, self.headers())
+        return Page(rows, page, per_page, self.mirror.count(q), sort, order, q)
+
+    def get(self, sheet_row):
+        record = self.mirror.record(sheet_row)
+        return _annotate([record], self.headers())[0] if record else None
+
+    def snapshot(self):
+        # The mirror's rows, numbered as its queued edits will leave the sheet,
+        # so catalog, duplicate checks and the change feed survive an outage.
+        # Only before the first sync is there nothing to read but the sheet.
+        snapshot = self.mirror.snapshot()
+        return snapshot if snapshot is not None else _sheets.snapshot()
+
+    def _resolve(self, sheet_row, row_id, version):
+        """Check the caller's row against the mirror, which orders queued edits the way the sheet will."""
+        headers = self.headers()
+        record = self.mirror.find(ROW_ID_HEADER, row_id) if row_id and ROW_ID_HEADER in headers else None
+        if record is None:
+            if row_id and ROW_ID_HEADER in headers:
+                raise RowConflict("the row was deleted by someone else")
+            record = self.mirror.record(sheet_row)
+            if record is None:
+                raise RowConflict(f"row {sheet_row} no longer exists")
+        if version and record_version(record, headers) != version:
+            raise RowConflict(f"row {record['sheet_row']} was changed by someone else since you loaded it")
+        return record
+
+    def locate_rows(self, refs):
+        out = []
+        for sheet_row, row_id, version in refs:
+            try:
+                out.append(self._resolve(sheet_row, row_id, version)["sheet_row"])
+            except RowConflict as e:
+                out.append(e)
+        return out
+
+    def append(self, values):
+        headers = self.headers()
+        values = SheetsStorage._with_id(values, headers)
+        sheet_row = self.mirror.queue_append(values)
+        nudge_mirror()
+        return _annotate([dict(zip(headers, values), sheet_row=sheet_row)], headers)[0]
+
+    def update(self, sheet_row, values, row_id="", version=""):
+        values = list(values)
+        headers = self.headers()
+        if row_id or version:
+            record = self._resolve(sheet_row, row_id, version)
+            sheet_row = record["sheet_row"]
+            if ROW_ID_HEADER in headers:
+                values[headers.index(ROW_ID_HEADER)] = record.get(ROW_ID_HEADER, "")
+        values = SheetsStorage._with_id(values, headers)
+        self.mirror.queue_update(sheet_row, values)
+        nudge_mirror()
+        return sheet_row
+
+    def delete(self, sheet_row, row_id="", version=""):
+        if row_id or version:
+            sheet_row = self._resolve(sheet_row, row_id, version)["sheet_row"]
+        self.mirror.queue_delete(sheet_row)
+        nudge_mirror()
+        return sheet_row
+
+    def status(self):
+        status = self.mirror.watermark()
+        if status["dead_letters"]:
+            status["dead_letter_items"] = self.mirror.dead_letters(limit=5)
+        return status
+
+    def update_cells(self, header, values):
+        headers = self.headers()
+        col = headers.index(header)
+        for sheet_row, value in sorted(values.items()):
+            record = self.mirror.record(sheet_row)
+            if record is not None:
+                row = [record.get(h, "") for h in headers]
+                row[col] = value
+                self.mirror.queue_update(sheet_row, row)
+        nudge_mirror()
+
+    def revision(self):
+        return self.mirror.revision()
+
+    def export_rows(self, chunk_rows):
+        headers = self.headers()
+        last = 1
+        while True:
+            rows = self.mirror.records_after(last, chunk_rows)
+            if rows:
+                yield [[r.get(h, "") for h in headers] for r in rows]
+                last = rows[-1]["sheet_row"]
+            if len(rows) < chunk_rows:
+                return
+
+
+# ---------------- SQLite ----------------
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    data   TEXT NOT NULL,
+    search TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _sort_expr(header):
+    # A literal JSON path so the per-column expression indexes can be used.
+    return "lower(json_extract(data, '$.\"%s\"'))" % header.replace("'", "''")
+
+
+class SQLiteStorage(Storage):
+    """
+    Local source of truth. Rows keep insertion order (id) and a row's
+    sheet_row is its position in that order, found with an OFFSET walk of the
+    rowid b-tree; deleting a row never rewrites the rows after it. The id is
+    also the row's stable row_id. Every column has an expression index for
+    sorting.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=STORAGE_SQLITE_PATH, headers=None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SQLITE_SCHEMA)
+        self._writes = 0
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'headers'").fetchone()
+        if row:
+            self._headers = json.loads(row[0])
+        else:
+            self._headers = list(headers or _default_headers())
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('headers', ?)",
+                             (json.dumps(self._headers),))
+        for i, h in enumerate(self._headers):
+            if '"' not in h:
+                self._db.execute(f"CREATE INDEX IF NOT EXISTS rows_sort_{i} ON rows ({_sort_expr(h)})")
+
+    def _encode(self, values):
+        values = ["" if v is None else str(v) for v in values][:len(self._headers)]
+        values += [""] * (len(self._headers) - len(values))
+        return json.dumps(dict(zip(self._headers, values))), search_text(self._headers, values)
+
+    @contextmanager
+    def _tx(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._writes += 1
+
+    def _ids_at(self, db, sheet_rows):
+        """{sheet_row: id}; raises IndexError if any row does not exist."""
+        out = {}
+        for r in set(sheet_rows):
+            row = db.execute("SELECT id FROM rows ORDER BY id LIMIT 1 OFFSET ?", (r - 2,)).fetchone() if r >= 2 else None
+            if row is None:
+                raise IndexError(f"No such row: {r}")
+            out[r] = row[0]
+        return out
+
+    def _target(self, db, sheet_row, row_id, version):
+        """id of the row the caller means (by row_id if given); raises RowConflict."""
+        if row_id:
+            row = db.execute("SELECT id, data FROM rows WHERE id = ?",
+                             (int(row_id) if str(row_id).isdigit() else -1,)).fetchone()
+            if row is None:
+                raise RowConflict("the row was deleted by someone else")
+        else:
+            row = db.execute("SELECT id, data FROM rows ORDER BY id LIMIT 1 OFFSET ?",
+                             (max(0, sheet_row - 2),)).fetchone() if sheet_row >= 2 else None
+            if row is None:
+                raise RowConflict(f"row {sheet_row} no longer exists")
+        if version and record_version(json.loads(row[1]), self._headers) != version:
+            raise RowConflict("the row was changed by someone else since you loaded it")
+        return row[0]
+
+    def _position(self, db, row_id):
+        return db.execute("SELECT COUNT(*) FROM rows WHERE id < ?", (row_id,)).fetchone()[0] + 2
+
+    def _positions(self, found):
+        """sheet_rows of the (id, ...) rows in `found`, in one pass over the rowid index."""
+        ids = [row[0] for row in found]
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        pos = dict(self._db.execute(
+            f"SELECT id, p FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY id) + 1 AS p FROM rows) "
+            f"WHERE id IN ({marks})", ids,
+        ))
+        return [pos[i] for i in ids]
+
+    # ---- reads ----
+    def headers(self):
+        return list(self._headers)
+
+    def count(self, q=""):
+        with self._lock:
+            if q:
+                return self._db.execute(
+                    "SELECT COUNT(*) FROM rows WHERE search LIKE ? ESCAPE '\\'", (like_pattern(q),)
+                ).fetchone()[0]
+            return self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def page(self, page, per_page, sort="", order="asc", q=""):
+        offset = (page - 1) * per_page
+        with self._lock:
+            if not (sort or q):
+                cur = self._db.execute("SELECT id, data FROM rows ORDER BY id LIMIT ? OFFSET ?", (per_page, offset))
+                rows = [dict(json.loads(d), sheet_row=offset + 2 + i, row_id=str(rid))
+                        for i, (rid, d) in enumerate(cur)]
+            else:
+                sql = "SELECT id, data FROM rows"
+                params = []
+                if q:
+                    sql += " WHERE search LIKE ? ESCAPE '\\'"
+                    params.append(like_pattern(q))
+                if sort in self._headers and '"' not in sort:
+                    sql += f" ORDER BY {_sort_expr(sort)} {'DESC' if order == 'desc' else 'ASC'}, id"
+                else:
+                    sql += " ORDER BY id"
+                found = self._db.execute(sql + " LIMIT ? OFFSET ?", params + [per_page, offset]).fetchall()
+                positions = self._positions(found)
+                rows = [dict(json.loads(d), sheet_row=pos, row_id=str(rid)) for pos, (rid, d) in zip(positions, found)]
+        return Page(_annotate(rows, self._headers), page, per_page, self.count(q), sort, order, q)
+
+    def get(self, sheet_row):
+        with self._lock:
+            if sheet_row < 2:
+                return None
+            row = self._db.execute(
+                "SELECT id, data FROM rows ORDER BY id LIMIT 1 OFFSET ?", (sheet_row - 2,)
+            ).fetchone()
+        if row is None:
+            return None
+        return _annotate([dict(json.loads(row[1]), sheet_row=sheet_row, row_id=str(row[0]))], self._headers)[0]
+
+    def snapshot(self):
+        with self._lock:
+            records = [json.loads(d) for (d,) in self._db.execute("SELECT data FROM rows ORDER BY id")]
+            return records, self.revision()
+
+    def revision(self):
+        # data_version moves on other processes' commits, _writes on ours.
+        with self._lock:
+            return self._writes, self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def export_rows(self, chunk_rows):
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute("SELECT id, data FROM rows WHERE id > ? ORDER BY id LIMIT ?",
+                                        (last, chunk_rows)).fetchall()
+            if rows:
+                yield [[record.get(h, "") for h in self._headers] for record in (json.loads(d) for _, d in rows)]
+                last = rows[-1][0]
+            if len(rows) < chunk_rows:
+                return
+
+    # ---- writes ----
+    def locate_rows(self, refs):
+        with self._lock:
+            out = []
+            for sheet_row, row_id, version in refs:
+                try:
+                    out.append((self._target(self._db, sheet_row, row_id, version),))
+                except RowConflict as e:
+                    out.append(e)
+            positions = iter(self._positions([t for t in out if not isinstance(t, RowConflict)]))
+            return [t if isinstance(t, RowConflict) else next(positions) for t in out]
+
+    def append(self, values):
+        data, search = self._encode(values)
+        with self._tx() as db:
+            row_id = db.execute("INSERT INTO rows (data, search) VALUES (?, ?)", (data, search)).lastrowid
+            sheet_row = self._position(db, row_id)
+        return _annotate([dict(json.loads(data), sheet_row=sheet_row, row_id=str(row_id))], self._headers)[0]
+
+    def append_many(self, rows):
+        encoded = [self._encode(v) for v in rows]
+        if encoded:
+            with self._tx() as db:
+                db.executemany("INSERT INTO rows (data, search) VALUES (?, ?)", encoded)
+
+    def update(self, sheet_row, values, row_id="", version=""):
+        if not (row_id or version):
+            self.update_many({sheet_row: values})
+            return sheet_row
+        with self._tx() as db:
+            target = self._target(db, sheet_row, row_id, version)
+            db.execute("UPDATE rows SET data = ?, search = ? WHERE id = ?", (*self._encode(values), target))
+            return self._position(db, target)
+
+    def update_many(self, updates):
+        if not updates:
+            return
+        with self._tx() as db:
+            ids = self._ids_at(db, updates)
+            db.executemany(
+                "UPDATE rows SET data = ?, search = ? WHERE id = ?",
+                [(*self._encode(v), ids[r]) for r, v in updates.items()],
+            )
+
+    def delete(self, sheet_row, row_id="", version=""):
+        if not (row_id or version):
+            self.delete_many([sheet_row])
+            return sheet_row
+        with self._tx() as db:
+            target = self._target(db, sheet_row, row_id, version)
+            position = self._position(db, target)
+            db.execute("DELETE FROM rows WHERE id = ?", (target,))
+            return position
+
+    def delete_many(self, sheet_rows):
+        if not sheet_rows:
+            return
+        with self._tx() as db:
+            ids = self._ids_at(db, sheet_rows)  # positions before any delete
+            db.executemany("DELETE FROM rows WHERE id = ?", [(i,) for i in ids.values()])
+
+
+# ---------------- In-memory ----------------
+class MemoryStorage(Storage):
+    """Rows get a sequential row_id; a RowLocator maps it to the current position."""
+
+    name = "memory"
+
+    def __init__(self, headers=None, rows=()):
+        self._headers = list(headers or _default_headers())
+        self._lock = threading.Lock()
+        self._records = [self._record(v) for v in rows]
+        self._ids = [str(i) for i in range(1, len(self._records) + 1)]
+        self._next_id = len(self._records) + 1
+        self._locator = RowLocator(self._ids)
+        self._revision = 0
+
+    def _record(self, values):
+        values = list(values) + [""] * (len(self._headers) - len(values))
+        return dict(zip(self._headers, ("" if v is None else str(v) for v in values)))
+
+    def _index(self, sheet_row):
+        idx = sheet_row - 2
+        if not 0 <= idx < len(self._records):
+            raise IndexError(f"No such row: {sheet_row}")
+        return idx
+
+    def _target(self, sheet_row, row_id, version):
+        """List index of the row the caller means; raises RowConflict."""
+        if row_id:
+            found = self._locator.sheet_row(row_id)
+            if found is None:
+                raise RowConflict("the row was deleted by someone else")
+            idx = found - 2
+        else:
+            idx = sheet_row - 2
+            if not 0 <= idx < len(self._records):
+                raise RowConflict(f"row {sheet_row} no longer exists")
+        if version and record_version(self._records[idx], self._headers) != version:
+            raise RowConflict("the row was changed by someone else since you loaded it")
+        return idx
+
+    def headers(self):
+        return list(self._headers)
+
+    def page(self, page, per_page, sort="", order="asc", q=""):
+        with self._lock:
+            records = list(self._records)
+            ids = list(self._ids)
+        result = page_from_records(records, self._headers, page, per_page, sort, order, q)
+        for r in result.rows:
+            r["row_id"] = ids[r["sheet_row"] - 2]
+        _annotate(result.rows, self._headers)
+        return result
+
+    def get(self, sheet_row):
+        with self._lock:
+            idx = sheet_row - 2
+            if not 0 <= idx < len(self._records):
+                return None
+            row = dict(self._records[idx], sheet_row=sheet_row, row_id=self._ids[idx])
+        return _annotate([row], self._headers)[0]
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._records), self._revision
+
+    def revision(self):
+        return self._revision
+
+    def export_rows(self, chunk_rows):
+        start = 0
+        while True:
+            with self._lock:
+                chunk = self._records[start:start + chunk_rows]
+            if chunk:
+                yield [[r.get(h, "") for h in self._headers] for r in chunk]
+            if len(chunk) < chunk_rows:
+                return
+            start += chunk_rows
+
+    def locate_rows(self, refs):
+        with self._lock:
+            return _locate_in(self._records, self._ids, refs, self._headers)
+
+    def append(self, values):
+        with self._lock:
+            row_id = str(self._next_id)
+            self._next_id += 1
+            record = self._record(values)
+            self._records.append(record)
+            self._ids.append(row_id)
+            self._locator.append(row_id)
+            self._revision += 1
+            sheet_row = len(self._records) + 1
+        return _annotate([dict(record, sheet_row=sheet_row, row_id=row_id)], self._headers)[0]
+
+    def update(self, sheet_row, values, row_id="", version=""):
+        with self._lock:
+            idx = self._target(sheet_row, row_id, version) if (row_id or version) else self._index(sheet_row)
+            self._records[idx] = self._record(values)
+            self._revision += 1
+            return idx + 2
+
+    def delete(self, sheet_row, row_id="", version=""):
+        with self._lock:
+            idx = self._target(sheet_row, row_id, version) if (row_id or version) else self._index(sheet_row)
+            del self._records[idx]
+            del self._ids[idx]
+            self._locator.delete(idx + 2)
+            self._revision += 1
+            return idx + 2
+
+
+# ---------------- Engine selection ----------------
+ENGINES = {"sheets", "sqlite", "memory"}
+
+_sheets = SheetsStorage()
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+    """
+    The storage engine for this request. For Sheets that is the mirror when it
+    is enabled and populated, else the live sheet; the local engines are built
+    once per process.
+    """
+    global _engine, _engine_pid
+    if STORAGE_BACKEND == "sheets":
+        mirror = get_mirror()
+        if mirror is not None and mirror.headers():
+            return MirrorStorage(mirror)
+        return _sheets
+    if STORAGE_BACKEND not in ENGINES:
+        raise ValueError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; expected one of {sorted(ENGINES)}")
+
+    pid = os.getpid()
+    if _engine is None or _engine_pid != pid:
+        with _engine_lock:
+            if _engine is None or _engine_pid != pid:
+                _engine = SQLiteStorage() if STORAGE_BACKEND == "sqlite" else MemoryStorage()
+                _engine_pid = pid
+    return _engine
@@ -0,0 +1,202 @@
+# backend/admin/throttle.py
+"""
+Login throttling and offloaded password verification.
+
+An scrypt check_password_hash costs ~150 ms of CPU and 32 MiB of memory, and
+used to run on the request thread for every POST /admin/login. Now:
+
+  * sliding-window limits per client IP and per username (LOGIN_MAX_PER_IP,
+    LOGIN_MAX_PER_USER attempts per LOGIN_WINDOW seconds) turn an attempt
+    away before anything is hashed; a successful login clears both windows;
+  * hashing runs on a small executor (LOGIN_HASH_WORKERS threads) and at
+    most LOGIN_HASH_QUEUE further attempts may wait for it, so a burst
+    occupies a bounded number of request threads and cores, and the rest are
+    rejected as busy straight away.
+
+Set LOGIN_TRUSTED_PROXIES to the number of proxies in front of the app
+(1 on Cloud Run) so the client IP is taken from X-Forwarded-For.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from backend.metrics import LOGIN_HASH_SECONDS
+
+LOGIN_WINDOW = float(os.getenv("LOGIN_WINDOW", "300"))
+LOGIN_MAX_PER_IP = int(os.getenv("LOGIN_MAX_PER_IP", "10"))
+LOGIN_MAX_PER_USER = int(os.getenv("LOGIN_MAX_PER_USER", "20"))
+LOGIN_HASH_WORKERS = int(os.getenv("LOGIN_HASH_WORKERS", "1"))
+LOGIN_HASH_QUEUE = int(os.getenv("LOGIN_HASH_QUEUE", "2"))
+LOGIN_HASH_TIMEOUT = float(os.getenv("LOGIN_HASH_TIMEOUT", "10"))
+LOGIN_TRUSTED_PROXIES = int(os.getenv("LOGIN_TRUSTED_PROXIES", "0"))
+LOGIN_MAX_KEYS = 10_000  # tracked IPs/usernames; the least recently seen are dropped
+
+
+class LoginRejected(Exception):
+    """An attempt was refused without checking the password."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason  # "ip", "user" or "busy"
+        self.retry_after = retry_after
+
+
+def client_ip(request) -> str:
+    """The caller's IP, trusting LOGIN_TRUSTED_PROXIES hops of X-Forwarded-For."""
+    route = request.access_route
+    if LOGIN_TRUSTED_PROXIES and request.headers.get("X-Forwarded-For") and len(route) >= LOGIN_TRUSTED_PROXIES:
+        return route[-LOGIN_TRUSTED_PROXIES]
+    return request.remote_addr or "-"
+
+
+class SlidingWindow:
+    """At most `limit` events per key in any `window` seconds (a timestamp log per key)."""
+
+    def __init__(self, limit, window, max_keys=LOGIN_MAX_KEYS):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._events = OrderedDict()  # key -> deque of monotonic timestamps
+
+    def retry_after(self, key, now) -> float:
+        """0 if another event is allowed now, else seconds until one is."""
+        events = self._events.get(key)
+        if not events:
+            return 0.0
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        return 0.0 if len(events) < self.limit else events[0] + self.window - now
+
+    def record(self, key, now):
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque()
+        events.append(now)
+        self._events.move_to_end(key)
+        while len(self._events) > self.max_keys:
+            self._events.popitem(last=False)
+
+    def clear(self, key):
+        self._events.pop(key, None)
+
+    def __len__(self):
+        return len(self._events)
+
+
+class LoginGuard:
+    def __init__(self, per_ip=LOGIN_MAX_PER_IP, per_user=LOGIN_MAX_PER_USER, window=LOGIN_WINDOW,
+                 workers=LOGIN_HASH_WORKERS, queue=LOGIN_HASH_QUEUE, timeout=LOGIN_HASH_TIMEOUT):
+        self.by_ip = SlidingWindow(per_ip, window)
+        self.by_user = SlidingWindow(per_user, window)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="login-hash")
+        self._slots = threading.BoundedSemaphore(max(1, workers) + max(0, queue))
+        self.attempts = 0
+        self.rejected = {"ip": 0, "user": 0, "busy": 0}
+        self.successes = 0
+        self.failures = 0
+        self.hashes = 0
+        self.hash_seconds = 0.0
+
+    def _timed_check(self, check):
+        t0 = time.perf_counter()
+        try:
+            return check()
+        finally:
+            elapsed = time.perf_counter() - t0
+            LOGIN_HASH_SECONDS.observe(elapsed)
+            with self._lock:
+                self.hashes += 1
+                self.hash_seconds += elapsed
+
+    def _reject(self, reason, retry_after):
+        with self._lock:
+            self.rejected[reason] += 1
+        raise LoginRejected(reason, retry_after)
+
+    def verify(self, ip, username, check) -> bool:
+        """
+        Run check() (the password comparison) for a login attempt, unless the
+        IP or username is over its limit or the hash executor is saturated, in
+        which case LoginRejected is raised and nothing is hashed. check=None
+        is an attempt already known to fail (unknown username).
+        """
+        user = (username or "").strip().lower()
+        hashing = check is not None
+        # Take an executor slot first: an attempt turned away as busy is not
+        # held against the IP or username.
+        if hashing and not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.attempts += 1
+            self._reject("busy", 1.0)
+        now = time.monotonic()
+        with self._lock:
+            self.attempts += 1
+            wait_ip = self.by_ip.retry_after(ip, now)
+            wait_user = self.by_user.retry_after(user, now)
+            if not (wait_ip or wait_user):
+                self.by_ip.record(ip, now)
+                self.by_user.record(user, now)
+        if wait_ip or wait_user:
+            if hashing:
+                self._slots.release()
+            self._reject("ip" if wait_ip else "user", wait_ip or wait_user)
+        if not hashing:
+            with self._lock:
+                self.failures += 1
+            return False
+
+        try:
+            future = self._executor.submit(self._timed_check, check)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            ok = bool(future.result(timeout=self.timeout))
+        except FutureTimeout:
+            self._reject("busy", self.timeout)
+
+        with self._lock:
+            if ok:
+                self.successes += 1
+                self.by_ip.clear(ip)
+                self.by_user.clear(user)
+            else:
+                self.failures += 1
+        return ok
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "rejected_ip": self.rejected["ip"],
+                "rejected_user": self.rejected["user"],
+                "rejected_busy": self.rejected["busy"],
+                "successes": self.successes,
+                "failures": self.failures,
+                "hashes": self.hashes,
+                "hash_seconds_total": round(self.hash_seconds, 3),
+                "tracked_ips": len(self.by_ip),
+            }
+
+
+_guard = None
+_guard_pid = None
+_guard_lock = threading.Lock()
+
+
+def get_login_guard() -> LoginGuard:
+    """This process's guard (its executor threads do not survive a fork)."""
+    global _guard, _guard_pid
+    pid = os.getpid()
+    if _guard is None or _guard_pid != pid:
+        with _guard_lock:
+            if _guard is None or _guard_pid != pid:
+                _guard = LoginGuard()
+                _guard_pid = pid
+    return _guard
@@ -2,17 +2,31 @@ import os
 import sys
 import atexit
 import shutil
-import smtplib
-import ssl
 import subprocess
-import json
-from email.mime.text import MIMEText
+import threading
 from pathlib import Path
-from backend.admin import admin_bp
 
-# env (python-dotenv)
+# env (python-dotenv): read once, before any backend module reads its settings.
+# backend/.env wins over a top-level .env; neither overrides the real environment.
 from dotenv import load_dotenv
-load_dotenv()
+
+for _env_file in (Path(__file__).resolve().parent / ".env", Path(__file__).resolve().parent.parent / ".env"):
+    if _env_file.exists():
+        load_dotenv(_env_file)
+
+# Nothing imported here may pull in gspread/google-auth: the admin blueprint
+# imports its storage layer on first use, so anonymous pages start cold fast.
+from backend.admin import admin_bp
+from backend.catalog import get_catalog
+from backend.export import EXPORT_HIDDEN_COLUMNS, exporter
+from backend.images import responsive_img
+from backend.assets import init_assets, serve_static
+from backend.pagecache import PAGE_CACHE_PRERENDER, page_cache
+from backend.templating import init_templates, template_stats
+from backend.metrics import SMTP_SECONDS, init_metrics, registry, timed
+from backend.admin.cache import record_cache
+from backend.admin.events import get_feed
+from backend.admin.throttle import get_login_guard
 
 from flask import (
     Flask,
@@ -21,7 +35,6 @@ from flask import (
     redirect,
     url_for,
     flash,
-    send_from_directory,
     session,  # <-- sessions for admin login
 )
 
@@ -38,25 +51,52 @@ app = Flask(
     static_url_path="/",  # lets /images/* work
 )
 
+# <picture>/srcset helper for images built by backend/tools/build_images.py
+app.jinja_env.globals["responsive_img"] = responsive_img
+
+# Template bytecode from backend/tools/build_templates.py; auto-reload off outside debug
+init_templates(app)
+
+# Fingerprinted, precompressed static files (manifest from backend/tools/build_assets.py)
+init_assets(app)
+
+# Rendered-once pages with ETag/304 for the content routes (backend/pagecache.py)
+page_cache.init_app(app)
+
+# Request/render/Sheets/SMTP latency histograms at /metrics (backend/metrics.py)
+init_metrics(app)
+registry.register_stats("page_cache", page_cache.stats)
+registry.register_stats("record_cache", record_cache.stats)
+registry.register_stats("admin_login", lambda: get_login_guard().stats())
+registry.register_stats("export", exporter.stats)
+registry.register_stats("admin_events", lambda: get_feed().stats())
+registry.register_stats("templates", lambda: template_stats(app))
+
+
+def _loaded_stats(module, getter):
+    """stats() of an admin singleton, or {} while nothing has imported its module yet."""
+    mod = sys.modules.get(module)
+    return getattr(mod, getter)().stats() if mod else {}
+
+
+registry.register_stats("sheets_client", lambda: _loaded_stats("backend.admin.sheets", "get_client_manager"))
+registry.register_stats("sheets_scheduler", lambda: _loaded_stats("backend.admin.ratelimit", "get_scheduler"))
+
 # secret for sessions/flash
 app.config["SECRET_KEY"] = os.getenv("FLASK_SECRET", "dev-change-me")
 
-# Also allow a top-level .env if you keep it there
-env_top = BASE_DIR.parent / ".env"
-if env_top.exists():
-    load_dotenv(env_top)
-
 # Also support "/static/..." paths (because some templates use that form)
 @app.route("/static/<path:filename>")
 def static_alias(filename):
-    return send_from_directory(app.static_folder, filename)
+    return serve_static(filename)
 
 # ---- Optional: Start Node/Express server.js as a child process (disabled by default) ----
 _node_proc = None
+_node_owner_pid = None  # with preload_app the master starts Node; forked workers must not stop it
 
 def _start_node_if_requested():
     """Starts server.js with Node if START_NODE=1 and server.js is found."""
-    global _node_proc
+    global _node_proc, _node_owner_pid
     if os.getenv("START_NODE", "0") != "1":
         return
 
@@ -82,20 +122,19 @@ def _start_node_if_requested():
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
         )
+        _node_owner_pid = os.getpid()
         print(f"[INFO] Started Node server: {server_js} (pid={_node_proc.pid}) on PORT={env['PORT']}")
     except Exception as e:
         print(f"[WARN] Failed to start Node server.js: {e}")
 
 def _stop_node_if_running():
-    global _node_proc
-    if _node_proc and _node_proc.poll() is None:
+    if _node_proc and _node_owner_pid == os.getpid() and _node_proc.poll() is None:
         try:
             _node_proc.terminate()
         except Exception:
             pass
 
 atexit.register(_stop_node_if_running)
-_start_node_if_requested()
 
 # ---- Helpers ----
 def _home_template_fallback():
@@ -105,38 +144,78 @@ def _home_template_fallback():
             return name
     return None
 
+# Contact messages go through the durable outbox (backend/outbox.py) unless
+# CONTACT_OUTBOX=0, in which case they are sent inline as before.
+CONTACT_OUTBOX = os.getenv("CONTACT_OUTBOX", "1") == "1"
+
 def _send_email_via_gmail(sender_name: str, sender_email: str, body: str):
-    gmail_user = os.getenv("GMAIL_USER")
-    gmail_pass = os.getenv("GMAIL_PASS")
-    if not gmail_user or not gmail_pass:
-        raise RuntimeError("GMAIL_USER or GMAIL_PASS is not set in environment/.env")
-
-    msg = MIMEText(f"You have received a new message from {sender_name} ({sender_email}):\n\n{body}")
-    msg["Subject"] = f"Message from {sender_name}"
-    msg["From"] = gmail_user
-    msg["To"] = gmail_user
-
-    context = ssl.create_default_context()
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls(context=context)
-        server.login(gmail_user, gmail_pass)
-        server.send_message(msg)
+    from backend.outbox import build_message, open_smtp, smtp_credentials
+
+    gmail_user, gmail_pass = smtp_credentials()
+    server = open_smtp(gmail_user, gmail_pass)
+    try:
+        with timed(SMTP_SECONDS, "smtp"):
+            server.send_message(build_message(sender_name, sender_email, body, gmail_user))
+    finally:
+        server.quit()
 
 # ---- Public routes ----
 
 @app.route("/")
+@page_cache.cached
 def home():
     chosen = _home_template_fallback()
     if chosen:
         return render_template(chosen)
     return "<h1>Home</h1><p>Create templates/index.html or impacts.html for a proper homepage.</p>"
 
+# query-string name -> catalog facet field
+COLLECTION_FACETS = {
+    "theme": "Resource Theme",
+    "type": "Resource Type",
+    "audience": "Target Audience",
+    "language": "Language",
+    "publisher": "Publisher",
+}
+COLLECTION_PER_PAGE = 20
+
 @app.route("/collections")
 def collections():
     sheet_url = os.getenv("SHEET_URL", "#")
-    return render_template("collections.html", sheet_url=sheet_url)
+    q = (request.args.get("q") or "").strip()
+    page = max(1, request.args.get("page", 1, type=int) or 1)
+    selected = {param: (request.args.get(param) or "").strip() for param in COLLECTION_FACETS}
+
+    catalog = get_catalog()
+    result = None
+    if len(catalog):
+        result = catalog.search(
+            q=q,
+            filters={COLLECTION_FACETS[p]: v for p, v in selected.items() if v},
+            offset=(page - 1) * COLLECTION_PER_PAGE,
+            limit=COLLECTION_PER_PAGE,
+        )
+
+    return render_template(
+        "collections.html",
+        sheet_url=sheet_url,
+        q=q,
+        page=page,
+        per_page=COLLECTION_PER_PAGE,
+        selected=selected,
+        facet_params=COLLECTION_FACETS,
+        result=result,
+    )
+
+@app.route("/collections/export.<fmt>")
+def collections_export(fmt):
+    """Every catalog row as a streamed csv/ndjson/xlsx download (backend/export.py)."""
+    from backend.admin.storage import get_storage  # gspread loads on first use, not at startup
+
+    return exporter.response(get_storage(), fmt, "collections", hidden=EXPORT_HIDDEN_COLUMNS)
 
 @app.route("/about")
+@page_cache.cached
 def about():
     return render_template("about.html")
 
@@ -154,7 +233,13 @@ def contact():
         return redirect(url_for("contact"))
 
     try:
-        _send_email_via_gmail(name, email, message)
+        if CONTACT_OUTBOX:
+            from backend.outbox import get_outbox, smtp_credentials  # mail code loads on first use
+
+            smtp_credentials()  # fail fast if mail isn't configured at all
+            get_outbox().submit(name, email, message)
+        else:
+            _send_email_via_gmail(name, email, message)
         flash("Your message was sent successfully!", "success")
         return redirect(url_for("thank_you"))
     except Exception as e:
@@ -162,22 +247,27 @@ def contact():
         return (f"<h1>Something went wrong. Please try again later.</h1><p>{str(e)}</p>", 500)
 
 @app.route("/thank-you")
+@page_cache.cached
 def thank_you():
     return render_template("thank-you.html")
 
 @app.route("/impacts")
+@page_cache.cached
 def impacts():
     return render_template("impacts.html")
 
 @app.route("/sustainability")
+@page_cache.cached
 def sustainability():
     return render_template("sustainability.html")
 
 @app.route("/community")
+@page_cache.cached
 def community():
     return render_template("community.html")
 
 @app.route("/other")
+@page_cache.cached
 def other():
     return render_template("other.html")
 
@@ -186,9 +276,35 @@ def other():
 #from admin import admin_bp
 app.register_blueprint(admin_bp, url_prefix="/admin")
 
+# ---- Optional subsystems, started explicitly (never as an import side effect) ----
+_services_started = False
+_services_lock = threading.Lock()
+
+
+def start_optional_services(flask_app=None):
+    """Start Node (START_NODE=1) and pre-render cached pages (PAGE_CACHE_PRERENDER=1), once."""
+    global _services_started
+    with _services_lock:
+        if _services_started:
+            return
+        _services_started = True
+    _start_node_if_requested()
+    if PAGE_CACHE_PRERENDER:
+        page_cache.warm(flask_app or app)
+
+
+def create_app():
+    """
+    App factory for servers, e.g. gunicorn "backend.app:create_app()".
+    Importing this module only builds the app; this also starts the optional
+    subsystems.
+    """
+    start_optional_services(app)
+    return app
+
 # ---- Entry point ----
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", "8080"))  # Cloud Run sets PORT
     debug = os.environ.get("FLASK_DEBUG", "0") == "1"
     print(f"[INFO] Flask running on http://0.0.0.0:{port} (debug={debug})")
-    app.run(host="0.0.0.0", port=port, debug=debug)
+    create_app().run(host="0.0.0.0", port=port, debug=debug)
@@ -0,0 +1,265 @@
+# backend/asgi.py
+"""
+ASGI entry point: the Flask app under gunicorn's asyncio worker.
+
+Opt-in: with GUNICORN_WORKER_CLASS=asgi (gunicorn >= 26) gunicorn.conf.py
+serves `backend.asgi:create_app()` with worker_class "asgi" instead of the
+default gthread workers. WSGIBridge hands each request to Flask on a pool of
+ASGI_THREADS threads - the concurrency the gthread worker had - and streams
+the response back chunk by chunk, so exports still stream and templates
+render exactly as before.
+
+What the thread pool cannot do cheaply is hold a response open for minutes.
+A view that wants to do that puts an async iterator of bytes in
+environ["backend.async_body"] and returns its status and headers as usual;
+the bridge then gives the thread back and drives the iterator on the event
+loop until it ends or the client disconnects. The admin change feed
+(/admin/events, admin/events.py) works this way, so an open dashboard costs
+a socket and an asyncio.Event rather than a thread.
+
+attach(worker) (from gunicorn's post_worker_init) lets the bridge see the
+worker begin a graceful shutdown and end its streams then, instead of
+holding the restart for graceful_timeout.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", os.getenv("GUNICORN_THREADS", "8")))
+ASGI_SEND_AHEAD = int(os.getenv("ASGI_SEND_AHEAD", "8"))  # response chunks a pool thread may queue unsent
+ASGI_BODY_SPOOL = int(os.getenv("ASGI_BODY_SPOOL", str(1 << 20)))  # request bodies above this go to a temp file
+
+ASYNC_BODY_KEY = "backend.async_body"
+
+
+def _environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1] or ""),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": str(client[0]),
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,  # the body was read in full, chunked or not
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "backend.asgi": True,
+    }
+    for name, value in scope.get("headers", ()):
+        name, value = name.decode("latin-1").upper().replace("-", "_"), value.decode("latin-1")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else "HTTP_" + name
+        if key in environ:
+            value = environ[key] + ("; " if key == "HTTP_COOKIE" else ",") + value
+        environ[key] = value
+    return environ
+
+
+def _start_message(status, headers, drop=()):
+    return {
+        "type": "http.response.start",
+        "status": int(status.split(" ", 1)[0]),
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers if k.lower() not in drop],
+    }
+
+
+class WSGIBridge:
+    """ASGI app running a WSGI app on a thread pool, plus loop-driven async bodies."""
+
+    def __init__(self, wsgi_app, threads=ASGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._streams = set()
+        self._worker = None
+
+    def attach(self, worker):
+        self._worker = worker
+
+    def executor(self) -> ThreadPoolExecutor:
+        """This process's pool (built after the fork: the app may be preloaded in gunicorn's master)."""
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix="wsgi")
+                    self._executor_pid = pid
+        return self._executor
+
+    def stats(self) -> dict:
+        return {"threads": self.threads, "streams": len(self._streams)}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+
+    # ---- lifespan ----
+    async def _lifespan(self, receive, send):
+        watcher = None
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                watcher = asyncio.get_running_loop().create_task(self._watch_worker())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if watcher is not None:
+                    watcher.cancel()
+                self._end_streams()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _watch_worker(self):
+        while self._worker is None or self._worker.alive:
+            await asyncio.sleep(1.0)
+        self._end_streams()
+
+    def _end_streams(self):
+        for task in list(self._streams):
+            task.cancel()
+
+    # ---- http ----
+    @staticmethod
+    async def _read_body(receive):
+        body = tempfile.SpooledTemporaryFile(max_size=ASGI_BODY_SPOOL)
+        more = True
+        while more:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            body.write(message.get("body", b""))
+            more = message.get("more_body", False)
+        body.seek(0)
+        return body
+
+    async def _http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        body = await self._read_body(receive)
+        environ = _environ(scope, body)
+        # The pool thread hands messages to this task through a queue; the
+        # semaphore bounds what it may run ahead, so a slow client holds up
+        # the thread rather than filling memory.
+        outbox = asyncio.Queue()
+        room = threading.Semaphore(ASGI_SEND_AHEAD)
+        state = {"sent": False}
+
+        def hand_over(message):
+            room.acquire()
+            loop.call_soon_threadsafe(outbox.put_nowait, message)
+
+        def push(chunk, more=True):
+            if not state["sent"]:
+                state["sent"] = True
+                hand_over(_start_message(*state["start"]))
+            hand_over({"type": "http.response.body", "body": chunk, "more_body": more})
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and state["sent"]:
+                raise exc_info[1].with_traceback(exc_info[2])
+            state["start"] = (status, headers)
+            return push
+
+        def run():
+            # In a pool thread: the whole WSGI call, streaming the body as it is produced.
+            try:
+                iterable = self.wsgi_app(environ, start_response)
+                try:
+                    if ASYNC_BODY_KEY in environ:
+                        return
+                    held = b""
+                    for chunk in iterable:
+                        if chunk:
+                            if held:
+                                push(held)
+                            held = chunk
+                    push(held, more=False)
+                finally:
+                    if hasattr(iterable, "close"):
+                        iterable.close()
+            finally:
+                hand_over(None)
+
+        running = loop.run_in_executor(self.executor(), run)
+        # The end of the response (its last chunk, or a bodiless start) goes
+        # out only once the WSGI call is over: a keep-alive client may send
+        # its next request as soon as the body is complete, and gunicorn
+        # drops one that arrives before the app has returned.
+        held, sent = [], False
+        try:
+            while (message := await outbox.get()) is not None:
+                room.release()
+                if message.get("more_body", True):
+                    for m in held:
+                        await send(m)
+                        sent = True
+                    held = [message]
+                else:
+                    held.append(message)
+            await running
+            for m in held:
+                await send(m)
+                sent = True
+        except Exception as e:
+            if sent:
+                raise
+            print(f"[ERROR] {scope['method']} {scope['path']} failed: {e}")
+            await send(_start_message("500 Internal Server Error", [("Content-Type", "text/plain")]))
+            await send({"type": "http.response.body", "body": b"Internal Server Error\n"})
+            return
+        finally:
+            room.release(ASGI_SEND_AHEAD)  # a thread still producing (the client left) must not block
+            body.close()
+
+        stream = environ.get(ASYNC_BODY_KEY)
+        if stream is not None:
+            await send(_start_message(*state["start"], drop=("content-length",)))
+            await self._drive(stream, receive, send)
+
+    async def _drive(self, stream, receive, send):
+        """Send `stream`'s chunks until it ends, the client disconnects or the worker shuts down."""
+
+        async def pump():
+            async for chunk in stream:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        async def disconnected():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        pumping = asyncio.ensure_future(pump())
+        watching = asyncio.ensure_future(disconnected())
+        self._streams.add(pumping)
+        try:
+            await asyncio.wait({pumping, watching}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self._streams.discard(pumping)
+            for task in (pumping, watching):
+                task.cancel()
+            await asyncio.gather(pumping, watching, return_exceptions=True)
+            await stream.aclose()
+        try:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except Exception:
+            pass  # the client is already gone
+
+
+def create_app():
+    """ASGI factory for gunicorn, e.g. `gunicorn -k asgi "backend.asgi:create_app()"`."""
+    from backend.app import create_app as create_flask_app
+
+    return WSGIBridge(create_flask_app())
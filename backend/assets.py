@@ -0,0 +1,111 @@
+# backend/assets.py
+"""
+Fingerprinted, precompressed static files.
+
+backend/tools/build_assets.py writes a manifest mapping each static file to a
+content-hashed name (css/styles.css -> css/styles.<hash>.css) plus .br/.gz
+siblings. init_assets(app) then:
+
+  * rewrites url_for('static', filename=...) to the hashed name, so templates
+    keep using url_for unchanged (asset_url() is the same thing for Jinja);
+  * serves hashed URLs with `Cache-Control: public, max-age=1y, immutable`;
+  * serves everything else with `no-cache` and a content ETag (304 on match);
+  * picks the brotli/gzip sibling according to Accept-Encoding.
+
+Without a manifest (local dev) files are served as before, with ETags.
+"""
+import json
+import re
+import threading
+from pathlib import Path
+
+from flask import current_app, request, send_from_directory, url_for
+
+BACKEND_DIR = Path(__file__).resolve().parent
+MANIFEST = BACKEND_DIR / "assets-manifest.json"
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$")
+
+_SUFFIX = {"br": ".br", "gzip": ".gz"}
+_state = {"mtime": None, "files": {}, "reverse": {}}
+_lock = threading.Lock()
+
+
+def _manifest():
+    try:
+        mtime = MANIFEST.stat().st_mtime
+    except OSError:
+        return _state
+    if mtime != _state["mtime"]:
+        with _lock:
+            if mtime != _state["mtime"]:
+                files = json.loads(MANIFEST.read_text(encoding="utf-8"))["files"]
+                _state["files"] = files
+                _state["reverse"] = {e["hashed"]: rel for rel, e in files.items()}
+                _state["mtime"] = mtime
+    return _state
+
+
+def asset_url(filename, **kwargs):
+    """url_for('static', filename=...) with the fingerprinted name."""
+    return url_for("static", filename=filename, **kwargs)
+
+
+def _fingerprint_url_defaults(endpoint, values):
+    if endpoint == "static" and "filename" in values:
+        entry = _manifest()["files"].get(values["filename"])
+        if entry:
+            values["filename"] = entry["hashed"]
+
+
+def _pick_encoding(entry):
+    if not entry or not entry.get("encodings"):
+        return None
+    accepted = request.accept_encodings
+    for enc in ("br", "gzip"):
+        if enc in entry["encodings"] and accepted[enc]:
+            return enc
+    return None
+
+
+def serve_static(filename):
+    """Static view: hashed names are immutable, the rest revalidate by ETag."""
+    state = _manifest()
+    original = state["reverse"].get(filename)
+    immutable = original is not None or bool(HASHED_NAME_RE.search(filename))
+    original = original or filename
+    entry = state["files"].get(original)
+
+    encoding = _pick_encoding(entry)
+    etag = True
+    if entry:
+        etag = f"{entry['etag']}-{encoding}" if encoding else entry["etag"]
+
+    response = send_from_directory(
+        current_app.static_folder,
+        original + _SUFFIX[encoding] if encoding else original,
+        download_name=Path(original).name,  # mimetype comes from the real name, not .gz/.br
+        etag=etag,
+        conditional=True,
+        max_age=IMMUTABLE_MAX_AGE if immutable else 0,
+    )
+    response.headers.pop("Content-Disposition", None)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if entry and entry.get("encodings"):
+        response.vary.add("Accept-Encoding")
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+        response.cache_control.max_age = None
+    return response
+
+
+def init_assets(app):
+    """Install the fingerprinting url_defaults and the caching static view."""
+    app.url_defaults(_fingerprint_url_defaults)
+    app.view_functions["static"] = serve_static
+    app.jinja_env.globals["asset_url"] = asset_url
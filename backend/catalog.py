@@ -0,0 +1,303 @@
+# backend/catalog.py
+"""
+Searchable catalog of curated materials for the public /collections page.
+
+Rows from the sheet are tokenized into an inverted index (token -> row ids)
+plus per-facet posting sets (field -> value -> row ids). Queries intersect
+those sets (or bitmaps built from them for large result sets) in memory, so a
+search never touches Google Sheets. The index is synced incrementally: rows
+are keyed by content hash, so only added/changed rows are tokenized when the
+sheet changes.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+
+SEARCH_FIELDS = (
+    "Title", "Keywords", "Resource Theme", "Resource Type",
+    "Target Audience", "Language", "Publisher",
+)
+FACET_FIELDS = ("Resource Theme", "Resource Type", "Target Audience", "Language", "Publisher")
+
+# How often the index is re-synced from the record cache (seconds).
+CATALOG_REFRESH = float(os.getenv("CATALOG_REFRESH_SECONDS", "60"))
+# After a failed refresh (e.g. a Sheets outage) the next try waits this long,
+# doubling per consecutive failure up to CATALOG_RETRY_MAX; the last index
+# keeps being served meanwhile.
+CATALOG_RETRY_MIN = float(os.getenv("CATALOG_RETRY_MIN", "5"))
+CATALOG_RETRY_MAX = float(os.getenv("CATALOG_RETRY_MAX", "300"))
+
+# Below this many candidate rows a query is answered with plain set
+# intersections; above it, with cached bitmaps (Python ints) and bit_count().
+SMALL_RESULT = 256
+# Facet values reported per field for large result sets (by overall frequency).
+FACET_LIMIT = 25
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_FACET_SPLIT_RE = re.compile(r"[;,]")
+
+
+def tokenize(text) -> list:
+    return _TOKEN_RE.findall(str(text or "").lower())
+
+
+def facet_values(value) -> list:
+    """'School students, Public' -> ['School students', 'Public']"""
+    out = []
+    for part in _FACET_SPLIT_RE.split(str(value or "")):
+        part = part.strip()
+        if part and part not in out:
+            out.append(part)
+    return out
+
+
+def _row_hash(record) -> str:
+    h = hashlib.blake2b(digest_size=12)
+    for key in sorted(record):
+        h.update(str(key).encode())
+        h.update(b"\x1f")
+        h.update(str(record[key]).encode())
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+def _to_bitmap(positions, size) -> int:
+    buf = bytearray((size >> 3) + 1)
+    for p in positions:
+        buf[p >> 3] |= 1 << (p & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _iter_bits(bitmap, skip=0):
+    """Yield set bit positions in ascending order, skipping the first `skip`."""
+    while bitmap:
+        low = bitmap & -bitmap
+        if skip:
+            skip -= 1
+        else:
+            yield low.bit_length() - 1
+        bitmap ^= low
+
+
+class CatalogIndex:
+    """
+    Row ids are sheet positions (0 = first data row), so "sheet order" is just
+    ascending id order and bitmaps line up with the sheet.
+    """
+
+    def __init__(self, search_fields=SEARCH_FIELDS, facet_fields=FACET_FIELDS):
+        self.search_fields = tuple(search_fields)
+        self.facet_fields = tuple(facet_fields)
+        self._lock = threading.RLock()
+        self._keys = []         # position -> (row hash, occurrence)
+        self._docs = []         # position -> record
+        self._doc_facets = []   # position -> {field: [values]}
+        self._postings = {}     # token -> set(positions)
+        self._facets = {f: {} for f in self.facet_fields}  # field -> value -> set(positions)
+        self._bitmaps = {}      # lazily built from the sets above, dropped on change
+        self._top_facets = {}   # field -> [(value, count)] over the whole catalog
+        self.synced_at = 0.0
+        self.source_revision = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    # ---- building ----
+    def _add(self, pos, record):
+        for field in self.search_fields:
+            for tok in tokenize(record.get(field, "")):
+                self._postings.setdefault(tok, set()).add(pos)
+        doc_facets = {}
+        for field in self.facet_fields:
+            values = facet_values(record.get(field, ""))
+            doc_facets[field] = values
+            for val in values:
+                self._facets[field].setdefault(val, set()).add(pos)
+        self._doc_facets[pos] = doc_facets
+
+    @staticmethod
+    def _remap(index, remap):
+        for name in list(index):
+            moved = {remap[p] for p in index[name] if remap[p] >= 0}
+            if moved:
+                index[name] = moved
+            else:
+                del index[name]
+
+    def sync(self, records, revision=None) -> dict:
+        """
+        Bring the index in line with `records` (sheet order). Unchanged rows
+        are never re-tokenized: appends only add postings, and deletes/edits
+        renumber the existing posting sets before the new rows are added.
+        """
+        keyed = []
+        seen = {}
+        for rec in records:
+            h = _row_hash(rec)
+            n = seen.get(h, 0)
+            seen[h] = n + 1
+            keyed.append((h, n))
+
+        with self._lock:
+            old_keys = self._keys
+            if keyed == old_keys:
+                self.synced_at = time.monotonic()
+                self.source_revision = revision
+                return {"added": 0, "removed": 0, "total": len(keyed)}
+
+            new_pos = {key: pos for pos, key in enumerate(keyed)}
+            remap = [new_pos.get(key, -1) for key in old_keys]
+            removed = remap.count(-1)
+            if any(p != i for i, p in enumerate(remap)):
+                self._remap(self._postings, remap)
+                for values in self._facets.values():
+                    self._remap(values, remap)
+
+            old_pos = {key: pos for pos, key in enumerate(old_keys)}
+            docs = [None] * len(keyed)
+            doc_facets = [None] * len(keyed)
+            for pos, key in enumerate(keyed):
+                src = old_pos.get(key)
+                if src is not None:
+                    docs[pos] = self._docs[src]
+                    doc_facets[pos] = self._doc_facets[src]
+            self._keys, self._docs, self._doc_facets = keyed, docs, doc_facets
+
+            added = 0
+            for pos, key in enumerate(keyed):
+                if docs[pos] is None:
+                    docs[pos] = dict(records[pos])
+                    self._add(pos, docs[pos])
+                    added += 1
+
+            self._bitmaps = {}
+            self._top_facets = {
+                field: sorted(((v, len(ids)) for v, ids in values.items()),
+                              key=lambda c: (-c[1], c[0].lower()))
+                for field, values in self._facets.items()
+            }
+            self.synced_at = time.monotonic()
+            self.source_revision = revision
+        return {"added": added, "removed": removed, "total": len(keyed)}
+
+    # ---- querying ----
+    def _bitmap(self, key, positions):
+        bm = self._bitmaps.get(key)
+        if bm is None:
+            bm = self._bitmaps[key] = _to_bitmap(positions, len(self._docs))
+        return bm
+
+    def search(self, q="", filters=None, offset=0, limit=20) -> dict:
+        """
+        Full-text AND query over SEARCH_FIELDS plus exact facet filters
+        ({field: value}). Returns {"total", "results", "facets"}; results are
+        in sheet order and facets are [(value, count)] per field.
+        """
+        filters = {f: v for f, v in (filters or {}).items() if v and f in self._facets}
+        empty = {"total": 0, "results": [], "facets": {f: [] for f in self.facet_fields}}
+
+        with self._lock:
+            terms = []
+            for tok in tokenize(q):
+                terms.append((("t", tok), self._postings.get(tok)))
+            for field, value in filters.items():
+                terms.append((("f", field, value), self._facets[field].get(value)))
+            if any(not ids for _, ids in terms):
+                return empty
+
+            if not terms:
+                total = len(self._docs)
+                results = self._docs[offset:offset + limit]
+                facets = {f: counts[:FACET_LIMIT] for f, counts in self._top_facets.items()}
+                return {"total": total, "results": results, "facets": facets}
+
+            terms.sort(key=lambda t: len(t[1]))
+            if len(terms[0][1]) <= SMALL_RESULT:
+                matched = set(terms[0][1])
+                for _, ids in terms[1:]:
+                    matched &= ids
+                ordered = sorted(matched)
+                results = [self._docs[p] for p in ordered[offset:offset + limit]]
+                facets = self._tally(ordered)
+                return {"total": len(ordered), "results": results, "facets": facets}
+
+            bm = -1
+            for key, ids in terms:
+                bm &= self._bitmap(key, ids)
+            total = bm.bit_count()
+            results = []
+            for p in _iter_bits(bm, offset):
+                results.append(self._docs[p])
+                if len(results) >= limit:
+                    break
+            facets = {}
+            for field, top in self._top_facets.items():
+                counts = []
+                for value, _ in top[:FACET_LIMIT]:
+                    n = (bm & self._bitmap(("f", field, value), self._facets[field][value])).bit_count()
+                    if n:
+                        counts.append((value, n))
+                counts.sort(key=lambda c: (-c[1], c[0].lower()))
+                facets[field] = counts
+            return {"total": total, "results": results, "facets": facets}
+
+    def _tally(self, positions):
+        out = {}
+        for field in self.facet_fields:
+            tally = {}
+            for p in positions:
+                for v in self._doc_facets[p][field]:
+                    tally[v] = tally.get(v, 0) + 1
+            out[field] = sorted(tally.items(), key=lambda c: (-c[1], c[0].lower()))[:FACET_LIMIT]
+        return out
+
+
+# ---------------- Process-wide catalog ----------------
+catalog = CatalogIndex()
+_refresh_lock = threading.Lock()
+_retry = {"at": 0.0, "failures": 0}  # backoff after failed refreshes
+
+
+def _load_records():
+    """Return (records, revision) from the admin storage engine, or (None, None)."""
+    from backend.admin.storage import get_storage
+
+    store = get_storage()
+    if not store.headers():
+        return None, None
+    return store.snapshot()
+
+
+def _refresh():
+    try:
+        records, revision = _load_records()
+        if records is not None and revision != catalog.source_revision:
+            catalog.sync(records, revision)
+        else:
+            catalog.synced_at = time.monotonic()
+        _retry["failures"] = 0
+    except Exception as e:
+        _retry["failures"] += 1
+        delay = min(CATALOG_RETRY_MAX, CATALOG_RETRY_MIN * 2 ** (_retry["failures"] - 1))
+        _retry["at"] = time.monotonic() + delay
+        print(f"[ERROR] Catalog refresh failed: {e} (retrying in {delay:.0f}s)")
+    finally:
+        _refresh_lock.release()
+
+
+def get_catalog() -> CatalogIndex:
+    """
+    Return the catalog. The first call loads it synchronously; after that a
+    stale (or, after a failure, empty) index is served while one background
+    thread re-syncs it, no sooner than the retry backoff allows.
+    """
+    now = time.monotonic()
+    stale = now - catalog.synced_at > CATALOG_REFRESH
+    if (not catalog.synced_at or stale) and now >= _retry["at"] and _refresh_lock.acquire(blocking=False):
+        if catalog.synced_at or _retry["failures"]:
+            threading.Thread(target=_refresh, name="catalog-refresh", daemon=True).start()
+        else:
+            _refresh()
+    return catalog
@@ -0,0 +1,274 @@
+# backend/export.py
+"""
+Streaming export of the catalog rows as CSV, NDJSON or XLSX.
+
+Rows come from the storage engine a chunk at a time (Storage.export_rows:
+the record cache, mirror or SQLite file when the data is local, otherwise
+bounded A1 range reads of EXPORT_CHUNK_ROWS rows), and each chunk is encoded
+and sent before the next one is fetched, so memory stays flat however long
+the sheet grows. XLSX is zipped on the fly the same way (encode_xlsx).
+
+Responses carry a weak ETag: a digest of the exported values, remembered per
+engine revision. When the data is local and the digest is not known yet it
+is computed with one extra pass, so the first response already has an ETag;
+for range reads it is taken while streaming and used from the next request.
+A matching If-None-Match gets 304 without reading any rows.
+"""
+import csv
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import threading
+from xml.sax.saxutils import escape
+
+from flask import Response, abort, request
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "500"))
+# Columns left out of the public /collections export (comma-separated headers).
+EXPORT_HIDDEN_COLUMNS = tuple(h.strip() for h in os.getenv("EXPORT_HIDDEN_COLUMNS", "").split(",") if h.strip())
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+# ---------------- encoders: (columns, iterator of row chunks) -> iterator of bytes ----------------
+def encode_csv(columns, chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()  # header only: no rows
+
+
+def _nonfinite_as_text(value):
+    """
+    numericise() reads "NaN"/"Infinity" cells as floats that neither JSON nor
+    an XLSX <v> may hold; those go out as the text the sheet shows.
+    """
+    if isinstance(value, float) and not math.isfinite(value):
+        return "NaN" if math.isnan(value) else ("Infinity" if value > 0 else "-Infinity")
+    return value
+
+
+def _ndjson_line(columns, row):
+    try:
+        return json.dumps(dict(zip(columns, row)), ensure_ascii=False, allow_nan=False) + "\n"
+    except ValueError:  # a non-finite float; rare enough to re-encode the row
+        return json.dumps(dict(zip(columns, map(_nonfinite_as_text, row))), ensure_ascii=False) + "\n"
+
+
+def encode_ndjson(columns, chunks):
+    for rows in chunks:
+        yield "".join(_ndjson_line(columns, row) for row in rows).encode()
+
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+_XML_ILLEGAL_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable file that hands out what was written since the last drain()."""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _xlsx_cell(value):
+    value = _nonfinite_as_text(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_XML_ILLEGAL_RE.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>' if text else "<c/>"
+
+
+def encode_xlsx(columns, chunks):
+    """
+    A minimal one-sheet workbook with inline strings, zipped as it is
+    generated (zipfile writes data descriptors to an unseekable stream), so
+    the first bytes go out before the last rows are read.
+    """
+    import zipfile  # only XLSX exports need it; kept out of app startup
+
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, xml in _XLSX_PARTS.items():
+            zf.writestr(name, xml)
+        with zf.open("xl/worksheets/sheet1.xml", "w") as part:
+            part.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                       b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            part.write(("<row>" + "".join(_xlsx_cell(c) for c in columns) + "</row>").encode())
+            for rows in chunks:
+                part.write("".join("<row>" + "".join(_xlsx_cell(v) for v in row) + "</row>" for row in rows).encode())
+                yield sink.drain()
+            part.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson, "xlsx": encode_xlsx}
+
+
+# ---------------- responses ----------------
+class Exporter:
+    def __init__(self, chunk_rows=EXPORT_CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        self._digests = {}  # (engine, columns) -> (revision, digest)
+        self.exports = 0
+        self.not_modified = 0
+        self.rows = 0
+        self.digest_passes = 0
+
+    def _known(self, key, revision):
+        entry = self._digests.get(key)
+        return entry[1] if entry and revision is not None and entry[0] == revision else None
+
+    def _remember(self, key, revision, digest):
+        if revision is not None:
+            with self._lock:
+                self._digests[key] = (revision, digest)
+
+    def _rows(self, store, keep, hasher=None):
+        """store.export_rows() cut down to the `keep` columns, optionally feeding `hasher`."""
+        for chunk in store.export_rows(self.chunk_rows):
+            rows = [[("" if i >= len(row) or row[i] is None else row[i]) for i in keep] for row in chunk]
+            if hasher is not None:
+                for row in rows:
+                    hasher.update("\x1f".join(map(str, row)).encode() + b"\x1e")
+            yield rows
+
+    @staticmethod
+    def _hasher(columns):
+        hasher = hashlib.blake2b(digest_size=12)
+        hasher.update("\x1f".join(columns).encode() + b"\x1e")
+        return hasher
+
+    def _stream(self, store, fmt, columns, keep, key, revision, known):
+        hasher = None if known else self._hasher(columns)
+        count = 0
+
+        def counted():
+            nonlocal count
+            for rows in self._rows(store, keep, hasher):
+                count += len(rows)
+                yield rows
+
+        try:
+            yield from ENCODERS[fmt](columns, counted())
+        except Exception as e:
+            print(f"[ERROR] {fmt} export failed after {count} rows: {e}")
+            raise
+        with self._lock:
+            self.rows += count
+        # Only remember the digest if nothing changed while streaming.
+        if hasher is not None and store.revision() == revision:
+            self._remember(key, revision, hasher.hexdigest())
+
+    def response(self, store, fmt, filename, hidden=()):
+        """A streamed download of every row in `fmt` (a FORMATS key), minus the `hidden` columns."""
+        if fmt not in FORMATS:
+            abort(404)
+        headers = store.headers()
+        if not headers:
+            abort(404)
+        keep = [i for i, h in enumerate(headers) if h not in hidden]
+        columns = [headers[i] for i in keep]
+        key = (store.name, tuple(columns))
+
+        revision = store.revision()
+        digest = self._known(key, revision)
+        if digest is None and revision is not None and store.rows_are_local():
+            hasher = self._hasher(columns)
+            for _ in self._rows(store, keep, hasher):
+                pass
+            digest = hasher.hexdigest()
+            with self._lock:
+                self.digest_passes += 1
+            self._remember(key, revision, digest)
+
+        etag = f"{digest}-{fmt}" if digest else None
+        if etag and request.if_none_match.contains_weak(etag):
+            with self._lock:
+                self.not_modified += 1
+            response = Response(status=304)
+        else:
+            with self._lock:
+                self.exports += 1
+            response = Response(self._stream(store, fmt, columns, keep, key, revision, digest is not None),
+                                content_type=FORMATS[fmt])
+            response.headers["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+        if etag:
+            response.set_etag(etag, weak=True)
+        response.cache_control.no_cache = True
+        return response
+
+    def invalidate(self):
+        with self._lock:
+            self._digests.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "exports": self.exports,
+                "not_modified": self.not_modified,
+                "rows": self.rows,
+                "digest_passes": self.digest_passes,
+                "digests": len(self._digests),
+            }
+
+
+exporter = Exporter()
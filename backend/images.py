@@ -0,0 +1,66 @@
+# backend/images.py
+"""
+Jinja helper for responsive images.
+
+Reads the manifest written by backend/tools/build_images.py and renders a
+<picture> with AVIF/WebP/JPEG `srcset`s so browsers pick the smallest variant
+that fits. Without a manifest (e.g. local dev before the build step) it falls
+back to a plain <img> of the original.
+"""
+import json
+import threading
+from pathlib import Path
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+MANIFEST = STATIC_DIR / "images" / "variants" / "manifest.json"
+
+_MIME = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg"}
+_cache = {"mtime": None, "data": {}}
+_lock = threading.Lock()
+
+
+def load_manifest() -> dict:
+    """The variants manifest, re-read only when the file changes."""
+    try:
+        mtime = MANIFEST.stat().st_mtime
+    except OSError:
+        return {}
+    if mtime != _cache["mtime"]:
+        with _lock:
+            if mtime != _cache["mtime"]:
+                _cache["data"] = json.loads(MANIFEST.read_text(encoding="utf-8"))
+                _cache["mtime"] = mtime
+    return _cache["data"]
+
+
+def _srcset(variants):
+    return ", ".join(f"{url_for('static', filename=v['src'])} {v['w']}w" for v in variants)
+
+
+def responsive_img(filename, alt="", sizes="100vw", class_="", loading="lazy"):
+    """
+    {{ responsive_img('images/community.jpg', 'Community', sizes='(min-width: 768px) 25vw, 100vw',
+                      class_='card-img-top') }}
+    """
+    entry = load_manifest().get(filename)
+    attrs = f'alt="{escape(alt)}" loading="{escape(loading)}" decoding="async"'
+    if class_:
+        attrs += f' class="{escape(class_)}"'
+    if not entry:
+        return Markup(f'<img src="{url_for("static", filename=filename)}" {attrs}>')
+
+    variants = entry["variants"]
+    sources = "".join(
+        f'<source type="{_MIME[fmt]}" srcset="{_srcset(variants[fmt])}" sizes="{escape(sizes)}">'
+        for fmt in ("avif", "webp") if variants.get(fmt)
+    )
+    jpeg = variants.get("jpeg") or []
+    fallback = url_for("static", filename=jpeg[-1]["src"]) if jpeg else url_for("static", filename=filename)
+    img = (
+        f'<img src="{fallback}" srcset="{_srcset(jpeg)}" sizes="{escape(sizes)}" '
+        f'width="{entry["width"]}" height="{entry["height"]}" {attrs}>'
+    )
+    return Markup(f"<picture>{sources}{img}</picture>")
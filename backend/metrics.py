@@ -0,0 +1,224 @@
+"""
+Latency histograms and a Prometheus-text /metrics endpoint.
+
+init_metrics(app) times every request, every Jinja render and exposes the
+registry at /metrics. instrument_worksheet(ws) wraps a gspread worksheet so
+each Sheets call is counted and timed by method; SMTP sends are timed with
+`with timed(SMTP_SECONDS, "smtp"):`. Spans recorded while a request is active are also
+summed per name for an optional `Server-Timing` response header
+(METRICS_SERVER_TIMING=1), e.g. `sheets;dur=412.3, render;dur=3.1, total;dur=431.0`.
+
+Recording is a perf_counter pair, a bisect and a locked increment, cheap
+enough to leave on in production. METRICS=0 turns the middleware off.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, before_render_template, g, has_request_context, request, template_rendered
+
+METRICS = os.getenv("METRICS", "1") == "1"
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "0") == "1"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # if set, /metrics requires ?token= or a Bearer header
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# gspread Worksheet methods that hit the network, timed by instrument_worksheet().
+SHEETS_METHODS = frozenset({
+    "get_all_records", "get_all_values", "row_values", "get", "batch_get",
+    "append_row", "append_rows", "update", "batch_update", "delete_rows",
+    "get_lastUpdateTime",  # Drive metadata, on the spreadsheet
+})
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by a label tuple."""
+
+    def __init__(self, name, help_text, buckets=BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}  # labels tuple -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, seconds, **labels):
+        key = tuple(sorted(labels.items()))
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += seconds
+
+    def totals(self) -> dict:
+        """{labels tuple: (count, seconds)} recorded so far."""
+        with self._lock:
+            return {k: (sum(v[:-1]), v[-1]) for k, v in self._series.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for key, series in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(key + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(key)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = {}
+        self._gauges = {}  # prefix -> callable returning {name: number}
+
+    def histogram(self, name, help_text):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(name, help_text)
+        return self.histograms[name]
+
+    def register_stats(self, prefix, stats):
+        """Expose stats() -> {key: number} as gauges named <prefix>_<key>."""
+        self._gauges[prefix] = stats
+
+    def render(self) -> str:
+        lines = []
+        for hist in self.histograms.values():
+            lines += hist.render()
+        for prefix, stats in self._gauges.items():
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"[WARN] metrics: {prefix} stats failed: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, (bool, int, float)):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+REQUEST_SECONDS = registry.histogram("http_request_duration_seconds", "Flask request latency.")
+SHEETS_SECONDS = registry.histogram("sheets_call_duration_seconds", "gspread call latency by method.")
+SMTP_SECONDS = registry.histogram("smtp_send_duration_seconds", "SMTP send latency.")
+RENDER_SECONDS = registry.histogram("template_render_duration_seconds", "Jinja render latency by template.")
+LOGIN_HASH_SECONDS = registry.histogram("login_hash_duration_seconds", "Admin password hash check time.")
+
+
+def _add_span(name, seconds):
+    if has_request_context():
+        spans = g.setdefault("_metric_spans", {})
+        spans[name] = spans.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(histogram, span, **labels):
+    """Time a block into `histogram` (plus an outcome label) and the request's `span`."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        histogram.observe(elapsed, outcome=outcome, **labels)
+        _add_span(span, elapsed)
+
+
+class InstrumentedWorksheet:
+    """Proxy for a gspread Worksheet (and its .spreadsheet) that times SHEETS_METHODS."""
+
+    def __init__(self, ws, prefix=""):
+        self._ws = ws
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self._ws, name)
+        if name == "spreadsheet" and not self._prefix:
+            return InstrumentedWorksheet(attr, "spreadsheet.")
+        if name not in SHEETS_METHODS or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with timed(SHEETS_SECONDS, "sheets", method=self._prefix + name):
+                return attr(*args, **kwargs)
+
+        return call
+
+
+def instrument_worksheet(ws):
+    return InstrumentedWorksheet(ws) if METRICS and ws is not None else ws
+
+
+# ---- Flask wiring ----
+def _before_request():
+    g._metric_started = time.perf_counter()
+
+
+def _after_request(response):
+    started = g.pop("_metric_started", None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.observe(
+        elapsed,
+        endpoint=request.endpoint or "unmatched",
+        method=request.method,
+        status=response.status_code,
+    )
+    if METRICS_SERVER_TIMING:
+        spans = g.get("_metric_spans", {})
+        parts = [f"{name};dur={secs * 1000:.1f}" for name, secs in spans.items()]
+        parts.append(f"total;dur={elapsed * 1000:.1f}")
+        response.headers["Server-Timing"] = ", ".join(parts)
+    return response
+
+
+def _before_render(sender, template, context, **extra):
+    g.setdefault("_metric_render_stack", []).append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    stack = g.get("_metric_render_stack")
+    if stack:
+        elapsed = time.perf_counter() - stack.pop()
+        RENDER_SECONDS.observe(elapsed, template=template.name or "<string>")
+        _add_span("render", elapsed)
+
+
+def metrics_view():
+    if METRICS_TOKEN:
+        supplied = request.args.get("token") or request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if supplied != METRICS_TOKEN:
+            return Response("forbidden\n", status=403, mimetype="text/plain")
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app):
+    """Install request/render timing and the /metrics endpoint."""
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+    if not METRICS:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
@@ -0,0 +1,324 @@
+# backend/outbox.py
+"""
+Durable outbox for contact-form email.
+
+The /contact route only writes the message to a SQLite spool and returns.
+A background sender drains the spool: it opens one authenticated SMTP
+connection per batch, sends every due message over it, and reschedules
+failures with jittered exponential backoff. Gunicorn workers can share one
+spool file; messages are claimed with a short lease so each is sent once.
+
+The spool is only as durable as the disk under OUTBOX_DB. The default lives
+in the temp directory, which on Cloud Run (and on tmpfs anywhere) is memory
+that goes away with the instance; in production point OUTBOX_DB at a
+persistent volume (e.g. an NFS or Cloud Storage mount). While the spool is
+ephemeral, submit() also sends before the reply (OUTBOX_SEND_BEFORE_REPLY,
+"auto" by default), so a message is only left to the spool if SMTP fails,
+and gunicorn warns about it at startup.
+"""
+import os
+import random
+import smtplib
+import sqlite3
+import ssl
+import tempfile
+import threading
+import time
+from email.mime.text import MIMEText
+
+from backend.metrics import SMTP_SECONDS, timed
+
+OUTBOX_DB = os.getenv("OUTBOX_DB", os.path.join(tempfile.gettempdir(), "contact_outbox.sqlite3"))
+OUTBOX_SEND_BEFORE_REPLY = os.getenv("OUTBOX_SEND_BEFORE_REPLY", "auto")  # 1, 0 or auto: if the spool is ephemeral
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "20"))
+
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 5.0      # seconds; doubled per attempt
+BACKOFF_MAX = 30 * 60.0
+CLAIM_SECONDS = 120.0   # lease on a claimed batch before another sender may retry it
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    sender_name   TEXT NOT NULL,
+    sender_email  TEXT NOT NULL,
+    body          TEXT NOT NULL,
+    created_at    REAL NOT NULL,
+    next_attempt  REAL NOT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    claimed_by    TEXT,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    failed        INTEGER NOT NULL DEFAULT 0,
+    last_error    TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_due ON messages (failed, next_attempt);
+"""
+
+
+def _mount_of(path):
+    """(mount point, filesystem type) holding `path`, from /proc/mounts, or None off Linux."""
+    try:
+        with open("/proc/mounts") as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) > 2]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best = None
+    for point, fstype in mounts:
+        point = point.replace("\\040", " ")
+        if path == point or path.startswith(point.rstrip("/") + "/"):
+            if best is None or len(point) >= len(best[0]):
+                best = (point, fstype)
+    return best
+
+
+def spool_is_ephemeral(path=OUTBOX_DB) -> bool:
+    """True if a spool at `path` dies with this instance: in memory, on tmpfs, or on Cloud Run's own disk."""
+    if path == ":memory:":
+        return True
+    mount = _mount_of(os.path.dirname(os.path.abspath(path)))
+    fstype = mount[1] if mount else ""
+    if fstype in ("tmpfs", "ramfs"):
+        return True
+    # Cloud Run (K_SERVICE is set there): only mounted network volumes outlive the instance
+    return bool(os.getenv("K_SERVICE")) and not fstype.startswith(("nfs", "fuse"))
+
+
+def spool_warning(path=OUTBOX_DB):
+    """A startup warning if contact messages could be lost with the instance, else None."""
+    if not spool_is_ephemeral(path):
+        return None
+    then = "sent before replying" if _send_before_reply(path) else "NOT sent before replying (OUTBOX_SEND_BEFORE_REPLY=0)"
+    return (f"Contact outbox spool {path} does not outlive this instance; set OUTBOX_DB to a persistent "
+            f"volume. Until then messages are {then}, and ones SMTP refuses are lost with the instance.")
+
+
+def _send_before_reply(path) -> bool:
+    if OUTBOX_SEND_BEFORE_REPLY == "auto":
+        return spool_is_ephemeral(path)
+    return OUTBOX_SEND_BEFORE_REPLY == "1"
+
+
+def smtp_credentials():
+    """(user, password) for the mailbox, or raise if not configured."""
+    gmail_user = os.getenv("GMAIL_USER")
+    gmail_pass = os.getenv("GMAIL_PASS")
+    if not gmail_user or not gmail_pass:
+        raise RuntimeError("GMAIL_USER or GMAIL_PASS is not set in environment/.env")
+    return gmail_user, gmail_pass
+
+
+def build_message(sender_name: str, sender_email: str, body: str, mailbox: str) -> MIMEText:
+    msg = MIMEText(f"You have received a new message from {sender_name} ({sender_email}):\n\n{body}")
+    msg["Subject"] = f"Message from {sender_name}"
+    msg["From"] = mailbox
+    msg["To"] = mailbox
+    return msg
+
+
+def open_smtp(user, password, host=None, port=None, starttls=None):
+    """Connect, STARTTLS and log in; the caller owns (and quits) the connection."""
+    server = smtplib.SMTP(host or SMTP_HOST, port or SMTP_PORT, timeout=SMTP_TIMEOUT)
+    try:
+        if SMTP_STARTTLS if starttls is None else starttls:
+            server.starttls(context=ssl.create_default_context())
+        if password:
+            server.login(user, password)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+class Outbox:
+    def __init__(self, path=OUTBOX_DB, host=None, port=None, starttls=None):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.owner = f"{os.getpid()}-{id(self)}"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")  # an accepted message must survive a crash
+        self._db.executescript(_SCHEMA)
+        self.send_before_reply = _send_before_reply(path)
+        self._wake = threading.Event()
+        self._thread = None
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self.send_seconds = []  # recent per-message send latencies
+
+    # ---- producer side ----
+    def enqueue(self, sender_name: str, sender_email: str, body: str, wake=True) -> int:
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO messages (sender_name, sender_email, body, created_at, next_attempt) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sender_name, sender_email, body, now, now),
+            )
+        if wake:
+            self._wake.set()
+        return cur.lastrowid
+
+    def submit(self, sender_name: str, sender_email: str, body: str) -> int:
+        """
+        enqueue() for the /contact route. With send_before_reply the message
+        is also sent here, in the request, so the reply waits for SMTP instead
+        of trusting a spool that may not outlive the instance; a failed send
+        stays queued for the sender thread as usual.
+        """
+        msg_id = self.enqueue(sender_name, sender_email, body, wake=not self.send_before_reply)
+        if self.send_before_reply:
+            try:
+                self.send_due()
+            except Exception as e:
+                print(f"[WARN] Contact outbox could not send before replying: {e}")
+                self._wake.set()
+        return msg_id
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM messages WHERE failed = 0").fetchone()[0]
+
+    def stats(self) -> dict:
+        samples = list(self.send_seconds)
+        with self._lock:
+            dead = self._db.execute("SELECT COUNT(*) FROM messages WHERE failed = 1").fetchone()[0]
+        return {
+            "depth": self.depth(),
+            "dead_letters": dead,
+            "sent": self.sent,
+            "retried": self.retried,
+            "avg_send_seconds": (sum(samples) / len(samples)) if samples else None,
+            "send_before_reply": self.send_before_reply,
+        }
+
+    # ---- consumer side ----
+    def _claim_batch(self):
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "UPDATE messages SET claimed_by = ?, claimed_until = ? WHERE id IN ("
+                    "  SELECT id FROM messages WHERE failed = 0 AND next_attempt <= ? AND claimed_until < ?"
+                    "  ORDER BY id LIMIT ?)",
+                    (self.owner, now + CLAIM_SECONDS, now, now, BATCH_SIZE),
+                )
+                rows = self._db.execute(
+                    "SELECT id, sender_name, sender_email, body, attempts FROM messages "
+                    "WHERE claimed_by = ? AND claimed_until > ? ORDER BY id",
+                    (self.owner, now),
+                ).fetchall()
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _release_claims(self):
+        with self._lock:
+            self._db.execute(
+                "UPDATE messages SET claimed_by = NULL, claimed_until = 0 WHERE claimed_by = ?", (self.owner,)
+            )
+
+    def _mark_sent(self, msg_id):
+        with self._lock:
+            self._db.execute("DELETE FROM messages WHERE id = ?", (msg_id,))
+        self.sent += 1
+
+    def _mark_failed(self, msg_id, attempts, error):
+        attempts += 1
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempts - 1)))
+        delay *= random.uniform(0.5, 1.0)
+        failed = 1 if attempts >= MAX_ATTEMPTS else 0
+        with self._lock:
+            self._db.execute(
+                "UPDATE messages SET attempts = ?, next_attempt = ?, claimed_by = NULL, claimed_until = 0, "
+                "failed = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, failed, str(error), msg_id),
+            )
+        if failed:
+            self.dead += 1
+            print(f"[ERROR] Contact email {msg_id} gave up after {attempts} attempts: {error}")
+        else:
+            self.retried += 1
+
+    def send_due(self) -> int:
+        """Send one batch over a single SMTP connection. Returns how many were sent."""
+        batch = self._claim_batch()
+        if not batch:
+            return 0
+        try:
+            user, password = smtp_credentials()
+            server = open_smtp(user, password, self.host, self.port, self.starttls)
+        except Exception as e:
+            print(f"[WARN] Contact outbox could not connect to SMTP: {e}")
+            for msg_id, _, _, _, attempts in batch:
+                self._mark_failed(msg_id, attempts, e)
+            return 0
+
+        sent = 0
+        try:
+            for msg_id, name, email, body, attempts in batch:
+                started = time.perf_counter()
+                try:
+                    with timed(SMTP_SECONDS, "smtp"):
+                        server.send_message(build_message(name, email, body, user))
+                except smtplib.SMTPServerDisconnected as e:
+                    self._mark_failed(msg_id, attempts, e)
+                    break
+                except Exception as e:
+                    self._mark_failed(msg_id, attempts, e)
+                    continue
+                self.send_seconds = (self.send_seconds + [time.perf_counter() - started])[-100:]
+                self._mark_sent(msg_id)
+                sent += 1
+        finally:
+            self._release_claims()
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+        return sent
+
+    def _run(self, idle_wait):
+        while True:
+            try:
+                while self.send_due():
+                    pass
+            except Exception as e:
+                print(f"[WARN] Contact outbox sender error: {e}")
+            self._wake.wait(idle_wait)
+            self._wake.clear()
+
+    def start(self, idle_wait=BACKOFF_BASE):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, args=(idle_wait,), name="contact-outbox", daemon=True)
+            self._thread.start()
+
+
+_outbox = None
+_outbox_pid = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    """This process's outbox, with its sender thread running."""
+    global _outbox, _outbox_pid
+    pid = os.getpid()
+    if _outbox is None or _outbox_pid != pid:
+        with _outbox_lock:
+            if _outbox is None or _outbox_pid != pid:
+                _outbox = Outbox()
+                _outbox_pid = pid
+                _outbox.start()
+    return _outbox
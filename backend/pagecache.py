@@ -0,0 +1,142 @@
+"""
+Full-page cache for the static content routes.
+
+Views decorated with @page_cache.cached render once per worker; later
+anonymous hits return the stored bytes with a strong ETag and answer a
+matching If-None-Match with 304, so the per-request cost is a dict lookup.
+
+Entries are keyed by endpoint and remember the mtimes of the templates they
+were rendered from (the page template plus everything it extends/includes).
+Those mtimes are only re-checked when templates auto-reload (debug), since in
+production templates change only with a deploy. Requests carrying a session
+(admin login, pending flash messages) bypass the cache because base.html
+renders them.
+"""
+import hashlib
+import os
+import threading
+from functools import wraps
+
+from flask import Response, current_app, g, make_response, request, session, template_rendered
+from jinja2 import meta
+
+PAGE_CACHE = os.getenv("PAGE_CACHE", "1") == "1"
+PAGE_CACHE_PRERENDER = os.getenv("PAGE_CACHE_PRERENDER", "0") == "1"
+
+
+class Page:
+    __slots__ = ("body", "etag", "mimetype", "mtimes")
+
+    def __init__(self, body, mimetype, mtimes):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.mimetype = mimetype
+        self.mtimes = mtimes  # {template filename: mtime}
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _template_files(env, name, seen=None):
+    """Filenames of `name` and every template it extends, includes or imports."""
+    seen = {} if seen is None else seen
+    source, filename, _ = env.loader.get_source(env, name)
+    if filename in seen:
+        return seen
+    seen[filename] = _mtime(filename)
+    for ref in meta.find_referenced_templates(env.parse(source)):
+        if ref:  # None for dynamic names
+            _template_files(env, ref, seen)
+    return seen
+
+
+def _record_template(sender, template, context, **extra):
+    g.setdefault("_page_templates", []).append(template.name)
+
+
+class PageCache:
+    def __init__(self, enabled=PAGE_CACHE):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._pages = {}  # endpoint -> Page
+        self._endpoints = set()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def init_app(self, app):
+        template_rendered.connect(_record_template, app)
+
+    def cached(self, view):
+        """Decorator for views whose output depends only on their templates."""
+        self._endpoints.add(view.__name__)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or session:
+                return view(*args, **kwargs)
+            page = self._pages.get(request.endpoint)
+            if page is None or (current_app.jinja_env.auto_reload and self._stale(page)):
+                return self._render(view, args, kwargs)
+            self.hits += 1
+            return self._respond(page)
+
+        return wrapper
+
+    def _stale(self, page):
+        return any(_mtime(f) != m for f, m in page.mtimes.items())
+
+    def _render(self, view, args, kwargs):
+        self.misses += 1
+        g._page_templates = []
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.is_streamed:
+            return response
+        mtimes = {}
+        env = current_app.jinja_env
+        for name in g._page_templates:
+            _template_files(env, name, mtimes)
+        page = Page(response.get_data(), response.mimetype, mtimes)
+        with self._lock:
+            self._pages[request.endpoint] = page
+        return self._respond(page)
+
+    def _respond(self, page):
+        if request.if_none_match.contains(page.etag):
+            self.not_modified += 1
+            response = Response(status=304)
+        else:
+            response = Response(page.body, mimetype=page.mimetype)
+        response.set_etag(page.etag)
+        response.cache_control.no_cache = True
+        return response
+
+    def warm(self, app):
+        """Render every cached route once (call at worker boot)."""
+        client = app.test_client()
+        for rule in app.url_map.iter_rules():
+            if rule.endpoint in self._endpoints and not rule.arguments and "GET" in rule.methods:
+                client.get(rule.rule)
+        return len(self._pages)
+
+    def invalidate(self, endpoint=None):
+        with self._lock:
+            if endpoint is None:
+                self._pages.clear()
+            else:
+                self._pages.pop(endpoint, None)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "pages": len(self._pages),
+        }
+
+
+page_cache = PageCache()
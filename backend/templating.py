@@ -0,0 +1,60 @@
+# backend/templating.py
+"""
+Precompiled templates and production template settings.
+
+backend/tools/build_templates.py compiles every template to Jinja bytecode
+in backend/templates-bytecode/ when the image is built. init_templates(app)
+points the Jinja environment at that directory, so the first render of a
+template in a worker unmarshals its code instead of lexing, parsing and
+compiling the source. Entries are keyed by template path and checked against
+the source's checksum: an edited template (or a different Python) misses and
+compiles from source as before. Nothing is written at run time.
+
+It also pins template auto-reload off (TEMPLATES_AUTO_RELOAD=1 or
+FLASK_DEBUG=1 turn it on), so production never stats a template file to see
+whether it changed.
+"""
+import os
+from pathlib import Path
+
+from jinja2 import FileSystemBytecodeCache
+
+BACKEND_DIR = Path(__file__).resolve().parent
+TEMPLATES_BYTECODE_DIR = Path(os.getenv("TEMPLATES_BYTECODE_DIR", str(BACKEND_DIR / "templates-bytecode")))
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", os.getenv("FLASK_DEBUG", "0")) == "1"
+
+
+class ShippedBytecodeCache(FileSystemBytecodeCache):
+    """The build's bytecode, read-only: a miss is compiled in memory, never written back."""
+
+    def __init__(self, directory):
+        super().__init__(str(directory))
+        self.hits = self.misses = 0
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+        if bucket.code is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    def dump_bytecode(self, bucket):
+        pass
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def init_templates(app):
+    app.config["TEMPLATES_AUTO_RELOAD"] = TEMPLATES_AUTO_RELOAD
+    app.jinja_env.auto_reload = TEMPLATES_AUTO_RELOAD
+    if TEMPLATES_BYTECODE_DIR.is_dir():
+        app.jinja_env.bytecode_cache = ShippedBytecodeCache(TEMPLATES_BYTECODE_DIR)
+
+
+def template_stats(app) -> dict:
+    cache = app.jinja_env.bytecode_cache
+    out = {"auto_reload": app.jinja_env.auto_reload, "precompiled": isinstance(cache, ShippedBytecodeCache)}
+    if isinstance(cache, ShippedBytecodeCache):
+        out.update(cache.stats())
+    return out
@@ -0,0 +1,117 @@
+# backend/tools/bench_admin_edits.py
+# Cost of one dashboard edit: full-page round trip vs. the htmx fragment endpoints.
+#   python backend/tools/bench_admin_edits.py
+#   python backend/tools/bench_admin_edits.py --rows 5000 --ops 100 --latency 0.02
+# Runs the app in-process against a FakeWorksheet (with an ID column) and, for
+# add/update/delete, reports the Sheets calls per operation, bytes sent back
+# and wall time. "full" posts the plain form and follows the redirect to the
+# dashboard; "fragment" posts with HX-Request and gets only the row or list.
+# "add cold" is an add after the cached records expired (an editor who paused
+# longer than RECORD_CACHE_TTL): its duplicate check should still not download
+# the sheet (the DuplicateIndex has its own lifetime, backend/admin/cache.py).
+import argparse, os, random, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.tools.loadtest import ADMIN_PASSWORD, HEADERS, fake_rows  # noqa: E402
+
+READS = {"get_all_records", "get_all_values", "get", "row_values", "fetch_sheet_metadata"}
+FULL_READS = {"get_all_records", "get_all_values"}
+
+
+def build(rows, latency):
+    from werkzeug.security import generate_password_hash
+
+    os.environ.update(ADMIN_USERNAME="admin", ADMIN_PASSWORD_HASH=generate_password_hash(ADMIN_PASSWORD),
+                      FLASK_SECRET="bench", SHEET_URL="", SHEET_MIRROR_DB="", PAGE_CACHE_PRERENDER="0",
+                      START_NODE="0", STORAGE_BACKEND="sheets", LOGIN_MAX_PER_IP="100000")
+    from backend.admin.fakes import FakeWorksheet, install_fake_sheets
+
+    ws = FakeWorksheet(["ID"] + HEADERS, ([f"r{i:011x}"] + r for i, r in enumerate(fake_rows(rows))),
+                       latency=latency)
+    install_fake_sheets(ws)
+    from backend.app import create_app
+
+    app = create_app()
+    app.config["TESTING"] = True
+    client = app.test_client()
+    client.post("/admin/login", data={"username": "admin", "password": ADMIN_PASSWORD})
+    return ws, client
+
+
+def edit_form(store, rnd, total):
+    row = store.get(rnd.randint(2, total + 1))
+    headers = store.headers()
+    data = {"sheet_row": row["sheet_row"], "row_id": row["row_id"], "row_version": row["row_version"]}
+    for i, h in enumerate(headers):
+        data[f"header_{i}"] = h
+        data[f"field_{i}"] = f"edited {rnd.random():.6f}" if h == "Notes" else row.get(h, "")
+    return data
+
+
+def expire_records():
+    """Age the cached record lists past RECORD_CACHE_TTL, leaving the duplicate index alone."""
+    from backend.admin.cache import record_cache
+
+    with record_cache._lock:
+        for entry in record_cache._entries.values():
+            entry[0] = float("-inf")
+
+
+def run(client, ws, mode, ops, rnd):
+    from backend.admin.storage import get_storage
+
+    store = get_storage()
+    hx = {"HX-Request": "true"} if mode == "fragment" else {}
+    follow = mode == "full"
+    out = {}
+    for op in ("add", "add cold", "update", "delete"):
+        client.get("/admin/")  # the page the editor is looking at (warms the record cache)
+        calls, nbytes, seconds = {}, 0, 0.0
+        for _ in range(ops):
+            if op == "add cold":
+                expire_records()
+            else:
+                total = len(store.snapshot()[0])  # (keeps the records cached)
+            if op.startswith("add"):
+                n = rnd.random()
+                args = ("/admin/add", {"title": f"Bench {n}", "url": f"https://example.org/bench/{n}"})
+            elif op == "update":
+                args = ("/admin/update", edit_form(store, rnd, total))
+            else:
+                row = store.get(rnd.randint(2, total + 1))
+                args = ("/admin/delete", {"sheet_row": row["sheet_row"], "row_id": row["row_id"],
+                                          "row_version": row["row_version"]})
+            before = dict(ws.calls)
+            t0 = time.perf_counter()
+            r = client.post(args[0], data=args[1], headers=hx, follow_redirects=follow)
+            seconds += time.perf_counter() - t0
+            assert r.status_code == 200, (op, mode, r.status_code)
+            nbytes += len(r.data)
+            for name, n in ws.calls.items():
+                if n - before.get(name, 0):
+                    calls[name] = calls.get(name, 0) + n - before.get(name, 0)
+        out[op] = (calls, nbytes / ops, seconds / ops * 1000)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--ops", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake Sheets call")
+    args = parser.parse_args()
+
+    ws, client = build(args.rows, args.latency)
+    rnd = random.Random(1)
+    print(f"{'mode':<10}{'op':<10}{'writes/op':>10}{'reads/op':>10}{'full/op':>9}{'bytes':>9}{'ms':>8}")
+    for mode in ("full", "fragment"):
+        for op, (calls, nbytes, ms) in run(client, ws, mode, args.ops, rnd).items():
+            reads = sum(n for name, n in calls.items() if name in READS) / args.ops
+            full = sum(n for name, n in calls.items() if name in FULL_READS) / args.ops
+            writes = sum(n for name, n in calls.items() if name not in READS) / args.ops
+            print(f"{mode:<10}{op:<10}{writes:>10.2f}{reads:>10.2f}{full:>9.2f}{nbytes:>9.0f}{ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
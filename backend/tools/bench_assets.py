@@ -0,0 +1,67 @@
+# backend/tools/bench_assets.py
+# Bytes transferred for a cold and a warm load of a page and its local assets.
+#   python backend/tools/build_assets.py && python backend/tools/bench_assets.py
+#   python backend/tools/bench_assets.py --path /impacts --encoding identity
+# Cold: empty browser cache. Warm: immutable (hashed) URLs come from cache
+# without a request; everything else is revalidated with If-None-Match.
+import argparse, re, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.app import app  # noqa: E402
+
+PICTURE_RE = re.compile(r"<picture>.*?</picture>", re.S)
+SRCSET_RE = re.compile(r'srcset="([^"]*)"')
+ASSET_RE = re.compile(r'(?:href|src)="(/[^"#?]*\.[A-Za-z0-9]+)"')
+
+
+def asset_urls(html):
+    """Local assets a browser would fetch: one candidate per <picture>, plus href/src."""
+    urls = []
+    for picture in PICTURE_RE.findall(html):
+        srcset = SRCSET_RE.search(picture)
+        if srcset:
+            # A narrow viewport takes the first (smallest) candidate of the first source.
+            urls.append(srcset.group(1).split(",")[0].strip().split(" ")[0])
+    urls += ASSET_RE.findall(PICTURE_RE.sub("", html))
+    return list(dict.fromkeys(u for u in urls if u.startswith("/")))
+
+
+def load(client, path, encoding, cache):
+    """One page load; `cache` maps url -> (etag, immutable) and is updated in place."""
+    total = requests = not_modified = 0
+    page = client.get(path, headers={"Accept-Encoding": encoding})
+    total += len(page.data)
+    requests += 1
+    for url in asset_urls(page.get_data(as_text=True)):
+        etag, immutable = cache.get(url, (None, False))
+        if immutable:
+            continue
+        headers = {"Accept-Encoding": encoding}
+        if etag:
+            headers["If-None-Match"] = etag
+        resp = client.get(url, headers=headers)
+        requests += 1
+        if resp.status_code == 304:
+            not_modified += 1
+        elif resp.status_code == 200:
+            total += len(resp.data)
+        cache[url] = (resp.headers.get("ETag") or etag, resp.cache_control.immutable)
+    return total, requests, not_modified
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--encoding", default="br, gzip", help="Accept-Encoding sent by the client")
+    args = parser.parse_args()
+
+    client = app.test_client()
+    cache = {}
+    for label in ("cold", "warm"):
+        total, requests, not_modified = load(client, args.path, args.encoding, cache)
+        print(f"{label}: {total / 1024:8.1f} KB over {requests} requests ({not_modified} x 304)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
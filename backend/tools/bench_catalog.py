@@ -0,0 +1,82 @@
+# backend/tools/bench_catalog.py
+# Query-latency benchmark for the /collections inverted index.
+#   python backend/tools/bench_catalog.py            (10k and 100k rows)
+#   python backend/tools/bench_catalog.py --rows 5000 --queries 500
+import argparse, random, statistics, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.catalog import CatalogIndex  # noqa: E402
+
+WORDS = ("air quality pollution particulate ozone nitrogen urban health asthma traffic "
+         "emissions policy monitoring sensors children schools climate indoor wildfire smoke "
+         "transport energy community citizen science exposure mapping infographic").split()
+THEMES = ["Engagement", "Impact", "Health", "Policy", "Sustainability", "Education"]
+TYPES = ["Image", "Still Image", "Report", "Video", "Article", "Dataset", "Podcast"]
+AUDIENCES = ["Public", "School students", "Researchers", "Policy makers", "Teachers"]
+LANGUAGES = ["English", "Spanish", "French", "German", "Hindi"]
+
+
+def synthetic_rows(n, seed=1):
+    rnd = random.Random(seed)
+    publishers = [f"Publisher {i}" for i in range(max(10, n // 50))]
+    for i in range(n):
+        yield {
+            "Title": " ".join(rnd.sample(WORDS, 5)).title() + f" {i}",
+            "URL": f"https://example.org/r/{i}",
+            "Keywords": ", ".join(rnd.sample(WORDS, 3)),
+            "Resource Theme": rnd.choice(THEMES),
+            "Resource Type": ", ".join(rnd.sample(TYPES, rnd.randint(1, 2))),
+            "Target Audience": ", ".join(rnd.sample(AUDIENCES, rnd.randint(1, 2))),
+            "Language": rnd.choice(LANGUAGES),
+            "Publisher": rnd.choice(publishers),
+        }
+
+
+def pct(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def bench(n, queries):
+    rows = list(synthetic_rows(n))
+    idx = CatalogIndex()
+    t0 = time.perf_counter()
+    idx.sync(rows)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    rows.append(next(synthetic_rows(1, seed=n)))
+    idx.sync(rows)
+    append = time.perf_counter() - t0
+
+    rnd = random.Random(7)
+    cases = {
+        "browse (no query)": lambda: idx.search(),
+        "1 rare term": lambda: idx.search(q=str(rnd.randrange(n))),
+        "1 common term": lambda: idx.search(q=rnd.choice(WORDS)),
+        "2 terms": lambda: idx.search(q=" ".join(rnd.sample(WORDS, 2))),
+        "term + facet": lambda: idx.search(q=rnd.choice(WORDS), filters={"Language": rnd.choice(LANGUAGES)}),
+        "2 facets": lambda: idx.search(filters={"Language": rnd.choice(LANGUAGES),
+                                                "Resource Theme": rnd.choice(THEMES)}),
+    }
+    print(f"\n== {n:,} rows: build {build * 1000:.0f} ms, incremental append sync {append * 1000:.0f} ms")
+    print(f"{'query':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, fn in cases.items():
+        for _ in range(50):
+            fn()  # warm the lazily built bitmaps
+        samples = []
+        for _ in range(queries):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        print(f"{name:<20}{statistics.median(samples):>10.3f}{pct(samples, .95):>10.3f}{pct(samples, .99):>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="*", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+    for n in args.rows:
+        bench(n, args.queries)
@@ -0,0 +1,92 @@
+# backend/tools/bench_duplicates.py
+# Size and speed of the duplicate index (backend/admin/dedupe.py) as the sheet grows.
+#   python backend/tools/bench_duplicates.py
+#   python backend/tools/bench_duplicates.py --rows 10000 100000 --checks 5000
+# For each size: time to build the index from the records with cold key memos
+# and to rebuild it after a record-cache reload (warm memos), its memory (the
+# index's own estimate, and what tracemalloc saw the cold build allocate,
+# memos included), the cost of one duplicate check and of the incremental
+# patches (append / update / delete), next to the old way of checking, a scan
+# of every record per new row.
+import argparse, random, sys, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.admin import dedupe  # noqa: E402
+from backend.admin.dedupe import DuplicateIndex, normalize_title, normalize_url  # noqa: E402
+from backend.tools.loadtest import HEADERS, fake_rows  # noqa: E402
+
+
+def records(n):
+    return [dict(zip(HEADERS, r)) for r in fake_rows(n)]
+
+
+def candidates(n, count, rnd):
+    """New rows for the checks: half repeat an existing URL in another spelling, half are new."""
+    out = []
+    for i in range(count):
+        k = rnd.randrange(n)
+        if i % 2:
+            out.append({"Title": f"Something new {i}", "URL": f"https://example.net/new/{i}"})
+        else:
+            out.append({"Title": f"Other title {i}", "URL": f"HTTPS://www.example.org/r/{k}/?utm_source=mail"})
+    return out
+
+
+def scan(recs, record):
+    """The old way: normalize and compare every row."""
+    url, title = normalize_url(record["URL"]), normalize_title(record["Title"])
+    return [i + 2 for i, r in enumerate(recs)
+            if (url and normalize_url(r["URL"]) == url) or (title and normalize_title(r["Title"]) == title)]
+
+
+def per_op(fn, items):
+    t0 = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - t0) / max(1, len(items)) * 1e6
+
+
+def bench(n, checks, rnd):
+    recs = records(n)
+    dedupe._normalize_url.cache_clear()
+    dedupe._normalize_title.cache_clear()
+    cold = DuplicateIndex(recs).build_seconds
+    dedupe._normalize_url.cache_clear()
+    dedupe._normalize_title.cache_clear()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    index = DuplicateIndex(recs)
+    allocated = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    index = DuplicateIndex(recs)  # as after a reload: memos warm
+    stats = dict(index.stats(), cold_seconds=cold)
+
+    cands = candidates(n, checks, rnd)
+    hits = sum(bool(index.matches(c)) for c in cands)
+    check_us = per_op(index.matches, cands)
+    scan_ms = per_op(lambda c: scan(recs, c), cands[:20]) / 1000
+    append_us = per_op(index.append, cands)
+    update_us = per_op(lambda c: index.update(rnd.randint(2, len(index) + 1), c), cands)
+    delete_us = per_op(lambda c: index.delete(rnd.randint(2, len(index) + 1)), cands)
+    return stats, allocated, hits, check_us, scan_ms, append_us, update_us, delete_us
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--checks", type=int, default=2000)
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    print(f"{'rows':>8}{'cold s':>8}{'warm s':>8}{'index MB':>9}{'alloc MB':>9}{'hits':>7}{'check us':>10}"
+          f"{'scan ms':>9}{'append us':>10}{'update us':>10}{'delete us':>10}")
+    for n in args.rows:
+        stats, allocated, hits, check_us, scan_ms, append_us, update_us, delete_us = bench(n, args.checks, rnd)
+        print(f"{n:>8}{stats['cold_seconds']:>8.3f}{stats['build_seconds']:>8.3f}{stats['memory_bytes'] / 1e6:>9.1f}"
+              f"{allocated / 1e6:>9.1f}"
+              f"{hits:>7}{check_us:>10.1f}{scan_ms:>9.1f}{append_us:>10.1f}{update_us:>10.1f}{delete_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
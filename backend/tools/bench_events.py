@@ -0,0 +1,183 @@
+# backend/tools/bench_events.py
+# What the dashboard's live change feed (backend/admin/events.py) costs.
+#   python backend/tools/bench_events.py
+#   python backend/tools/bench_events.py --rows 10000 100000 --streams 200 --latency 0.05
+# "feed" runs a ChangeFeed in-process over a FakeWorksheet (with an ID column)
+# and reports, per sheet size: Sheets calls and time of an idle poll round
+# (next to re-reading the rows every round, the plain polling alternative),
+# of noticing a write made through this process, of the next source probe
+# (which must not pull again for that write: "own probe"), of one made in the
+# sheet itself, and the diff of one changed row. "streams" serves the app with
+# gunicorn (one worker, each worker class), opens --streams SSE connections,
+# times /about while they are held, then updates a row and times until every
+# stream has the "updated" event.
+import argparse, asyncio, os, random, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.tools.loadtest import ADMIN_PASSWORD, HEADERS, fake_rows, pct, start_gunicorn  # noqa: E402
+
+
+def calls_of(ws, fn):
+    before = dict(ws.calls)
+    t0 = time.perf_counter()
+    out = fn()
+    ms = (time.perf_counter() - t0) * 1000
+    return out, {k: n - before.get(k, 0) for k, n in ws.calls.items() if n - before.get(k, 0)}, ms
+
+
+def fmt_calls(calls):
+    return " ".join(f"{k}={n}" for k, n in sorted(calls.items())) or "-"
+
+
+# ---- in-process feed ----
+def bench_feed(rows, latency):
+    os.environ.update(SHEET_URL="", SHEET_MIRROR_DB="", STORAGE_BACKEND="sheets")
+    from backend.admin import events, storage
+    from backend.admin.cache import record_cache
+    from backend.admin.fakes import FakeWorksheet, install_fake_sheets
+    from gspread.utils import rowcol_to_a1
+
+    ws = FakeWorksheet(["ID"] + HEADERS, ([f"r{i:011x}"] + r for i, r in enumerate(fake_rows(rows))),
+                       latency=latency)
+    install_fake_sheets(ws)
+    record_cache.invalidate()
+    store = storage.get_storage()
+    feed = events.ChangeFeed(get_store=lambda: store)
+    feed.poll()  # baseline
+    feed._probe_at = 0.0
+
+    def probe_round():
+        feed._probe_at = 0.0  # make the source token due, as every EVENTS_POLL_INTERVAL
+        return feed.poll()
+
+    out = {}
+    out["idle"] = calls_of(ws, probe_round)
+    out["naive"] = calls_of(ws, lambda: ws.get_all_records())
+    out["tick"] = calls_of(ws, feed.poll)  # between probes: the local token only
+
+    values = [store.get(3)[h] for h in ["ID"] + HEADERS]
+    values[-1] = "edited here"
+    store.update(3, values)
+    out["local"] = calls_of(ws, feed.poll)
+    out["own probe"] = calls_of(ws, probe_round)  # the write moved the source token too
+
+    ws.update(rowcol_to_a1(5, len(values)), [["edited in the sheet"]])  # behind the record cache's back
+    out["external"] = calls_of(ws, probe_round)
+
+    records, _ = store.snapshot()
+    old = list(records)
+    new = list(old)
+    new[len(new) // 2] = dict(new[len(new) // 2], Notes="x")
+    t0 = time.perf_counter()
+    changes = events.diff_records(old, new)
+    diff_ms = (time.perf_counter() - t0) * 1000
+    assert len(changes) == 1, changes
+    return out, diff_ms
+
+
+def feed_report(sizes, latency):
+    print(f"{'rows':>8}  {'round':<11}{'published':>10}{'ms':>9}  calls")
+    for rows in sizes:
+        out, diff_ms = bench_feed(rows, latency)
+        for name in ("tick", "idle", "naive", "local", "own probe", "external"):
+            published, calls, ms = out[name]
+            published = "" if name == "naive" else published
+            print(f"{rows:>8}  {name:<11}{published:>10}{ms:>9.1f}  {fmt_calls(calls)}")
+        print(f"{rows:>8}  {'diff 1':<11}{1:>10}{diff_ms:>9.2f}")
+
+
+# ---- SSE streams under gunicorn ----
+async def hold_streams(base, count, seconds):
+    import aiohttp
+
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=None)
+    jar = aiohttp.CookieJar(unsafe=True)  # keep cookies from 127.0.0.1
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(timeout=timeout, cookie_jar=jar, connector=connector) as s:
+        async with s.post(base + "/admin/login", data={"username": "admin", "password": ADMIN_PASSWORD},
+                          allow_redirects=False) as r:
+            if "/login" in r.headers.get("Location", "/login"):
+                raise RuntimeError("admin login failed")
+        live, refused, got = [], [0], {}
+        hello = asyncio.Event()
+
+        async def listen(i):
+            async with s.get(base + "/admin/events") as r:
+                buf = b""
+                async for chunk in r.content.iter_any():
+                    buf += chunk
+                    if b"event: hello" in buf and i not in live:
+                        live.append(i)
+                        if len(live) + refused[0] == count:
+                            hello.set()
+                    if b"event: updated" in buf:
+                        got[i] = time.perf_counter()
+                        return
+            if i not in live:  # the server said "retry later" and closed
+                refused[0] += 1
+                if len(live) + refused[0] == count:
+                    hello.set()
+
+        tasks = [asyncio.ensure_future(listen(i)) for i in range(count)]
+        try:
+            await asyncio.wait_for(hello.wait(), 30)
+        except asyncio.TimeoutError:
+            pass
+        latencies = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            async with s.get(base + "/about") as r:
+                await r.read()
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        data = {"sheet_row": 2}
+        for i, h in enumerate(["ID"] + HEADERS):
+            data[f"header_{i}"] = h
+            data[f"field_{i}"] = f"updated {random.random()}" if h == "Notes" else ""
+        t0 = time.perf_counter()
+        async with s.post(base + "/admin/update", data=data, allow_redirects=False) as r:
+            assert r.status < 400, r.status
+        await asyncio.wait(tasks, timeout=seconds)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        delays = [(t - t0) * 1000 for t in got.values()]
+        return len(live), refused[0], latencies, delays
+
+
+def streams_report(count, threads, latency):
+    from werkzeug.security import generate_password_hash
+
+    env = dict(os.environ, LOADTEST_ROWS="2000", LOADTEST_LATENCY=str(latency),
+               ADMIN_USERNAME="admin", ADMIN_PASSWORD_HASH=generate_password_hash(ADMIN_PASSWORD),
+               FLASK_SECRET="bench", SHEET_URL="", SHEET_MIRROR_DB="",
+               LOGIN_MAX_PER_IP="100000", LOGIN_MAX_PER_USER="100000", EVENTS_POLL_INTERVAL="1")
+    print(f"\n{'worker':<9}{'streams':>8}{'live':>6}{'refused':>8}{'about p50':>10}{'p95 ms':>8}"
+          f"{'delivered':>10}{'p50 ms':>8}{'max ms':>8}")
+    for worker_class in ("gthread", "asgi"):
+        proc, base = start_gunicorn(1, threads, env, worker_class=worker_class)
+        try:
+            live, refused, about, delays = asyncio.run(hold_streams(base, count, 10))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+        print(f"{worker_class:<9}{count:>8}{live:>6}{refused:>8}{pct(about, .5):>10.1f}{pct(about, .95):>8.1f}"
+              f"{len(delays):>10}{pct(delays, .5):>8.0f}{max(delays, default=0):>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[2000, 20000, 100000])
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake Sheets call")
+    parser.add_argument("--streams", type=int, default=100, help="SSE connections to hold (0 skips)")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    feed_report(args.rows, args.latency)
+    if args.streams:
+        streams_report(args.streams, args.threads, args.latency)
+
+
+if __name__ == "__main__":
+    main()
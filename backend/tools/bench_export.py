@@ -0,0 +1,71 @@
+# backend/tools/bench_export.py
+# Memory and Sheets calls of the streaming export (backend/export.py) as the sheet grows.
+#   python backend/tools/bench_export.py
+#   python backend/tools/bench_export.py --rows 1000 10000 100000 --formats csv xlsx
+# For each size, a FakeWorksheet is exported through /collections/export.<fmt>
+# twice: "range" with a cold record cache (bounded range reads) and "cached"
+# after the record cache is loaded. Reports the peak Python allocation while
+# streaming (tracemalloc, the worksheet itself excluded), bytes sent, Sheets
+# calls, and whether a repeat request with the ETag gets a 304.
+import argparse, os, sys, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.tools.loadtest import HEADERS, fake_rows  # noqa: E402
+
+
+def build():
+    os.environ.update(SHEET_URL="", SHEET_MIRROR_DB="", PAGE_CACHE_PRERENDER="0", START_NODE="0",
+                      STORAGE_BACKEND="sheets")
+    from backend.admin.fakes import FakeWorksheet, install_fake_sheets
+
+    ws = FakeWorksheet(HEADERS, [])
+    install_fake_sheets(ws)
+    from backend.app import create_app
+
+    return ws, create_app().test_client()
+
+
+def export(client, ws, fmt):
+    before = dict(ws.calls)
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+    r = client.get(f"/collections/export.{fmt}")
+    nbytes = sum(len(chunk) for chunk in r.response)  # consume the stream chunk by chunk
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    calls = {k: v - before.get(k, 0) for k, v in ws.calls.items() if v - before.get(k, 0)}
+    etag = r.headers.get("ETag")
+    again = client.get(f"/collections/export.{fmt}", headers={"If-None-Match": etag}).status_code if etag else None
+    return peak - base, nbytes, seconds, calls, again
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="*", default=[1000, 10000, 50000])
+    parser.add_argument("--formats", nargs="*", default=["csv", "ndjson", "xlsx"])
+    args = parser.parse_args()
+
+    ws, client = build()
+    from backend.admin.cache import record_cache
+    from backend.export import exporter
+
+    print(f"{'rows':>7} {'fmt':<7}{'source':<8}{'peak KiB':>10}{'MB out':>8}{'s':>7}  {'repeat':<7}sheets calls")
+    for n in args.rows:
+        ws._values[1:] = [list(r) for r in fake_rows(n)]
+        exporter.invalidate()  # the rows changed behind the app's back
+        for fmt in args.formats:
+            for source in ("range", "cached"):
+                record_cache.invalidate()
+                if source == "cached":
+                    ws.get_all_records()  # the worksheet's own copy, outside the measurement
+                    record_cache.get(("fake-sheet", "Sheet1"), ws.get_all_records)
+                peak, nbytes, seconds, calls, again = export(client, ws, fmt)
+                print(f"{n:>7} {fmt:<7}{source:<8}{peak / 1024:>10.0f}{nbytes / 1e6:>8.1f}{seconds:>7.2f}  "
+                      f"{again or '-':<7}{calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# backend/tools/bench_firstreq.py
+# First-request penalty of a fresh gunicorn worker, with and without gunicorn.conf.py.
+#   python backend/tools/bench_firstreq.py
+#   python backend/tools/bench_firstreq.py --rows 5000 --latency 0.1 --connect-latency 0.8 --repeat 7
+# Each mode boots one worker serving backend.tools.loadtest:build_app() (fake
+# Sheets with per-call and first-connect latency), waits until it answers a
+# probe for a missing URL, then times the first hit on each route against the
+# median of --repeat later hits. "plain" is the old `gunicorn -w N -k gthread`
+# command line; "conf" adds -c gunicorn.conf.py (preload + per-worker warm-up).
+import argparse, os, statistics, subprocess, sys, tempfile, time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.tools.loadtest import ADMIN_PASSWORD, ROOT, _free_port  # noqa: E402
+
+ROUTES = ["/about", "/", "/collections", "/admin/"]
+MODES = {"plain": None, "conf": ROOT / "gunicorn.conf.py"}
+
+
+def boot(config, env):
+    port = _free_port()
+    cmd = [sys.executable, "-m", "gunicorn", "--chdir", str(ROOT), "-w", "1", "-k", "gthread",
+           "--threads", "4", "-b", f"127.0.0.1:{port}", "--log-level", "warning",
+           "backend.tools.loadtest:build_app()"]
+    if config:
+        cmd[3:3] = ["-c", str(config)]
+    # Started outside the repo so gunicorn does not pick up ./gunicorn.conf.py on its own.
+    proc = subprocess.Popen(cmd, env=env, cwd=tempfile.gettempdir())
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.monotonic()
+    while time.monotonic() - t0 < 60:
+        try:
+            requests.get(base + "/__ready__", timeout=30)  # a 404: no template, no Sheets
+            return proc, base, time.monotonic() - t0
+        except requests.RequestException:
+            if proc.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {proc.returncode}")
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not come up within 60s")
+
+
+def hit(s, base, route):
+    t0 = time.perf_counter()
+    r = s.get(base + route)
+    r.raise_for_status()
+    return (time.perf_counter() - t0) * 1000
+
+
+def measure(mode, env, repeat):
+    proc, base, boot_s = boot(MODES[mode], env)
+    try:
+        s = requests.Session()
+        s.post(base + "/admin/login", data={"username": "admin", "password": ADMIN_PASSWORD}, allow_redirects=False)
+        first = {route: hit(s, base, route) for route in ROUTES}
+        later = {route: statistics.median(hit(s, base, route) for _ in range(repeat)) for route in ROUTES}
+        s.close()
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=35)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return boot_s, first, later
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake Sheets call")
+    parser.add_argument("--connect-latency", type=float, default=0.5, help="seconds for the first Sheets connect")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--modes", nargs="*", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    from werkzeug.security import generate_password_hash
+
+    env = dict(os.environ, LOADTEST_ROWS=str(args.rows), LOADTEST_LATENCY=str(args.latency),
+               LOADTEST_CONNECT_LATENCY=str(args.connect_latency),
+               ADMIN_USERNAME="admin", ADMIN_PASSWORD_HASH=generate_password_hash(ADMIN_PASSWORD),
+               FLASK_SECRET="bench", SHEET_URL="", SHEET_MIRROR_DB="", PAGE_CACHE_PRERENDER="0")
+
+    print(f"{'mode':<7}{'route':<14}{'first ms':>10}{'later ms':>10}{'penalty ms':>12}")
+    for mode in args.modes:
+        boot_s, first, later = measure(mode, env, args.repeat)
+        for route in ROUTES:
+            print(f"{mode:<7}{route:<14}{first[route]:>10.1f}{later[route]:>10.1f}{first[route] - later[route]:>12.1f}")
+        print(f"{mode:<7}{'(boot)':<14}{boot_s * 1000:>10.0f}   first penalty total "
+              f"{sum(first.values()) - sum(later.values()):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
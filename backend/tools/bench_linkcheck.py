@@ -0,0 +1,105 @@
+# backend/tools/bench_linkcheck.py
+# Link checking (backend/admin/linkcheck.py) against local stand-in hosts.
+#   python backend/tools/bench_linkcheck.py
+#   python backend/tools/bench_linkcheck.py --hosts 8 --urls 400 --latency 0.1 --baseline 40
+# Starts --hosts FakeLinkServers (one host:port each) and spreads --urls paths
+# over them (mostly /ok, some /missing, /redirect, /nohead, /flaky). Reports:
+#   sequential  one blocking request at a time (urllib), timed on --baseline URLs and scaled up
+#   async       LinkChecker with a cold result cache
+#   ttl         the same run again: every result younger than the TTL, no requests
+#   revalidate  ttl=0: conditional requests, unchanged pages answer 304
+# and checks that no host ever saw more than --per-host requests at once. Then
+# writes the statuses into a FakeWorksheet with URL and "Link Status" columns
+# and counts the Sheets calls the write-back costs.
+import argparse, os, random, sys, time, urllib.error, urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault("SHEET_URL", "")
+from backend.admin.fakes import FakeLinkServer  # noqa: E402
+from backend.admin.linkcheck import LinkChecker, ResultCache, status_label, write_statuses  # noqa: E402
+
+KINDS = ["ok"] * 14 + ["missing", "redirect", "nohead", "flaky"]
+
+
+def make_urls(servers, n, rnd):
+    return [f"{servers[i % len(servers)].base}/{rnd.choice(KINDS)}/page{i}" for i in range(n)]
+
+
+def sequential(urls):
+    t0 = time.perf_counter()
+    for url in urls:
+        req = urllib.request.Request(url, method="HEAD")
+        try:
+            urllib.request.urlopen(req, timeout=15).close()
+        except urllib.error.HTTPError:
+            pass
+    return time.perf_counter() - t0
+
+
+def run(label, checker, urls, servers):
+    before = sum(sum(s.requests.values()) for s in servers)
+    results = checker.check(urls)
+    sent = sum(sum(s.requests.values()) for s in servers) - before
+    s = checker.stats
+    broken = sum(not r["ok"] for r in results.values())
+    print(f"{label:<12}{s['seconds']:>9.2f}{sent:>10}{s['cached']:>8}{s['revalidated']:>12}{s['retries']:>9}{broken:>8}")
+    return results
+
+
+def write_back(urls, results):
+    from backend.admin.fakes import FakeWorksheet, install_fake_sheets
+    from backend.admin.storage import get_storage
+
+    ws = FakeWorksheet(["Title", "URL", "Link Status"], ([f"Resource {i}", u, ""] for i, u in enumerate(urls)))
+    install_fake_sheets(ws)
+    store = get_storage()
+    store.snapshot()  # the dashboard has usually loaded the rows already
+    for label, expect in (("first", None), ("repeat", 0)):
+        before = dict(ws.calls)
+        written = write_statuses(store, results)
+        calls = {k: v - before.get(k, 0) for k, v in ws.calls.items() if v - before.get(k, 0)}
+        print(f"write-back ({label}): {written} cells, Sheets calls {calls or '{}'}")
+        assert expect is None or written == expect
+    labels = {status_label(r) for r in results.values()}
+    assert {row[2] for row in ws.get_all_values()[1:]} <= labels
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--urls", type=int, default=240)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake response")
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--baseline", type=int, default=40, help="URLs timed for the sequential baseline")
+    args = parser.parse_args()
+
+    servers = [FakeLinkServer(latency=args.latency) for _ in range(args.hosts)]
+    rnd = random.Random(1)
+    urls = make_urls(servers, args.urls, rnd)
+    try:
+        sample = [u.replace("/flaky/", "/ok/") for u in urls[:args.baseline]]
+        seq = sequential(sample) * len(urls) / max(1, len(sample))
+        print(f"{'run':<12}{'seconds':>9}{'requests':>10}{'cached':>8}{'revalidated':>12}{'retries':>9}{'broken':>8}")
+        print(f"{'sequential':<12}{seq:>9.2f}{'~' + str(len(urls)):>10}  (scaled from {len(sample)} URLs)")
+
+        cache = ResultCache(":memory:")
+        opts = dict(concurrency=args.concurrency, per_host=args.per_host, host_interval=args.interval, cache=cache)
+        results = run("async", LinkChecker(**opts), urls, servers)
+        run("ttl", LinkChecker(**opts), urls, servers)
+        run("revalidate", LinkChecker(ttl=0, **opts), urls, servers)
+
+        peak = max(s.max_in_flight for s in servers)
+        conns = sum(s.connections for s in servers)
+        print(f"max in flight per host: {peak} (limit {args.per_host}); TCP connections opened: {conns}")
+        assert peak <= args.per_host
+        write_back(urls, results)
+    finally:
+        for s in servers:
+            s.stop()
+
+
+if __name__ == "__main__":
+    main()
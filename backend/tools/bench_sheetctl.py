@@ -0,0 +1,70 @@
+# backend/tools/bench_sheetctl.py
+# Cleaning test rows out of a sheet: the old one-row-at-a-time loop vs. sheetctl.
+#   python backend/tools/bench_sheetctl.py
+#   python backend/tools/bench_sheetctl.py --rows 5000 --test-rows 1000 --latency 0.05
+# A FakeWorksheet (each call sleeping --latency, like a Sheets round trip) holds
+# --rows catalog rows with --test-rows "TEST via API" rows scattered among them.
+# "per-row" repeats what gs_delete_test_row.py did (findall, delete the first
+# hit) until none are left; "sheetctl" runs `sheetctl.py delete --where`. Both
+# end with the same sheet; reports Sheets calls and wall time for each.
+import argparse, io, os, random, sys, time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.environ.update(SHEET_URL="", SHEET_MIRROR_DB="", STORAGE_BACKEND="sheets")
+from backend.tools.loadtest import HEADERS, fake_rows  # noqa: E402
+
+TEST_ROW = ["TEST via API", "https://example.com", "Developers", "", "", "", "", "", "", "", "Draft", "Temp row"]
+
+
+def make_sheet(rows, test_rows, latency):
+    from backend.admin.fakes import FakeWorksheet
+
+    values = list(fake_rows(rows))
+    for i in sorted(random.Random(2).sample(range(rows), test_rows), reverse=True):
+        values.insert(i, list(TEST_ROW))
+    return FakeWorksheet(HEADERS, values, latency=latency)
+
+
+def per_row(ws):
+    while True:
+        col = [r[0] for r in ws.get_all_values()]  # what findall(in_column=1) reads
+        if "TEST via API" not in col:
+            return
+        ws.delete_rows(col.index("TEST via API") + 1)
+
+
+def with_sheetctl(ws):
+    from backend.admin.cache import record_cache
+    from backend.admin.fakes import install_fake_sheets
+    from backend.metrics import instrument_worksheet
+    from backend.tools import sheetctl
+
+    record_cache.invalidate()
+    install_fake_sheets(instrument_worksheet(ws))
+    with redirect_stdout(io.StringIO()):
+        sheetctl.main(["delete", "--where", "Title=TEST via API"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--test-rows", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per fake Sheets call")
+    args = parser.parse_args()
+
+    expected = [[str(v) for v in r] for r in fake_rows(args.rows)]
+    print(f"{args.rows} rows + {args.test_rows} scattered test rows, {args.latency * 1000:.0f} ms per call")
+    print(f"{'method':<10}{'calls':>7}{'seconds':>9}  by method")
+    for name, fn in (("per-row", per_row), ("sheetctl", with_sheetctl)):
+        ws = make_sheet(args.rows, args.test_rows, args.latency)
+        t0 = time.perf_counter()
+        fn(ws)
+        seconds = time.perf_counter() - t0
+        assert ws._values[1:] == expected, name
+        print(f"{name:<10}{sum(ws.calls.values()):>7}{seconds:>9.2f}  {dict(sorted(ws.calls.items()))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# backend/tools/bench_startup.py
+# Cold-start check: import profile of backend.app and time to first response.
+#   python backend/tools/bench_startup.py                      (5 runs, 1500 ms budget)
+#   python backend/tools/bench_startup.py --runs 10 --budget-ms 800 --path /about
+# Each run is a fresh interpreter that imports backend.app, calls create_app()
+# and serves one GET through the test client. Exits 1 when the median
+# time-to-first-response exceeds --budget-ms, or when `-X importtime` shows a
+# module that must stay out of startup (gspread, google-auth, the mail stack).
+import argparse, os, statistics, subprocess, sys, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Admin/mail dependencies that anonymous pages must not pay for at import time.
+FORBIDDEN = ("gspread", "google.auth", "google.oauth2", "google_auth_oauthlib", "smtplib", "backend.admin.storage")
+
+FIRST_RESPONSE = """
+import backend.app as m
+app = m.create_app() if hasattr(m, "create_app") else m.app  # older trees have no factory
+r = app.test_client().get({path!r})
+assert r.status_code < 500, r.status_code
+"""
+
+
+def child_env():
+    # No Sheets, mirror, Node or pre-rendering: measure the app itself.
+    return dict(os.environ, PYTHONPATH=str(ROOT), SHEET_URL="", SHEET_MIRROR_DB="", START_NODE="0",
+                PAGE_CACHE_PRERENDER="0")
+
+
+def import_profile():
+    """[(module, self_us, cumulative_us)] from `python -X importtime -c 'import backend.app'`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import backend.app"], cwd=ROOT,
+                          env=child_env(), capture_output=True, text=True, check=True)
+    out = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        out.append((name.strip(), int(self_us), int(cum_us)))
+    return out
+
+
+def first_response_ms(path):
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", FIRST_RESPONSE.format(path=path)], cwd=ROOT, env=child_env(), check=True)
+    return (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/about", help="route requested by the first response")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="max median time-to-first-response")
+    parser.add_argument("--top", type=int, default=12, help="slowest imports to list")
+    args = parser.parse_args()
+
+    profile = import_profile()
+    app_total = next((cum for name, _, cum in profile if name == "backend.app"), 0)
+    print(f"import backend.app: {app_total / 1000:.1f} ms cumulative, {len(profile)} modules")
+    for name, self_us, cum_us in sorted(profile, key=lambda m: -m[1])[:args.top]:
+        print(f"  {self_us / 1000:>8.1f} ms self {cum_us / 1000:>8.1f} ms cum  {name}")
+    leaked = sorted({name for name, _, _ in profile if name.startswith(FORBIDDEN)})
+
+    first_response_ms(args.path)  # warm the OS file cache and .pyc files
+    samples = [first_response_ms(args.path) for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"time to first response ({args.path}): median {median:.0f} ms, "
+          f"min {min(samples):.0f} ms, max {max(samples):.0f} ms over {args.runs} runs")
+
+    failed = False
+    if leaked:
+        print(f"FAIL: imported at startup: {', '.join(leaked[:10])}{' ...' if len(leaked) > 10 else ''}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: median {median:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+# backend/tools/bench_storage.py
+# Write/read throughput of the admin storage engines (backend/admin/storage.py).
+#   python backend/tools/bench_storage.py                    (memory + sqlite, 20k ops)
+#   python backend/tools/bench_storage.py --ops 5000 --engines sqlite
+import argparse, os, random, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.admin.storage import DEFAULT_HEADERS, MemoryStorage, SQLiteStorage  # noqa: E402
+
+
+def make(engine, path):
+    return SQLiteStorage(path) if engine == "sqlite" else MemoryStorage()
+
+
+def row(rnd, i):
+    return [f"Resource {i}", f"https://example.org/r/{i}"] + [rnd.choice("abcdef") * 5 for _ in DEFAULT_HEADERS[2:]]
+
+
+def bench(engine, ops, path):
+    store = make(engine, path)
+    rnd = random.Random(1)
+    results = {}
+
+    def timed(name, n, fn):
+        t0 = time.perf_counter()
+        fn()
+        results[name] = n / (time.perf_counter() - t0)
+
+    timed("append", ops, lambda: [store.append(row(rnd, i)) for i in range(ops)])
+    timed("append_many", ops, lambda: store.append_many([row(rnd, i) for i in range(ops)]))
+    total = 2 * ops
+    timed("update", ops, lambda: [store.update(rnd.randint(2, total + 1), row(rnd, 0)) for _ in range(ops)])
+    timed("page (sorted)", 200, lambda: [store.page(rnd.randint(1, 50), 50, sort="Title", order="desc")
+                                         for _ in range(200)])
+    timed("delete", ops // 4, lambda: [store.delete(rnd.randint(2, total - ops // 4)) for _ in range(ops // 4)])
+
+    print(f"\n== {engine} ({ops:,} ops)")
+    for name, rate in results.items():
+        print(f"{name:<16}{rate:>12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument("--engines", nargs="*", default=["memory", "sqlite"], choices=["memory", "sqlite"])
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for engine in args.engines:
+            bench(engine, args.ops, os.path.join(tmp, f"{engine}.sqlite3"))
@@ -0,0 +1,98 @@
+# backend/tools/bench_templates.py
+# Time to first render per route, with templates compiled from source vs. from
+# the precompiled bytecode (backend/tools/build_templates.py, backend/templating.py).
+#   python backend/tools/bench_templates.py
+#   python backend/tools/bench_templates.py --runs 5 --routes /about /admin/
+# Builds the bytecode into a temporary directory, then for each mode and route
+# starts fresh interpreters that import the app (fake Sheets, no pre-rendering)
+# and time its first GET of the route - what a new worker's first visitor
+# waits for, template compilation included - and a second GET for reference.
+# "warm-up" is the per-worker compile_templates() step of backend/warmup.py.
+import argparse, json, statistics, subprocess, sys, tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.tools.bench_startup import child_env  # noqa: E402
+from backend.tools.loadtest import ADMIN_PASSWORD, ROOT  # noqa: E402
+
+ROUTES = ["/", "/about", "/impacts", "/sustainability", "/community", "/other", "/contact", "/collections",
+          "/admin/login", "/admin/"]
+
+FIRST_RENDER = """
+import json, sys, time
+from backend.tools.loadtest import ADMIN_PASSWORD, HEADERS, fake_rows
+from backend.admin.fakes import FakeWorksheet, install_fake_sheets
+
+install_fake_sheets(FakeWorksheet(HEADERS, fake_rows(100)))
+from backend.app import create_app
+
+app = create_app()
+route = sys.argv[1]
+if route == "warm-up":
+    from backend.warmup import compile_templates
+
+    t0 = time.perf_counter()
+    compile_templates(app)
+    print(json.dumps({"first": time.perf_counter() - t0, "second": 0.0}))
+    sys.exit()
+client = app.test_client()
+if route.startswith("/admin/") and route != "/admin/login":
+    r = client.post("/admin/login", data={"username": "admin", "password": ADMIN_PASSWORD})
+    assert r.status_code == 302, "admin login failed"
+times = []
+for _ in range(2):
+    t0 = time.perf_counter()
+    r = client.get(route)
+    times.append(time.perf_counter() - t0)
+    assert r.status_code == 200, (route, r.status_code)
+print(json.dumps({"first": times[0], "second": times[1]}))
+"""
+
+
+def env_for(bytecode_dir):
+    from werkzeug.security import generate_password_hash
+
+    return dict(child_env(), TEMPLATES_BYTECODE_DIR=str(bytecode_dir), STORAGE_BACKEND="sheets",
+                ADMIN_USERNAME="admin", ADMIN_PASSWORD_HASH=generate_password_hash(ADMIN_PASSWORD),
+                FLASK_SECRET="bench", LOGIN_MAX_PER_IP="100000", WARMUP_SHEETS="0")
+
+
+def render_ms(route, env):
+    proc = subprocess.run([sys.executable, "-c", FIRST_RENDER, route], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+    return out["first"] * 1000, out["second"] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per route and mode (median)")
+    parser.add_argument("--routes", nargs="+", default=ROUTES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="templates-bytecode-") as tmp:
+        bytecode = Path(tmp) / "bytecode"
+        subprocess.run([sys.executable, str(ROOT / "backend" / "tools" / "build_templates.py")], cwd=ROOT,
+                       env=dict(child_env(), TEMPLATES_BYTECODE_DIR=str(bytecode)), check=True)
+        modes = {"source": env_for(Path(tmp) / "missing"), "bytecode": env_for(bytecode)}
+        render_ms("/about", modes["source"])  # warm the OS file cache and .pyc files
+
+        print(f"\n{'route':<16}{'source ms':>10}{'bytecode ms':>12}{'saved':>8}{'then ms':>9}")
+        totals = {mode: 0.0 for mode in modes}
+        for route in args.routes + ["warm-up"]:
+            first, second = {}, {}
+            for mode, env in modes.items():
+                samples = [render_ms(route, env) for _ in range(args.runs)]
+                first[mode] = statistics.median(s[0] for s in samples)
+                second[mode] = statistics.median(s[1] for s in samples)
+                if route != "warm-up":
+                    totals[mode] += first[mode]
+            saved = 1 - first["bytecode"] / first["source"] if first["source"] else 0.0
+            then = f"{second['bytecode']:>9.1f}" if route != "warm-up" else ""
+            print(f"{route:<16}{first['source']:>10.1f}{first['bytecode']:>12.1f}{saved:>8.0%}{then}")
+        print(f"{'sum of routes':<16}{totals['source']:>10.1f}{totals['bytecode']:>12.1f}"
+              f"{1 - totals['bytecode'] / totals['source']:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
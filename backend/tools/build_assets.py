@@ -0,0 +1,67 @@
+# backend/tools/build_assets.py
+# Fingerprint backend/static by content hash and precompress text assets.
+#   python backend/tools/build_assets.py
+# Writes backend/assets-manifest.json (read by backend/assets.py) and
+# .gz / .br siblings next to compressible files. Brotli is optional
+# (pip install brotli); without it only gzip siblings are written.
+import gzip, hashlib, json, re, sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional, build-time only
+    brotli = None
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+STATIC_DIR = BACKEND_DIR / "static"
+MANIFEST = BACKEND_DIR / "assets-manifest.json"
+
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".xml", ".ico", ".map"}
+MIN_COMPRESS_BYTES = 512
+# Files whose names already carry a content hash (e.g. images/variants/*) are left as-is.
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$")
+
+
+def _compress(path: Path, data: bytes) -> list:
+    encodings = []
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            path.with_name(path.name + ".br").write_bytes(br)
+            encodings.append("br")
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        path.with_name(path.name + ".gz").write_bytes(gz)
+        encodings.append("gzip")
+    return encodings
+
+
+def build():
+    files = {}
+    saved = 0
+    for path in sorted(STATIC_DIR.rglob("*")):
+        if not path.is_file() or path.suffix in (".gz", ".br"):
+            continue
+        rel = path.relative_to(STATIC_DIR).as_posix()
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if HASHED_NAME_RE.search(path.name):
+            hashed = rel
+        else:
+            hashed = (path.with_name(f"{path.stem}.{digest[:10]}{path.suffix}")).relative_to(STATIC_DIR).as_posix()
+        entry = {"hashed": hashed, "etag": digest[:32], "bytes": len(data), "encodings": []}
+        if path.suffix.lower() in COMPRESSIBLE and len(data) >= MIN_COMPRESS_BYTES:
+            entry["encodings"] = _compress(path, data)
+            if entry["encodings"]:
+                best = min((path.with_name(path.name + (".br" if e == "br" else ".gz")).stat().st_size
+                            for e in entry["encodings"]))
+                saved += len(data) - best
+        files[rel] = entry
+
+    MANIFEST.write_text(json.dumps({"files": files}, indent=2, sort_keys=True))
+    print(f"Fingerprinted {len(files)} files; precompression saves {saved / 1024:.0f} KB "
+          f"({'brotli+gzip' if brotli else 'gzip only'}). Wrote {MANIFEST}")
+
+
+if __name__ == "__main__":
+    sys.exit(build())
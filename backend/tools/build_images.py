@@ -0,0 +1,94 @@
+# backend/tools/build_images.py
+# Build width-bucketed JPEG/WebP/AVIF variants of backend/static/images/*.jpg
+# plus a content-hashed manifest read by backend/images.py.
+#   python backend/tools/build_images.py            (run at image build time)
+#   python backend/tools/build_images.py --force    (rebuild everything)
+# Requires Pillow (build-time only). AVIF is skipped if this Pillow lacks it.
+import argparse, hashlib, io, json, sys
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+STATIC_DIR = Path(__file__).resolve().parents[1] / "static"
+SOURCE_DIR = STATIC_DIR / "images"
+OUT_DIR = SOURCE_DIR / "variants"
+MANIFEST = OUT_DIR / "manifest.json"
+
+WIDTHS = (320, 480, 640, 960, 1280, 1920)
+FORMATS = {
+    # name: (Pillow format, extension, save options)
+    "avif": ("AVIF", "avif", {"quality": 50}),
+    "webp": ("WEBP", "webp", {"quality": 75, "method": 6}),
+    "jpeg": ("JPEG", "jpg", {"quality": 78, "optimize": True, "progressive": True}),
+}
+
+
+def _digest(data: bytes, n=10) -> str:
+    return hashlib.sha256(data).hexdigest()[:n]
+
+
+def _available_formats():
+    out = {}
+    for name, spec in FORMATS.items():
+        if name == "avif" and not features.check("avif"):
+            print("[WARN] Pillow has no AVIF support; skipping AVIF variants.")
+            continue
+        out[name] = spec
+    return out
+
+
+def build(force=False):
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    old = json.loads(MANIFEST.read_text()) if MANIFEST.exists() and not force else {}
+    formats = _available_formats()
+    manifest = {}
+    total_in = total_out = 0
+
+    for src in sorted(SOURCE_DIR.glob("*.jp*g")):
+        raw = src.read_bytes()
+        key = src.relative_to(STATIC_DIR).as_posix()
+        source_hash = _digest(raw, 16)
+        prev = old.get(key)
+        if prev and prev.get("source_hash") == source_hash and all(
+            (STATIC_DIR / v["src"]).exists() for vs in prev["variants"].values() for v in vs
+        ):
+            manifest[key] = prev
+            continue
+
+        with Image.open(io.BytesIO(raw)) as im:
+            im = ImageOps.exif_transpose(im).convert("RGB")
+            width, height = im.size
+            widths = [w for w in WIDTHS if w < width] + [min(width, WIDTHS[-1])]
+            entry = {"source_hash": source_hash, "width": width, "height": height, "variants": {}}
+            for name, (fmt, ext, opts) in formats.items():
+                entry["variants"][name] = []
+                for w in sorted(set(widths)):
+                    h = round(height * w / width)
+                    buf = io.BytesIO()
+                    im.resize((w, h), Image.LANCZOS).save(buf, fmt, **opts)
+                    data = buf.getvalue()
+                    out = OUT_DIR / f"{src.stem}-{w}.{_digest(data)}.{ext}"
+                    out.write_bytes(data)
+                    entry["variants"][name].append({"w": w, "src": out.relative_to(STATIC_DIR).as_posix(), "bytes": len(data)})
+        manifest[key] = entry
+        smallest = min(v["bytes"] for vs in entry["variants"].values() for v in vs)
+        total_in += len(raw)
+        total_out += smallest
+        print(f"{key}: {len(raw) / 1024:.0f} KB -> {smallest / 1024:.0f} KB at {widths[0]}w")
+
+    # Drop variants no longer referenced by the manifest.
+    keep = {v["src"] for e in manifest.values() for vs in e["variants"].values() for v in vs}
+    for f in OUT_DIR.iterdir():
+        if f.name != MANIFEST.name and f.relative_to(STATIC_DIR).as_posix() not in keep:
+            f.unlink()
+
+    MANIFEST.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    if total_in:
+        print(f"Rebuilt images: {total_in / 1024:.0f} KB of originals, smallest variants {total_out / 1024:.0f} KB")
+    print(f"Wrote {MANIFEST}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--force", action="store_true", help="ignore the existing manifest")
+    sys.exit(build(parser.parse_args().force))
@@ -0,0 +1,69 @@
+# backend/tools/linkcheck.py
+# Check every URL in the catalog and record the result in its "Link Status" column.
+#   python backend/tools/linkcheck.py                       (check, write back, print broken links)
+#   python backend/tools/linkcheck.py --dry-run             (check and report only)
+#   python backend/tools/linkcheck.py --urls urls.txt       (one URL per line; nothing is written)
+#   python backend/tools/linkcheck.py --ttl 0 --per-host 4 --interval 0.1
+# Uses the configured storage engine (STORAGE_BACKEND, SHEET_URL, ...) and the
+# shared result cache (LINKCHECK_DB); see backend/admin/linkcheck.py.
+import argparse, sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+load_dotenv("backend/.env")
+load_dotenv(".env")
+
+from backend.admin import linkcheck as lc  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", help="file with one URL per line instead of the catalog")
+    parser.add_argument("--dry-run", action="store_true", help="do not write statuses back to the sheet")
+    parser.add_argument("--concurrency", type=int, default=lc.LINKCHECK_CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=lc.LINKCHECK_PER_HOST)
+    parser.add_argument("--interval", type=float, default=lc.LINKCHECK_HOST_INTERVAL,
+                        help="seconds between request starts to one host")
+    parser.add_argument("--timeout", type=float, default=lc.LINKCHECK_TIMEOUT)
+    parser.add_argument("--ttl", type=float, default=lc.LINKCHECK_TTL, help="reuse results younger than this")
+    parser.add_argument("--db", default=lc.LINKCHECK_DB, help="result cache (':memory:' for none)")
+    args = parser.parse_args()
+
+    store = None
+    if args.urls:
+        with open(args.urls, encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        from backend.admin.storage import get_storage
+
+        store = get_storage()
+        urls = lc.catalog_urls(store)
+
+    cache = lc.ResultCache(args.db)
+    checker = lc.LinkChecker(args.concurrency, args.per_host, args.interval, args.timeout, args.ttl, cache)
+    try:
+        results = checker.check(urls)
+    finally:
+        cache.close()
+
+    broken = sorted((r for r in results.values() if not r["ok"]), key=lambda r: r["url"])
+    s = checker.stats
+    print(f"{s['urls']} URLs in {s['seconds']}s: {s['urls'] - len(broken)} ok, {len(broken)} broken "
+          f"({s['cached']} cached, {s['requests']} requests, {s['revalidated']} revalidated, {s['retries']} retries)")
+    for r in broken:
+        print(f"  {lc.status_label(r):<24} {r['url']}")
+
+    if store is not None and not args.dry_run:
+        try:
+            written = lc.write_statuses(store, results)
+        except ValueError as e:
+            print(f"[WARN] {e} Nothing written.")
+        else:
+            print(f"Updated {written} {lc.LINKCHECK_STATUS_HEADER!r} cell(s).")
+    return 1 if broken else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
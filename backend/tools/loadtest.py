@@ -0,0 +1,298 @@
+# backend/tools/loadtest.py
+# Load test of the real backend.app:create_app() under gunicorn, with an in-memory fake
+# Sheets worksheet and a local SMTP sink instead of Google Sheets and Gmail.
+#   python backend/tools/loadtest.py                                  (2x1, 2x4, 4x4)
+#   python backend/tools/loadtest.py --configs 1x8 2x4 --rows 5000 --latency 0.15
+#   python backend/tools/loadtest.py --compare bench-results/loadtest-<old>.json
+#   python backend/tools/loadtest.py --worker-class asgi              (backend/asgi.py bridge)
+# A config WxT runs `gunicorn -w W -k gthread --threads T` (or `-k asgi` with T bridge threads). Every scenario runs for
+# --duration seconds with --concurrency client threads; throughput and p50/p95/p99
+# go to bench-results/loadtest-<timestamp>.json. --compare exits 1 when p95 grows
+# or throughput drops by more than --tolerance against an earlier run.
+import argparse, json, os, platform, random, socket, socketserver, subprocess, sys, tempfile, threading, time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+HEADERS = ["Title", "URL", "Target Audience", "Author(s)", "Publisher", "Date Published",
+           "Resource Theme", "Resource Type", "Keywords", "Language", "Status", "Notes"]
+WORDS = "air quality pollution ozone urban health asthma traffic emissions policy sensors climate".split()
+PUBLIC_PAGES = ["/", "/about", "/impacts", "/sustainability", "/community", "/other", "/collections"]
+ADMIN_PASSWORD = "loadtest"
+
+
+# ---- fakes (run inside each gunicorn worker) ----
+def fake_rows(n, seed=1):
+    rnd = random.Random(seed)
+    for i in range(n):
+        yield [" ".join(rnd.sample(WORDS, 4)).title() + f" {i}", f"https://example.org/r/{i}", "Public",
+               "", f"Publisher {i % 40}", "2024", rnd.choice(["Health", "Policy", "Impact"]),
+               "Report", ", ".join(rnd.sample(WORDS, 3)), "English", "", ""]
+
+
+def build_app():
+    """gunicorn entry point: backend.app:create_app() wired to a FakeWorksheet."""
+    from backend.admin.fakes import FakeWorksheet, install_fake_sheets
+
+    ws = FakeWorksheet(HEADERS, fake_rows(int(os.environ["LOADTEST_ROWS"])),
+                       latency=float(os.environ["LOADTEST_LATENCY"]))
+    install_fake_sheets(ws, connect_latency=float(os.getenv("LOADTEST_CONNECT_LATENCY", "0")))
+    from backend.app import create_app
+
+    return create_app()
+
+
+def build_asgi_app():
+    """The same, behind backend/asgi.py for gunicorn's asyncio worker."""
+    from backend.asgi import WSGIBridge
+
+    return WSGIBridge(build_app())
+
+
+# ---- SMTP sink ----
+class _SMTPSink(socketserver.StreamRequestHandler):
+    """Accepts EHLO/AUTH/MAIL/RCPT/DATA and discards the message."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 loadtest sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line.decode(errors="replace").strip().split(" ")[0].upper()
+            if verb == "EHLO":
+                self.reply("250-loadtest")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == "AUTH":
+                self.reply("235 ok")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                self.server.messages += 1
+                self.reply("250 queued")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # HELO, MAIL, RCPT, RSET, NOOP
+                self.reply("250 ok")
+
+
+def start_smtp_sink():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPSink)
+    server.daemon_threads = True
+    server.messages = 0
+    threading.Thread(target=server.serve_forever, name="smtp-sink", daemon=True).start()
+    return server
+
+
+# ---- server under test ----
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers, threads, env, config=ROOT / "gunicorn.conf.py", worker_class="gthread"):
+    """gunicorn with the production config file (or `config`), serving build_app() on a free port."""
+    port = _free_port()
+    if worker_class == "asgi":
+        env = dict(env, GUNICORN_WORKER_CLASS="asgi", GUNICORN_THREADS=str(threads))
+        server = ["-k", "asgi", "backend.tools.loadtest:build_asgi_app()"]
+    else:
+        env = dict(env, GUNICORN_WORKER_CLASS="gthread")
+        server = ["-k", "gthread", "--threads", str(threads), "backend.tools.loadtest:build_app()"]
+    cmd = [sys.executable, "-m", "gunicorn", "-c", str(config), "--chdir", str(ROOT), "-w", str(workers),
+           "-b", f"127.0.0.1:{port}", "--log-level", "warning"] + server
+    proc = subprocess.Popen(cmd, env=env)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base + "/about", timeout=1).status_code == 200:
+                return proc, base
+        except requests.RequestException:
+            pass
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {proc.returncode}")
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not come up within 30s")
+
+
+# ---- scenarios: fn(session, base, rnd, rows) -> response ----
+def _public(s, base, rnd, rows):
+    return s.get(base + rnd.choice(PUBLIC_PAGES))
+
+
+def _dashboard(s, base, rnd, rows):
+    return s.get(base + f"/admin/?page={rnd.randint(1, max(1, rows // 50))}")
+
+
+def _add(s, base, rnd, rows):
+    n = rnd.random()
+    return s.post(base + "/admin/add", data={"title": f"Load test {n}", "url": f"https://example.org/load/{n}"},
+                  allow_redirects=False)
+
+
+def _update(s, base, rnd, rows):
+    data = {"sheet_row": rnd.randint(2, rows + 1)}
+    for i, h in enumerate(HEADERS):
+        data[f"header_{i}"] = h
+        data[f"field_{i}"] = f"updated {rnd.random()}" if h == "Notes" else ""
+    return s.post(base + "/admin/update", data=data, allow_redirects=False)
+
+
+def _delete(s, base, rnd, rows):
+    return s.post(base + "/admin/delete", data={"sheet_row": rnd.randint(2, rows // 2)}, allow_redirects=False)
+
+
+def _contact(s, base, rnd, rows):
+    return s.post(base + "/contact", data={"name": "Load Test", "email": "lt@example.org", "message": "hello"},
+                  allow_redirects=False)
+
+
+SCENARIOS = {
+    "public": (_public, False),  # (fn, needs admin login)
+    "dashboard": (_dashboard, True),
+    "add": (_add, True),
+    "update": (_update, True),
+    "delete": (_delete, True),
+    "contact": (_contact, False),
+}
+
+
+def pct(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+def run_scenario(base, name, concurrency, duration, rows):
+    fn, admin = SCENARIOS[name]
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(seed):
+        rnd = random.Random(seed)
+        s = requests.Session()
+        if admin:
+            r = s.post(base + "/admin/login", data={"username": "admin", "password": ADMIN_PASSWORD},
+                       allow_redirects=False)
+            if "/login" in r.headers.get("Location", "/login"):
+                raise RuntimeError("admin login failed")
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            t0 = time.perf_counter()
+            try:
+                ok = fn(s, base, rnd, rows).status_code < 400
+            except requests.RequestException:
+                ok = False
+            local.append((time.perf_counter() - t0) * 1000)
+            failed += not ok
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(pct(latencies, .50), 2),
+        "p95_ms": round(pct(latencies, .95), 2),
+        "p99_ms": round(pct(latencies, .99), 2),
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    baseline = {(r["config"], r["scenario"]): r for r in json.loads(Path(baseline_path).read_text())["results"]}
+    regressions = 0
+    print(f"\n== vs {baseline_path}")
+    for r in results:
+        old = baseline.get((r["config"], r["scenario"]))
+        if not old:
+            continue
+        d_rps = (r["rps"] - old["rps"]) / old["rps"] if old["rps"] else 0.0
+        d_p95 = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0.0
+        bad = d_rps < -tolerance or d_p95 > tolerance
+        regressions += bad
+        print(f"{r['config']:<6}{r['scenario']:<11}rps {d_rps:+7.1%}  p95 {d_p95:+7.1%}{'  REGRESSION' if bad else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--configs", nargs="*", default=["2x1", "2x4", "4x4"], help="WORKERSxTHREADS")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--rows", type=int, default=2000, help="rows in the fake sheet")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every fake Sheets call")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--out", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="earlier results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--worker-class", choices=["gthread", "asgi"], default="gthread")
+    args = parser.parse_args()
+
+    from werkzeug.security import generate_password_hash
+
+    sink = start_smtp_sink()
+    spool = tempfile.mkdtemp(prefix="loadtest-")
+    env = dict(os.environ,
+               LOADTEST_ROWS=str(args.rows), LOADTEST_LATENCY=str(args.latency),
+               ADMIN_USERNAME="admin", ADMIN_PASSWORD_HASH=generate_password_hash(ADMIN_PASSWORD),
+               FLASK_SECRET="loadtest", SHEET_URL="", SHEET_MIRROR_DB="",
+               LOGIN_MAX_PER_IP="100000", LOGIN_MAX_PER_USER="100000", LOGIN_HASH_QUEUE="256",
+               SMTP_HOST="127.0.0.1", SMTP_PORT=str(sink.server_address[1]), SMTP_STARTTLS="0",
+               GMAIL_USER="sink@example.org", GMAIL_PASS="x", CONTACT_OUTBOX="0",
+               OUTBOX_DB=os.path.join(spool, "outbox.sqlite3"))
+
+    results = []
+    print(f"{'config':<8}{'scenario':<11}{'req':>7}{'err':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for config in args.configs:
+        workers, threads = (int(x) for x in config.lower().split("x"))
+        proc, base = start_gunicorn(workers, threads, env, worker_class=args.worker_class)
+        try:
+            for name in args.scenarios:
+                r = dict(config=config, **run_scenario(base, name, args.concurrency, args.duration, args.rows))
+                results.append(r)
+                print(f"{config:<8}{name:<11}{r['requests']:>7}{r['errors']:>6}{r['rps']:>9}"
+                      f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}")
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    out = args.out or ROOT / "bench-results" / f"loadtest-{stamp}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    meta = {"timestamp": stamp, "git": rev, "python": platform.python_version(), "cpus": os.cpu_count(),
+            "worker_class": args.worker_class,
+            "rows": args.rows, "latency": args.latency, "concurrency": args.concurrency,
+            "duration": args.duration, "smtp_messages": sink.messages}
+    out.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    print(f"Wrote {out}")
+    sink.shutdown()
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+# backend/tools/sheetctl.py
+# Sheet maintenance through the app's storage engine (STORAGE_BACKEND; Google Sheets by default).
+#   python backend/tools/sheetctl.py check                                  (credentials, sheet, headers, rows)
+#   python backend/tools/sheetctl.py delete --where "Title=TEST via API" --dry-run
+#   python backend/tools/sheetctl.py delete --where "Title=TEST via API"
+#   python backend/tools/sheetctl.py update --where "Status=Draft" --where "URL~example\.org" --set Status=Published
+#   python backend/tools/sheetctl.py append rows.csv                        (or .xlsx / .jsonl)
+#   python backend/tools/sheetctl.py append --set "Title=TEST via API" --set URL=https://example.com
+#   python backend/tools/sheetctl.py dedupe --key URL --keep first --dry-run       (URL/Title keys as in dedupe.py)
+#   python backend/tools/sheetctl.py backfill-ids --dry-run                  (new IDs for rows with a blank ID)
+# The sheet needs an ID column (ROW_ID_HEADER, backend/admin/locator.py): the
+# dashboard finds the row an edit is meant for by it. New rows get one on
+# append/import/update; run backfill-ids once after adding the column, or after
+# rows were pasted into the sheet by hand. `check` counts rows without one.
+# --where (all must hold): COL=VALUE, COL!=VALUE, COL~REGEX (case-insensitive search);
+# "COL=" matches blanks. Columns match sheet headers case-insensitively; file
+# columns are matched like dashboard imports (headers or add-row field names).
+# Matching rows are found with one read of the whole sheet. Deletes run bottom-up
+# with one delete_rows per contiguous run, updates are one batch_update per --set
+# column, appends one append_rows per --chunk rows. Row positions come from that
+# read, so run deletes while nobody is reordering the sheet. --dry-run prints the
+# plan and writes nothing. Every command ends with a timing report.
+import argparse, json, os, re, sys, time
+from contextlib import contextmanager
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+load_dotenv("backend/.env")
+load_dotenv(".env")
+
+from backend.admin.bulk import IMPORT_CHUNK, ImportFileError, column_mapping, contiguous_ranges, iter_file_rows  # noqa: E402
+from backend.admin.dedupe import DUPLICATE_TITLE_HEADER, DUPLICATE_URL_HEADER, normalize_title, normalize_url  # noqa: E402
+from backend.admin.locator import ROW_ID_HEADER, new_row_id  # noqa: E402
+from backend.metrics import SHEETS_SECONDS  # noqa: E402
+
+PREVIEW_ROWS = 10
+_WHERE_RE = re.compile(r"^(.+?)(!=|=|~)(.*)$", re.S)
+
+
+# ---------------- timing ----------------
+def _sheets_calls():
+    """{method: (calls, seconds)} of instrumented Sheets calls so far in this process."""
+    out = {}
+    for labels, (count, seconds) in SHEETS_SECONDS.totals().items():
+        method = dict(labels).get("method", "?")
+        calls, secs = out.get(method, (0, 0.0))
+        out[method] = (calls + count, secs + seconds)
+    return out
+
+
+class Report:
+    """Wall time and Sheets calls per phase of a command."""
+
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        before = _sheets_calls()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            calls = {}
+            for method, (count, _) in _sheets_calls().items():
+                if count - before.get(method, (0, 0.0))[0]:
+                    calls[method] = count - before.get(method, (0, 0.0))[0]
+            self.phases.append((name, seconds, calls))
+
+    def print(self):
+        print(f"\n{'phase':<10}{'seconds':>9}{'api calls':>11}  methods")
+        total_s = total_calls = 0
+        for name, seconds, calls in self.phases:
+            n = sum(calls.values())
+            total_s += seconds
+            total_calls += n
+            methods = ", ".join(f"{m} x{c}" for m, c in sorted(calls.items())) or "-"
+            print(f"{name:<10}{seconds:>9.3f}{n:>11}  {methods}")
+        print(f"{'total':<10}{total_s:>9.3f}{total_calls:>11}")
+
+
+# ---------------- helpers ----------------
+def _header(name, headers):
+    wanted = " ".join(name.split()).lower()
+    for h in headers:
+        if h.strip().lower() == wanted:
+            return h
+    raise SystemExit(f"Unknown column {name!r}. Sheet headers: {', '.join(headers)}")
+
+
+def parse_where(text, headers):
+    """A predicate over a record dict from 'COL=VALUE', 'COL!=VALUE' or 'COL~REGEX'."""
+    m = _WHERE_RE.match(text)
+    if not m:
+        raise SystemExit(f"Bad --where {text!r}; expected COL=VALUE, COL!=VALUE or COL~REGEX.")
+    col, op, value = m.groups()
+    header, value = _header(col, headers), value.strip()
+    if op == "~":
+        try:
+            rx = re.compile(value, re.I)
+        except re.error as e:
+            raise SystemExit(f"Bad regex in --where {text!r}: {e}")
+        return lambda r: bool(rx.search(str(r.get(header, ""))))
+    if op == "!=":
+        return lambda r: str(r.get(header, "")).strip() != value
+    return lambda r: str(r.get(header, "")).strip() == value
+
+
+def parse_set(items, headers):
+    """{header: value} from 'COL=VALUE' items."""
+    out = {}
+    for item in items or ():
+        col, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"Bad --set {item!r}; expected COL=VALUE.")
+        out[_header(col, headers)] = value.strip()
+    return out
+
+
+def _label(record, headers):
+    return " | ".join(str(record.get(h, ""))[:40] for h in headers[:2])
+
+
+def _preview(rows, records, headers):
+    for sheet_row in rows[:PREVIEW_ROWS]:
+        print(f"  row {sheet_row:>6}  {_label(records[sheet_row - 2], headers)}")
+    if len(rows) > PREVIEW_ROWS:
+        print(f"  ... and {len(rows) - PREVIEW_ROWS} more")
+
+
+def _read(store, report):
+    """(headers, records) with one read; records[i] is sheet row i + 2."""
+    with report.phase("read"):
+        headers = store.headers()
+        if not headers:
+            raise SystemExit("Storage is not configured (check STORAGE_BACKEND, SHEET_URL and credentials).")
+        records, _ = store.snapshot()
+    return headers, records
+
+
+def _matching(records, predicates):
+    return [i + 2 for i, r in enumerate(records) if all(p(r) for p in predicates)]
+
+
+def iter_jsonl(path):
+    with open(path, encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    obj = json.loads(line)
+                except ValueError as e:
+                    raise SystemExit(f"{path}:{line_no}: not JSON ({e})")
+                if not isinstance(obj, dict):
+                    raise SystemExit(f"{path}:{line_no}: expected an object")
+                yield obj
+
+
+def file_rows(path, headers):
+    """Rows in header order from a CSV/XLSX (header row first) or JSONL file."""
+    def fill(mapping, raw):
+        values = [""] * len(headers)
+        for target, value in zip(mapping, raw):
+            if target == "sheet_row":
+                raise SystemExit("append adds rows; files with a sheet_row column go through the dashboard import.")
+            for i in target:
+                values[i] = "" if value is None else str(value).strip()
+        return values
+
+    try:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            mappings = {}
+            for obj in iter_jsonl(path):
+                keys = tuple(obj)
+                if keys not in mappings:
+                    mappings[keys] = column_mapping(keys, headers)
+                yield fill(mappings[keys], obj.values())
+            return
+        rows = iter_file_rows(path, path)
+        mapping = column_mapping(next(rows, []), headers)
+        for raw in rows:
+            if any(v.strip() for v in raw):
+                yield fill(mapping, raw)
+    except ImportFileError as e:
+        raise SystemExit(str(e))
+
+
+# ---------------- commands ----------------
+def cmd_check(store, args, report):
+    cred_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "")
+    if store.name == "sheets":
+        from backend.admin.sheets import sheet_id_from_url
+
+        print("Cred path:", cred_path or "(not set)")
+        if cred_path and os.path.exists(cred_path):
+            with open(cred_path, encoding="utf-8") as f:
+                print("Service account email:", json.load(f).get("client_email", "?"))
+        print("Sheet ID:", sheet_id_from_url(os.getenv("SHEET_URL", "")) or "(bad or missing SHEET_URL)")
+    headers, records = _read(store, report)
+    print(f"Engine: {store.name}")
+    print(f"Headers ({len(headers)}): {', '.join(headers)}")
+    print(f"Rows: {len(records)}")
+    if ROW_ID_HEADER not in headers:
+        print(f"[WARN] No {ROW_ID_HEADER!r} column: add it, then run backfill-ids, so edits find their rows by ID.")
+    else:
+        blank = sum(1 for r in records if not str(r.get(ROW_ID_HEADER, "")).strip())
+        if blank:
+            print(f"[WARN] {blank} row(s) have no {ROW_ID_HEADER}; run backfill-ids.")
+
+
+def cmd_delete(store, args, report):
+    headers, records = _read(store, report)
+    predicates = [parse_where(w, headers) for w in args.where]
+    with report.phase("plan"):
+        rows = _matching(records, predicates)
+        ranges = contiguous_ranges(rows)
+    print(f"{len(rows)} of {len(records)} rows match; {len(ranges)} contiguous range(s), deleted bottom-up.")
+    _preview(rows, records, headers)
+    if rows and not args.dry_run:
+        with report.phase("delete"):
+            store.delete_many(rows)
+        print(f"Deleted {len(rows)} rows.")
+
+
+def cmd_update(store, args, report):
+    headers, records = _read(store, report)
+    predicates = [parse_where(w, headers) for w in args.where]
+    changes = parse_set(args.set, headers)
+    if not changes:
+        raise SystemExit("update needs at least one --set COL=VALUE.")
+    with report.phase("plan"):
+        rows = _matching(records, predicates)
+        cells = {h: {r: v for r in rows if str(records[r - 2].get(h, "")) != v} for h, v in changes.items()}
+    print(f"{len(rows)} of {len(records)} rows match.")
+    for h, col in cells.items():
+        print(f"  {h!r} -> {changes[h]!r}: {len(col)} cell(s) change")
+    _preview(rows, records, headers)
+    if not args.dry_run:
+        with report.phase("update"):
+            for h, col in cells.items():
+                store.update_cells(h, col)
+        print(f"Updated {sum(len(c) for c in cells.values())} cell(s).")
+
+
+def cmd_append(store, args, report):
+    with report.phase("read"):
+        headers = store.headers()
+        if not headers:
+            raise SystemExit("Storage is not configured (check STORAGE_BACKEND, SHEET_URL and credentials).")
+    if args.file:
+        rows = file_rows(args.file, headers)
+    else:
+        values = parse_set(args.set, headers)
+        if not values:
+            raise SystemExit("append needs a file or at least one --set COL=VALUE.")
+        rows = iter([[values.get(h, "") for h in headers]])
+
+    total, batches, chunk = 0, 0, []
+
+    def flush():
+        nonlocal batches
+        if chunk and not args.dry_run:
+            with report.phase("append"):
+                store.append_many(chunk)
+        batches += 1
+
+    for values in rows:
+        chunk.append(values)
+        total += 1
+        if total <= PREVIEW_ROWS:
+            print(f"  + {' | '.join(v[:40] for v in values[:2])}")
+        if len(chunk) >= args.chunk:
+            flush()
+            chunk = []
+    if chunk:
+        flush()
+    if total > PREVIEW_ROWS:
+        print(f"  ... and {total - PREVIEW_ROWS} more")
+    verb = "Would append" if args.dry_run else "Appended"
+    print(f"{verb} {total} rows in {batches} append_rows call(s).")
+
+
+def dedupe_key(record, keys):
+    """The --key values, normalized like the add form's duplicate check for the URL and title columns."""
+    out = []
+    for k in keys:
+        value = record.get(k, "")
+        if k == DUPLICATE_URL_HEADER:
+            out.append(normalize_url(value))
+        elif k == DUPLICATE_TITLE_HEADER:
+            out.append(normalize_title(value))
+        else:
+            out.append(" ".join(str(value).split()).casefold())
+    return tuple(out)
+
+
+def cmd_dedupe(store, args, report):
+    headers, records = _read(store, report)
+    keys = [_header(k, headers) for k in args.key]
+    with report.phase("plan"):
+        seen, drop = set(), []
+        order = range(len(records)) if args.keep == "first" else range(len(records) - 1, -1, -1)
+        for i in order:
+            key = dedupe_key(records[i], keys)
+            if not any(key):
+                continue
+            if key in seen:
+                drop.append(i + 2)
+            else:
+                seen.add(key)
+        drop.sort()
+        ranges = contiguous_ranges(drop)
+    print(f"{len(drop)} duplicate row(s) on {', '.join(keys)} (keeping the {args.keep}); "
+          f"{len(ranges)} contiguous range(s).")
+    _preview(drop, records, headers)
+    if drop and not args.dry_run:
+        with report.phase("delete"):
+            store.delete_many(drop)
+        print(f"Deleted {len(drop)} rows.")
+
+
+def cmd_backfill_ids(store, args, report):
+    headers, records = _read(store, report)
+    if ROW_ID_HEADER not in headers:
+        raise SystemExit(f"The sheet has no {ROW_ID_HEADER!r} column; add it as a header first.")
+    with report.phase("plan"):
+        rows = [i + 2 for i, r in enumerate(records) if not str(r.get(ROW_ID_HEADER, "")).strip()]
+        ids = {r: new_row_id() for r in rows}
+    print(f"{len(rows)} of {len(records)} rows have no {ROW_ID_HEADER}.")
+    _preview(rows, records, headers)
+    if ids and not args.dry_run:
+        with report.phase("update"):
+            store.update_cells(ROW_ID_HEADER, ids)
+        print(f"Wrote {len(ids)} ID(s).")
+
+
+COMMANDS = {"check": cmd_check, "delete": cmd_delete, "update": cmd_update, "append": cmd_append,
+            "dedupe": cmd_dedupe, "backfill-ids": cmd_backfill_ids}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Bulk maintenance of the catalog sheet.")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan, write nothing")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("check", help="credentials, sheet, headers and row count")
+    p = sub.add_parser("delete", help="delete rows matching every --where")
+    p.add_argument("--where", action="append", required=True, metavar="COL=VALUE")
+    p = sub.add_parser("update", help="set columns on rows matching every --where")
+    p.add_argument("--where", action="append", required=True, metavar="COL=VALUE")
+    p.add_argument("--set", action="append", metavar="COL=VALUE")
+    p = sub.add_parser("append", help="append rows from a CSV/XLSX/JSONL file or one row from --set")
+    p.add_argument("file", nargs="?")
+    p.add_argument("--set", action="append", metavar="COL=VALUE")
+    p.add_argument("--chunk", type=int, default=IMPORT_CHUNK, help="rows per append_rows call")
+    p = sub.add_parser("dedupe", help="delete rows repeating the --key columns (normalized like the add form's check)")
+    p.add_argument("--key", action="append", required=True, metavar="COL")
+    p.add_argument("--keep", choices=("first", "last"), default="first")
+    sub.add_parser("backfill-ids", help=f"give rows with a blank {ROW_ID_HEADER} column a new ID")
+    for p in sub.choices.values():
+        p.add_argument("--dry-run", action="store_true", default=argparse.SUPPRESS, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None, store=None):
+    args = build_parser().parse_args(argv)
+    if store is None:
+        from backend.admin.storage import get_storage
+
+        store = get_storage()
+    report = Report()
+    try:
+        COMMANDS[args.command](store, args, report)
+    finally:
+        report.print()
+    return report
+
+
+if __name__ == "__main__":
+    main()
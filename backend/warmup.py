@@ -0,0 +1,64 @@
+# backend/warmup.py
+"""
+Worker warm-up, run once per process before it takes traffic (gunicorn's
+post_worker_init, see gunicorn.conf.py).
+
+Without it every worker pays on its first real request for compiling the
+templates it renders, authenticating to Google Sheets, downloading the
+records and rendering the cached content pages. Each step is timed and
+logged; a failing step is reported and skipped, never fatal to the worker.
+"""
+import os
+import time
+
+WARMUP_SHEETS = os.getenv("WARMUP_SHEETS", "1") == "1"
+
+
+def compile_templates(app) -> int:
+    """Load every template the app can find into the Jinja environment's cache (from the build's bytecode when shipped)."""
+    env = app.jinja_env
+    names = [n for n in env.list_templates() if n.endswith((".html", ".txt", ".xml"))]
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def prime_sheets() -> int:
+    """Open the Sheets client and load records into the record cache and catalog; returns the row count."""
+    from backend.admin.storage import get_storage
+    from backend.catalog import get_catalog
+
+    store = get_storage()
+    if not store.headers():
+        return 0
+    records, _ = store.snapshot()
+    get_catalog()  # builds its index from the snapshot just cached
+    return len(records)
+
+
+def prerender_pages(app) -> int:
+    from backend.pagecache import page_cache
+
+    return page_cache.warm(app)
+
+
+def warm_up(app) -> dict:
+    """Run every warm-up step; returns {step: (result, seconds)}."""
+    steps = [
+        ("templates", lambda: compile_templates(app)),
+        ("pages", lambda: prerender_pages(app)),
+    ]
+    if WARMUP_SHEETS:
+        steps.insert(1, ("sheets", prime_sheets))
+    report = {}
+    for name, step in steps:
+        t0 = time.perf_counter()
+        try:
+            result = step()
+        except Exception as e:
+            print(f"[WARN] warm-up {name} failed: {e}")
+            result = None
+        report[name] = (result, time.perf_counter() - t0)
+    print(f"[INFO] warm-up (pid {os.getpid()}): " +
+          ", ".join(f"{name}={result} in {secs * 1000:.0f} ms" for name, (result, secs) in report.items()))
+    return report
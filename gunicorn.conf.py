@@ -0,0 +1,96 @@
+# gunicorn.conf.py
+# Production server settings (picked up by `gunicorn -c gunicorn.conf.py`).
+# Every value can be overridden from the environment:
+#   PORT                    bind port (Cloud Run sets it)                   8080
+#   WEB_CONCURRENCY         worker processes            max(2, CPUs), capped at GUNICORN_MAX_WORKERS
+#   GUNICORN_MAX_WORKERS    cap for the derived worker count                8
+#   GUNICORN_WORKER_CLASS   gthread, or asgi (opt-in: gunicorn >= 26's      gthread
+#                           asyncio worker through backend/asgi.py)
+#   GUNICORN_THREADS        threads running Flask in each worker            8
+#   GUNICORN_PRELOAD        import the app once in the master (1/0)         1
+#   GUNICORN_MAX_REQUESTS   recycle a worker after this many requests (0=off) 2000
+#   GUNICORN_TIMEOUT        worker timeout / boot budget, seconds           60
+#   WARMUP                  warm each worker before it takes traffic (1/0)  1
+# Set OUTBOX_DB to a persistent volume too: the contact-form spool defaults to
+# the temp directory, which on Cloud Run is memory (backend/outbox.py).
+import os
+
+
+def _cpus():
+    try:
+        return len(os.sched_getaffinity(0))  # what the container may actually use
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+# Sheets/SMTP calls are I/O-bound, so concurrency comes from threads; a second
+# process keeps one slow or recycling worker from stalling the service. Under
+# gthread each open admin change feed holds a thread (admin/events.py caps
+# them). GUNICORN_WORKER_CLASS=asgi opts in to gunicorn's asyncio worker: Flask
+# then runs on backend/asgi.py's pool of GUNICORN_THREADS threads and the
+# feed's long-lived streams stay on the event loop instead.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "asgi":
+    import gunicorn
+
+    if int(gunicorn.__version__.split(".")[0]) < 26:
+        raise RuntimeError(f"GUNICORN_WORKER_CLASS=asgi needs gunicorn >= 26 (found {gunicorn.__version__})")
+wsgi_app = "backend.asgi:create_app()" if worker_class == "asgi" else "backend.app:create_app()"
+workers = int(os.getenv("WEB_CONCURRENCY") or min(max(2, _cpus()), int(os.getenv("GUNICORN_MAX_WORKERS", "8"))))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# The app reads these: the Sheets quota is shared out across WEB_CONCURRENCY
+# workers, each worker's HTTP pool should cover its threads, and the bridge
+# and the change feed size themselves from GUNICORN_THREADS.
+os.environ["WEB_CONCURRENCY"] = str(workers)
+os.environ["GUNICORN_THREADS"] = str(threads)
+os.environ.setdefault("SHEETS_POOL_SIZE", str(threads))
+if worker_class == "asgi":
+    threads = 1  # gunicorn's own setting; the asyncio worker has no thread pool of its own
+
+# Safe to preload: nothing starts a thread or opens a connection at import,
+# and every per-process singleton (Sheets client, scheduler, storage engine,
+# mirror, outbox) is rebuilt when it sees a new pid after the fork.
+reload = os.getenv("GUNICORN_RELOAD", "0") == "1"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1" and not reload
+
+# Recycle workers gracefully; the jitter keeps them from restarting together.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# Heartbeat files on tmpfs: a disk-backed /tmp can stall workers in containers.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def on_starting(server):
+    server.log.info("worker_class=%s workers=%s threads=%s preload=%s max_requests=%s",
+                    worker_class, workers, os.environ["GUNICORN_THREADS"], preload_app, max_requests)
+
+
+def post_worker_init(worker):
+    # The warm-up belongs right after the fork, but without preload the app is
+    # only loaded after post_fork; post_worker_init runs once it is, and before
+    # the worker accepts its first connection.
+    app = getattr(worker, "asgi", None)
+    if app is not None:  # the asyncio worker: a WSGIBridge around the Flask app
+        app.attach(worker)
+        app = app.wsgi_app
+    else:
+        app = worker.wsgi
+    if os.getenv("CONTACT_OUTBOX", "1") == "1":  # read after the app loaded backend/.env
+        from backend.outbox import spool_warning
+
+        warning = spool_warning()
+        if warning:
+            worker.log.warning(warning)
+    if os.getenv("WARMUP", "1") != "1":
+        return
+    from backend.warmup import warm_up
+
+    warm_up(app)